@@ -0,0 +1,215 @@
+"""Benchmark of the commands talking to the InvenTree server
+
+Runs `build libs`, `build bom` and both JLC exporters of a synthetic project against the fake
+InvenTree server (see `fakeserver.py`) for catalogs of several sizes. Each command runs in a
+fresh interpreter with its own home directory, so its peak memory is measured on its own and the
+user's configuration, tokens and downloads are left alone.
+
+Reported per size and command: wall time of the command, requests by endpoint, bytes sent by the
+server and peak memory (maximum resident set size) of the interpreter.
+
+Usage:
+    python benchmarks/api_commands.py [ --sizes 10,100,1000,10000 ] [ --latency S ] [ --bandwidth B ]
+                                      [ --error-rate R ] [ --model-size BYTES ] [ --endpoints N ]
+                                      [ --json FILE ]
+
+Exits with status 1 if a command failed.
+
+Author:
+    (C) Marvin Mager - @mvnmgrx - 2022
+
+License identifier:
+    GPL-3.0
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from os import makedirs, path
+
+BENCHMARK_DIR = path.dirname(path.abspath(__file__))
+sys.path.insert(0, path.join(path.dirname(BENCHMARK_DIR), 'src'))
+
+from fakeserver import MASTER_PART_IPN, PACKAGES, PASSWORD, USERNAME, Catalog, FakeInvenTree
+
+PROJECT_NAME = 'bench'
+SERVER_ID = 'bench'
+
+COMMANDS = ['build libs', 'build bom', 'export jlc_assembly_bom {output}', 'export jlc_assembly_xy {output}']
+"""Commands run for each size, `{output}` is replaced by the output folder of the exporters"""
+
+def write_project(directory: str, catalog: Catalog):
+    """Write a KiCad project using every part of the catalog once, together with its KiTree
+    project file. The schematic and the board are flat, the parts are placed on a grid."""
+    from kiutils.board import Board
+    from kiutils.footprint import Footprint
+    from kiutils.items.common import Position, Property
+    from kiutils.items.schitems import SchematicSymbol, SymbolInstance
+    from kiutils.schematic import Schematic
+
+    makedirs(path.join(directory, 'output'), exist_ok=True)
+    with open(path.join(directory, f'{PROJECT_NAME}.kicad_pro'), 'w') as outfile:
+        outfile.write('{}\n')
+    with open(path.join(directory, '.kitree'), 'w') as outfile:
+        json.dump({'inventreeServerId': SERVER_ID, 'masterPart': MASTER_PART_IPN, 'parts': catalog.ipns}, outfile, indent=4)
+
+    schematic = Schematic.create_new()
+    board = Board.create_new()
+    board.setup.auxAxisOrigin = Position(X=0, Y=0)
+    for index, ipn in enumerate(catalog.ipns):
+        package = PACKAGES[index % len(PACKAGES)]
+        reference = f'{package[0]}{index + 1}'
+        footprint = f'{PROJECT_NAME}-footprints:{package}'
+        x, y = 10 + (index % 100) * 5.08, 10 + (index // 100) * 5.08
+
+        symbol = SchematicSymbol(position=Position(X=x, Y=y, angle=0), unit=1, inBom=True, onBoard=True,
+                                 uuid=str(uuid.uuid4()))
+        symbol.libId = f'{PROJECT_NAME}-symbols:{package}'
+        symbol.properties = [
+            Property(key='Reference', value=reference, id=0),
+            Property(key='Value', value=ipn, id=1),
+            Property(key='Footprint', value=footprint, id=2),
+            Property(key='Datasheet', value='', id=3),
+            Property(key='Internal Nr.', value=ipn, id=4),
+        ]
+        schematic.schematicSymbols.append(symbol)
+        schematic.symbolInstances.append(SymbolInstance(path=f'/{symbol.uuid}', reference=reference, unit=1,
+                                                        value=ipn, footprint=footprint))
+
+        item = Footprint.create_new(footprint, ipn, type='smd', reference=reference)
+        item.position = Position(X=x, Y=y, angle=0)
+        item.properties = {'Internal Nr.': ipn}
+        board.footprints.append(item)
+
+    schematic.to_file(path.join(directory, f'{PROJECT_NAME}.kicad_sch'))
+    board.to_file(path.join(directory, f'{PROJECT_NAME}.kicad_pcb'))
+
+def write_config(home: str, serverUrl: str):
+    """Write a KiTree configuration with the credentials of the fake server"""
+    from components.data import Credentials
+    from misc.config import ConfigData
+    from misc.serialize import to_dict
+
+    data = ConfigData(inventreeCredentials=[Credentials(id=SERVER_ID, username=USERNAME, password=PASSWORD,
+                                                        domain=serverUrl)])
+    makedirs(path.join(home, '.kitree'), exist_ok=True)
+    with open(path.join(home, '.kitree', 'config.json'), 'w') as outfile:
+        json.dump(to_dict(data), outfile, indent=4)
+
+def run_worker(projectPath: str, command: str):
+    """Load the project and run a single command, then print the measurements as JSON. Runs in
+    the interpreter started by `run_command()`, the home directory is the benchmark's."""
+    from main import create_app
+    from misc.console import ExitCode
+    from misc.logger import Logger
+
+    Logger.Init(logPath=path.join(path.expanduser('~'), '.kitree', 'kitree.log'))
+    app = create_app()
+    app.console.output = open(os.devnull, 'w')
+    app.console.interactive = False
+    if app.console.process_input(f'project load {projectPath}') != ExitCode.Ok:
+        sys.exit(f'Loading the project at {projectPath} failed')
+    # The connection is made in the background and not part of the measurement
+    if not app.project.api.is_connected():
+        sys.exit(f'Connecting to the fake server failed: {app.project.api.connectionError}')
+
+    stats = app.project.api.api.stats
+    requestsBefore, bytesBefore = stats.requests, stats.bytesDownloaded
+    start = time.perf_counter()
+    exitCode = app.console.process_input(command)
+    seconds = time.perf_counter() - start
+
+    print(json.dumps({
+        'seconds': seconds,
+        'exitCode': exitCode,
+        'clientRequests': stats.requests - requestsBefore,
+        'requestsShared': stats.requestsSaved,
+        'bytesReceived': stats.bytesDownloaded - bytesBefore,
+        'retries': app.project.api.api.scheduler.retries,
+        # Kilobytes on Linux
+        'maxRssKb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }))
+
+def run_command(home: str, projectPath: str, command: str) -> dict:
+    """Run a command of the project in a fresh interpreter and return its measurements"""
+    result = subprocess.run(
+        [sys.executable, path.abspath(__file__), '--worker', projectPath, command],
+        env=dict(os.environ, HOME=home), capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f'"{command}" failed:\n{result.stderr.strip()}')
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def run_size(args: argparse.Namespace, size: int) -> list:
+    """Run all commands against a catalog of the given size"""
+    from misc.progress import format_bytes
+
+    catalog = Catalog(parts=size, modelSize=args.model_size)
+    results = []
+    with tempfile.TemporaryDirectory(prefix='kitree-bench-') as directory, \
+         FakeInvenTree(catalog, latency=args.latency, bandwidth=args.bandwidth, errorRate=args.error_rate,
+                       retryAfter=0 if args.error_rate > 0 else None) as server:
+        home = path.join(directory, 'home')
+        projectPath = path.join(directory, PROJECT_NAME)
+        write_config(home, server.url)
+        write_project(projectPath, catalog)
+
+        print(f'{size} parts')
+        print(f'  {"Command":<30} {"Time":>9} {"Requests":>9} {"Sent":>11} {"Peak RSS":>11}')
+        for command in COMMANDS:
+            command = command.format(output=path.join(projectPath, 'output'))
+            server.reset_stats()
+            measured = run_command(home, projectPath, command)
+            measured.update({
+                'parts': size,
+                'command': command.split(' /')[0],
+                'requests': dict(server.requests.most_common()),
+                'bytesSent': dict(server.bytesSent.most_common()),
+                'errorsInjected': server.errorsInjected,
+            })
+            results.append(measured)
+
+            status = '' if measured['exitCode'] == 0 else f'  FAILED (exit code {measured["exitCode"]})'
+            if server.errorsInjected > 0:
+                status += f'  {server.errorsInjected} errors injected, {measured["retries"]} retries'
+            print(f'  {measured["command"]:<30} {measured["seconds"]:>7.2f} s {sum(server.requests.values()):>9} '
+                  f'{format_bytes(sum(server.bytesSent.values())):>11} {format_bytes(measured["maxRssKb"] * 1024):>11}{status}')
+            for name, count in server.requests.most_common(args.endpoints):
+                print(f'      {count:>7} x {name} ({format_bytes(server.bytesSent[name])})')
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark of the commands talking to the InvenTree server')
+    parser.add_argument('--sizes', default='10,100,1000,10000', help='Comma separated numbers of parts')
+    parser.add_argument('--latency', type=float, default=0.0, help='Delay of each response of the server in seconds')
+    parser.add_argument('--bandwidth', type=float, default=None, help='Bytes per second of each response')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests failing with HTTP 503')
+    parser.add_argument('--model-size', type=int, default=1 << 20, help='Size of each 3D model in bytes')
+    parser.add_argument('--endpoints', type=int, default=3, help='Number of endpoints listed per command')
+    parser.add_argument('--json', default=None, help='Write all results to this file')
+    parser.add_argument('--worker', nargs=2, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker is not None:
+        return run_worker(*args.worker)
+
+    results = []
+    for size in [int(size) for size in args.sizes.split(',')]:
+        results += run_size(args, size)
+
+    if args.json is not None:
+        with open(args.json, 'w') as outfile:
+            json.dump(results, outfile, indent=4)
+
+    failed = [result for result in results if result['exitCode'] != 0]
+    if len(failed) > 0:
+        sys.exit(f'{len(failed)} commands failed')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,494 @@
+"""Object model of the InvenTree components before it used frozen slotted dataclasses
+
+A copy of the classes of `components.company` and `components.part` as they were before, reduced to
+loading a part. `memory_models.py` measures them as the reference of the current model. Do not
+change them, they are only kept to reproduce the comparison.
+
+Author:
+    (C) Marvin Mager - @mvnmgrx - 2022
+
+License identifier:
+    GPL-3.0
+"""
+
+from dataclasses import dataclass, field
+from types import NoneType
+from typing import Dict, Optional
+
+from api.inventree import InvenTreeApi
+from misc.logger import Logger
+
+@dataclass
+class Company():
+    """This class represents a Company of the Inventree API
+    """
+    ID: int = -1
+    Url: str = ""
+    Name: str = ""
+    Description: str = ""
+    Website: str = ""
+    Phone: str = ""
+    Address: str = ""
+    EMail: str = None
+    Currency: str = ""
+    Contact: str = ""
+    Link: str = ""
+    ImagePath: str = ""
+    IsCustomer: bool = False
+    IsManufacturer: bool = False
+    IsSupplier: bool = False
+    Notes: str = ""
+    PartsSupplied: int = 0
+    PartsManufactured: int = 0
+
+    def __init__(self, data: dict | None = None):
+        """Initializes a Company object with the data obtained from Inventree API
+
+        Args:
+            data (dict): Data from Inventree API or None to create an empty object
+        """
+        if data is None:
+            return
+
+        self.ID = data['pk']
+        self.Url = data['url']
+        self.Name = data['name']
+        self.Description = data['description']
+        self.Website = data['website']
+        self.Phone = data['phone']
+        self.Address = data['address']
+        self.EMail = data['email']
+        self.Currency = data['currency']
+        self.Contact = data['contact']
+        self.Link = data['link']
+        self.ImagePath = data['image']
+        self.IsCustomer = data['is_customer']
+        self.IsManufacturer = data['is_manufacturer']
+        self.IsSupplier = data['is_supplier']
+        self.Notes = data['notes']
+        self.PartsSupplied = data['parts_supplied']
+        self.PartsManufactured = data['parts_manufactured']
+
+@dataclass
+class SupplierPart():
+    """This class represents a Company/Part of the Inventree API
+    """
+    api: InvenTreeApi = None
+
+    Description: str = ""
+    Link: str = ""
+    ManufacturerPart: int = -1
+    #ManufacturerPart: ManufacturerPart = ManufacturerPart(None)
+    Note: str = ""
+    ID: int = -1
+    Packaging: str = ""
+    Part: int = -1
+    SKU: str = ""
+    Supplier: Company = field(default_factory=lambda: Company(None))
+
+    def __init__(self, api: InvenTreeApi, data: Optional[dict] = None):
+        """Initializes a SupplierPart object with the data obtained from Inventree API
+
+        Args:
+            data (dict): Data from Inventree API or None to create an empty object
+        """
+        self.api = api
+        if data is None:
+            return
+
+        self.Description = data['description']
+        self.Link = data['link']
+        self.ManufacturerPart = data['manufacturer_part']
+        self.Note = data['note']
+        self.ID = data['pk']
+        self.Packaging = data['packaging']
+        self.Part = data['part']
+        self.SKU = data['SKU']
+
+        # Load supplier data from Inventree
+        company = self.api.get_company(data['supplier'])
+        if company is not None:
+            self.Supplier = Company(company)
+
+        # Get manufacturer part of this supplier part
+        #manPart = ITApi.GetManufacturerPart(data['manufacturer_part'])
+        #if manPart is not None:
+        #    self.ManufacturerPart = ManufacturerPart(manPart)
+
+@dataclass
+class ManufacturerPart():
+    """This class represents a Company/Part/Manufacturer of the Inventree API
+    """
+    api: InvenTreeApi = None
+
+    ID: int = -1
+    Part: int = -1
+    Manufacturer: Company = field(default_factory=lambda: Company(None))
+    Description: str = ""
+    MPN: str = ""
+    Link: str = ""
+    SupplierParts: list[SupplierPart] = None
+
+    def __init__(self, api: InvenTreeApi, data: Optional[dict] = None):
+        """Initializes a ManufacturerPart object with the data obtained from Inventree API
+
+        Args:
+            data (dict): Data from Inventree API or None to create an empty object
+        """
+        self.api = api
+        if data is None:
+            return
+
+        self.ID = data['pk']
+        self.Part = data['part']
+        self.Description = data['description']
+        self.MPN = data['MPN']
+        self.Link = data['link']
+
+        # Load manufacturer data from Inventree
+        company = self.api.get_company(data['manufacturer'])
+        if company is not None:
+            self.Manufacturer = Company(company)
+
+        # Get a list of supplier parts for this manufacturer part
+        parts = self.api.get_supplier_part_list(self.MPN)
+        if parts is not None:
+            self.SupplierParts = []
+            for part in parts:
+                self.SupplierParts.append(SupplierPart(self.api, part))
+
+@dataclass
+class PartCategory():
+    """This class represents a Part/Category of the Inventree API
+    """
+    ID: int = 0
+    Name: str = ""
+    Description: str = ""
+    DefaultLocation = NoneType
+    DefaultKeywords: str = ""
+    Level: int = 0
+    Parent: int = 0
+    Parts: int = 0
+    PathString: str = ""
+    Url: str = ""
+
+    def __init__(self, data: dict | None):
+        """Initializes a PartCategory object with the data obtained from Inventree API
+
+        Args:
+            data (dict): Data from Inventree API or None to create an empty object
+        """
+        if data is None:
+            return
+
+        self.ID = data['pk']
+        self.Name = data['name']
+        self.Description = data['description']
+        self.DefaultLocation = data['default_location']
+        self.DefaultKeywords = data['default_keywords']
+        self.Level = data['level']
+        self.Parent = data['parent']
+        # try:
+        #     self.Parts = data['parts']
+        # except:
+        #     self.Parts = None
+        self.PathString = data['pathstring']
+        self.Url = data['url']
+
+@dataclass
+class PartParameterTemplate():
+    """This class represents a Part/Parameter/Template of the Inventree API
+    """
+    ID: int = -1
+    Name: str = ""
+    Units: str = ""
+
+    def __init__(self, data: dict | None):
+        """Initializes a PartParameterTemplate object with the data obtained from Inventree API
+
+        Args:
+            data (dict): Data from Inventree API or None to create an empty object
+        """
+        if data is None:
+            return
+
+        self.ID = data['pk']
+        self.Name = data['name']
+        self.Units = data['units']
+
+@dataclass
+class PartParameter():
+    """This class represents a Part/Parameter of the Inventree API
+    """
+    ID: int = -1
+    Part: int = -1
+    Template: int = -1
+    TemplateDetail: PartParameterTemplate = None
+    Data: str = ""
+
+    def __init__(self, data: dict | None):        
+        """Initializes a PartParameter object with the data obtained from Inventree API
+
+        Args:
+            data (dict): Data from Inventree API or None to create an empty object
+        """
+        if data is None:
+            return
+
+        self.ID = data['pk']
+        self.Part = data['part']
+        self.Template = data['template']
+        self.TemplateDetail = PartParameterTemplate(data['template_detail'])
+        self.Data = data['data']
+
+@dataclass
+class PartAttachment():
+    """This class represents a Part/Attachment of the Inventree API
+    """
+    ID: int = -1
+    Part: int = -1
+    Attachment: str = ""
+    FileName: str = ""
+    Comment: str = ""
+    UploadDate: str = ""
+
+    def __init__(self, data: dict | None):        
+        """Initializes a PartAttachment object with the data obtained from Inventree API
+
+        Args:
+            data (dict): Data from Inventree API or None to create an empty object
+        """
+        if data is None:
+            return
+
+        self.ID = data['pk']
+        self.Part = data['part']
+        self.Attachment = data['attachment']
+        self.FileName = data['filename']
+        self.Comment = data['comment']
+        self.UploadDate = data['upload_date']
+
+@dataclass 
+class BomItem():
+    """Represents a Bom of the Inventree API
+    """
+    AllowVariants: bool = False
+    Inherited: bool = False
+    Note: str = ""
+    Optional: bool = False
+    Overage: str = ""
+    ID: int = -1
+    Part: int = -1
+    Quantity: float = 0.0
+    Reference: str = ""
+    SubPart: int = -1
+    PriceRange = None
+    Validated: bool = False
+
+    def __init__(self, data: dict | None):        
+        """Initializes a BomItem object with the data obtained from Inventree API
+
+        Args:
+            data (dict): Data from Inventree API or None to create an empty object
+        """
+        if data is None:
+            return
+
+        self.AllowVariants = data['allow_variants']
+        self.Inherited = data['inherited']
+        self.Note = data['note']
+        self.Optional = data['optional']
+        self.Overage = data['overage']
+        self.ID = data['pk']
+        self.Part = data['part']
+        self.Quantity = data['quantity']
+        self.Reference = data['reference']
+        self.SubPart = data['sub_part']
+        self.Validated = data['validated']
+
+@dataclass
+class Part():    
+    """This class represents a Part of the Inventree API
+    """
+    api: InvenTreeApi = None
+
+    Active: bool = False
+    Assembly: bool = False
+    Category: int = 0
+    CategoryDetail: PartCategory = field(default_factory=lambda: PartCategory(None))
+    Component: bool = False
+    DefaultExpiry: int = 0
+    DefaultLocation: str = NoneType
+    DefaultSupplier: str = NoneType
+    Description: str = NoneType
+    FullName: str = NoneType
+    ImagePath: str = NoneType
+    InStock: float = 0.0
+    Ordering: float = 0.0
+    Building: float = 0.0
+    IPN: str = NoneType
+    IsTemplate: bool = False
+    Keywords: str = ""
+    Link: str = ""
+    MinimumStock: int = 0
+    Name: str = ""
+    Notes: str = NoneType
+    ID: int = 0
+    Purchaseable: bool = False
+    Revision: str = ""
+    Salable: bool = False
+    Starred: bool = False
+    StockItemCount: int = 0
+    Suppliers: int = 0
+    ThumbnailPath: str = ""
+    Trackable: bool = False
+    Units: str = ""
+    VariantOf: int = NoneType
+    VariantPart = None
+    Virtual: bool = False
+    Parameters: list[PartParameter] = None
+    Attachments: list[PartAttachment] = None
+    Bom: list[BomItem] = None
+    ManufacturerParts: list[ManufacturerPart] = None
+    Log: Logger = Logger.Create(__name__)
+
+    ResolvedParameters: Dict[str, str] = None
+    """Parameter name as key and its value as value, merged down the variant chain: A parameter
+    of the part overrides the one of its template"""
+
+    ResolvedAttachments: Dict[str, PartAttachment] = None
+    """Attachment comment (e.g. `Footprint`) as key and the attachment as value, merged down the
+    variant chain like `ResolvedParameters`"""
+
+    # Paths of the temporary files downloaded by KiTree
+    ModelPath: str = None
+    """Path to the temporary 3D-model file downloaded by DownloadCadData(). None when no 3D-Model was downloaded"""
+
+    FootprintPath: str = None
+    """Path to the temporary footprint file downloaded by DownloadCadData()"""
+
+    SymbolPath: str = None
+    """Path to the temporary symbol file downloaded by DownloadCadData()"""
+
+    def __init__(self, api: InvenTreeApi, partIpn: str | None):
+        self.api = api
+        if partIpn is None:
+            return 
+
+        data = self.api.get_part_detail(partIpn)
+        if data is None:
+            raise Exception(f'Part {partIpn} does not exist!')
+        self._load(data)
+
+    @staticmethod
+    def get_by_id(api: InvenTreeApi, partId: int) -> 'Part':
+        """Get a part by its ID. Parts are cached by the API, so a template is only loaded once and
+        shared by all of its variants.
+
+        Args:
+            api (InvenTreeApi): The API to load the part from
+            partId (int): ID of the part
+
+        Returns:
+            Part: The part
+        """
+        part = api.partCache.get(partId)
+        if part is None:
+            data = api.get_part(partId)
+            if data is None:
+                raise Exception(f'Part with ID {partId} does not exist!')
+            part = Part(api, None)
+            part._load(data)
+            api.partCache[partId] = part
+        return part
+
+    def _load(self, data: dict):
+        """Fill the part with the data obtained from Inventree API and load its parameters,
+        attachments, BOM items, manufacturer parts and templates"""
+        #self.CategoryDetail = PartCategory(data['category_detail'])
+
+        self.Active = data['active']
+        self.Assembly = data['assembly']
+        self.Category = data['category']
+        self.Component = data['component']
+        self.DefaultExpiry = data['default_expiry']
+        self.DefaultSupplier = data['default_supplier']
+        self.Description = data['description']
+        self.FullName = data['full_name']
+        self.ImagePath = data['image']
+        self.InStock = data['in_stock']
+        self.Ordering = data['ordering']
+        self.Building = data['building']
+        self.IPN = data['IPN']
+        self.IsTemplate = data['is_template']
+        self.Keywords = data['keywords']
+        self.Link = data['link']
+        self.MinimumStock = data['minimum_stock']
+        self.Name = data['name']
+        self.Notes = data['notes']
+        self.ID = data['pk']
+        self.Purchaseable = data['purchaseable']
+        self.Revision = data['revision']
+        self.Salable = data['salable']
+        self.Starred = data['starred']
+        self.StockItemCount = data['stock_item_count']
+        self.Suppliers = data['suppliers']
+        self.ThumbnailPath = data['thumbnail']
+        self.Trackable = data['trackable']
+        self.Units = data['units']
+        self.VariantOf = data['variant_of']
+        self.Virtual = data['virtual']
+
+        # Check if the part is a variant of another part and load it
+        if self.VariantOf is not NoneType and self.VariantOf is not None:
+            self.VariantPart = Part.get_by_id(self.api, self.VariantOf)
+
+        # Retrieve the part's parameter list
+        parameterList = self.api.get_part_parameters(self.ID)
+        if parameterList is not None:
+            self.Parameters = []
+            for data in parameterList:
+                self.Parameters.append(PartParameter(data))
+
+        # Retrieve the part's attachment list
+        attachmentList = self.api.get_part_attachments(self.ID)
+        if attachmentList is not None:
+            self.Attachments = []
+            for data in attachmentList:
+                self.Attachments.append(PartAttachment(data))
+
+        # Retrieve the part's BOM items
+        bomItems = self.api.get_part_bom_items(self.ID)
+        if bomItems is not None:
+            self.Bom = []
+            for data in bomItems:
+                self.Bom.append(BomItem(data))
+
+        # Get list of manufacturer parts for this Part
+        parts = self.api.get_manufacturer_part_list(self.ID)
+        if parts is not None:
+            self.ManufacturerParts = []
+            for part in parts:
+                self.ManufacturerParts.append(ManufacturerPart(self.api, part))
+
+        self._resolve()
+
+    def _resolve(self):
+        """Merge the parameters and attachments of the part with the resolved ones of its template"""
+        if self.VariantPart is not None:
+            self.ResolvedParameters = dict(self.VariantPart.ResolvedParameters)
+            self.ResolvedAttachments = dict(self.VariantPart.ResolvedAttachments)
+        else:
+            self.ResolvedParameters = {}
+            self.ResolvedAttachments = {}
+
+        ownParameters: Dict[str, str] = {}
+        for parameter in self.Parameters or []:
+            ownParameters.setdefault(parameter.TemplateDetail.Name, parameter.Data)
+        self.ResolvedParameters.update(ownParameters)
+
+        ownAttachments: Dict[str, PartAttachment] = {}
+        for attachment in self.Attachments or []:
+            ownAttachments.setdefault(attachment.Comment, attachment)
+        self.ResolvedAttachments.update(ownAttachments)
+
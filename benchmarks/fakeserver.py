@@ -0,0 +1,577 @@
+"""Fake InvenTree server for benchmarks
+
+Serves a synthetic catalog through the endpoints KiTree uses: parts with their templates
+(variants), parameters and attachments, companies, manufacturer and supplier parts and the BOM
+of an assembly. The attachments of the templates are real KiCad symbol and footprint files and a
+3D model of configurable size, so `build libs` runs against it like against a production server.
+
+Latency, bandwidth and failing requests can be injected to measure how KiTree behaves on slow or
+unreliable servers. All requests are counted by endpoint together with the bytes sent.
+
+Usage:
+    python benchmarks/fakeserver.py [ --parts N ] [ --port PORT ] [ --latency S ] [ --bandwidth B ]
+                                    [ --error-rate R ] [ --model-size BYTES ]
+
+The server is also used as a library by the other benchmarks, see `FakeInvenTree`.
+
+Author:
+    (C) Marvin Mager - @mvnmgrx - 2022
+
+License identifier:
+    GPL-3.0
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from base64 import b64decode
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+USERNAME = 'kitree'
+PASSWORD = 'kitree'
+"""Credentials accepted by the fake server"""
+
+MASTER_PART_IPN = 'PCB-00001'
+"""IPN of the assembly whose BOM is built"""
+
+PACKAGES = ['R_0402', 'R_0603', 'R_0805', 'C_0402', 'C_0603', 'C_0805', 'SOT-23', 'SOIC-8']
+"""Packages of the parts, one template per package"""
+
+MANUFACTURERS = ['Yageo', 'Samsung', 'Murata', 'Vishay', 'Texas Instruments', 'Nexperia']
+SUPPLIERS = ['LCSC', 'Mouser', 'Digikey']
+
+PAGE_CHUNK = 16384
+"""Bytes written at once when the bandwidth is limited"""
+
+SYMBOL_TEMPLATE = '''(kicad_symbol_lib (version 20211014) (generator kitree_fakeserver)
+  (symbol "{name}" (pin_names (offset 0.254)) (in_bom yes) (on_board yes)
+    (property "Reference" "{reference}" (id 0) (at 2.032 0 90)
+      (effects (font (size 1.27 1.27)))
+    )
+    (property "Value" "{name}" (id 1) (at 0 0 90)
+      (effects (font (size 1.27 1.27)))
+    )
+    (property "Footprint" "" (id 2) (at -1.778 0 90)
+      (effects (font (size 1.27 1.27)) hide)
+    )
+    (property "Datasheet" "~" (id 3) (at 0 0 0)
+      (effects (font (size 1.27 1.27)) hide)
+    )
+    (property "Package" "{package}" (id 4) (at 0 0 0)
+      (effects (font (size 1.27 1.27)) hide)
+    )
+    (symbol "{name}_0_1"
+      (rectangle (start -1.016 -2.54) (end 1.016 2.54)
+        (stroke (width 0.254) (type default) (color 0 0 0 0))
+        (fill (type none))
+      )
+    )
+    (symbol "{name}_1_1"
+      (pin passive line (at 0 3.81 270) (length 1.27)
+        (name "~" (effects (font (size 1.27 1.27))))
+        (number "1" (effects (font (size 1.27 1.27))))
+      )
+      (pin passive line (at 0 -3.81 90) (length 1.27)
+        (name "~" (effects (font (size 1.27 1.27))))
+        (number "2" (effects (font (size 1.27 1.27))))
+      )
+    )
+  )
+)
+'''
+
+FOOTPRINT_TEMPLATE = '''(footprint "{name}" (version 20211014) (generator pcbnew)
+  (layer "F.Cu")
+  (descr "{package} SMD package")
+  (tags "{package}")
+  (attr smd)
+  (fp_text reference "REF**" (at 0 -1.43) (layer "F.SilkS")
+    (effects (font (size 1 1) (thickness 0.15)))
+  )
+  (fp_text value "{name}" (at 0 1.43) (layer "F.Fab")
+    (effects (font (size 1 1) (thickness 0.15)))
+  )
+  (fp_line (start -1.48 0.73) (end -1.48 -0.73) (layer "F.CrtYd") (width 0.05))
+  (fp_line (start 1.48 -0.73) (end 1.48 0.73) (layer "F.CrtYd") (width 0.05))
+  (pad "1" smd roundrect (at -0.825 0) (size 0.8 0.95) (layers "F.Cu" "F.Paste" "F.Mask") (roundrect_rratio 0.25))
+  (pad "2" smd roundrect (at 0.825 0) (size 0.8 0.95) (layers "F.Cu" "F.Paste" "F.Mask") (roundrect_rratio 0.25))
+)
+'''
+
+def create_model(size: int) -> bytes:
+    """Create the content of a STEP file of about the given size"""
+    header = b"ISO-10303-21;\nHEADER;\nFILE_DESCRIPTION(('kitree fakeserver'),'2;1');\nENDSEC;\nDATA;\n"
+    footer = b'ENDSEC;\nEND-ISO-10303-21;\n'
+    line = b"#1=CARTESIAN_POINT('',(0.000000,0.000000,0.000000));\n"
+    count = max(size - len(header) - len(footer), 0) // len(line)
+    return header + line * count + footer
+
+class Table():
+    """Records of one endpoint with indexes of their fields, built on first use"""
+
+    def __init__(self, records: List[dict]):
+        self.records = records
+        self.byId = {record['pk']: record for record in records}
+        self.indexes: Dict[str, Dict[str, List[dict]]] = {}
+        self.nextId = max(self.byId, default=0) + 1
+
+    def filter(self, key: str, value: str) -> Optional[List[dict]]:
+        """Get the records whose field equals the value, None if the records have no such field"""
+        index = self.indexes.get(key)
+        if index is None:
+            if len(self.records) > 0 and key not in self.records[0]:
+                return None
+            index = {}
+            for record in self.records:
+                index.setdefault(str(record.get(key)).lower(), []).append(record)
+            self.indexes[key] = index
+        return index.get(value.lower(), [])
+
+    def insert(self, record: dict) -> dict:
+        record['pk'] = self.nextId
+        self.nextId += 1
+        self.records.append(record)
+        self.byId[record['pk']] = record
+        self.indexes.clear()
+        return record
+
+    def delete(self, recordId: int) -> bool:
+        record = self.byId.pop(recordId, None)
+        if record is None:
+            return False
+        self.records.remove(record)
+        self.indexes.clear()
+        return True
+
+class Catalog():
+    """Synthetic InvenTree catalog. Every part is a variant of the template of its package and
+    inherits the template's symbol, footprint and 3D model. The master part has all parts on its
+    BOM."""
+
+    def __init__(self, parts: int = 100, parameters: int = 5, modelSize: int = 1 << 20, bom: bool = True):
+        """Create a catalog
+
+        Args:
+            - parts (int): Number of parts, not counting the templates and the master part
+            - parameters (int): Number of parameters per part, at least 2
+            - modelSize (int): Size of the 3D model of each template in bytes, 0 for no models
+            - bom (bool): Put all parts on the BOM of the master part
+        """
+        self.tables: Dict[str, Table] = {}
+        self.parameterTemplates: Dict[str, int] = {}
+        self.files: Dict[str, bytes] = {}
+        self.ipns: List[str] = []
+        """IPNs of the parts, without templates and master part"""
+
+        companies = [self._company(index + 1, name, False) for index, name in enumerate(MANUFACTURERS)]
+        companies += [self._company(len(MANUFACTURERS) + index + 1, name, True) for index, name in enumerate(SUPPLIERS)]
+        suppliers = {company['name']: company['pk'] for company in companies if company['is_supplier']}
+
+        records, parameterRecords, attachments = [], [], []
+        manufacturerParts, supplierParts, bomItems = [], [], []
+        model = create_model(modelSize) if modelSize > 0 else None
+
+        for index, package in enumerate(PACKAGES):
+            templateId = index + 1
+            records.append(self._part(templateId, f'TPL-{package}', package, None, isTemplate=True))
+            parameterRecords.append(self._parameter(len(parameterRecords) + 1, templateId, 'Package', package))
+            parameterRecords.append(self._parameter(len(parameterRecords) + 1, templateId, '3DModel Rotation', '0, 0, 0'))
+            media = f'/media/attachments/part/{templateId}'
+            self.files[f'{media}/{package}.kicad_sym'] = SYMBOL_TEMPLATE.format(
+                name=package, reference=package[0], package=package).encode()
+            self.files[f'{media}/{package}.kicad_mod'] = FOOTPRINT_TEMPLATE.format(name=package, package=package).encode()
+            files = [('Symbol', f'{package}.kicad_sym'), ('Footprint', f'{package}.kicad_mod')]
+            if model is not None:
+                self.files[f'{media}/{package}.step'] = model
+                files.append(('3D-Model', f'{package}.step'))
+            for comment, fileName in files:
+                attachments.append(self._attachment(len(attachments) + 1, templateId, f'{media}/{fileName}', comment))
+
+        masterId = len(PACKAGES) + 1
+        records.append(self._part(masterId, MASTER_PART_IPN, 'PCB', None, assembly=True))
+
+        for index in range(parts):
+            partId = masterId + index + 1
+            package = PACKAGES[index % len(PACKAGES)]
+            ipn = f'{package[0]}-{index + 1:05d}'
+            self.ipns.append(ipn)
+            records.append(self._part(partId, ipn, package, index % len(PACKAGES) + 1))
+
+            values = {'Schematic Identifier': f'{package}_{index + 1}', 'Value': f'{index % 1000 + 1}{package[0]}'}
+            values.update({f'Parameter {number}': str(number * index) for number in range(max(parameters - 2, 0))})
+            for name, value in values.items():
+                parameterRecords.append(self._parameter(len(parameterRecords) + 1, partId, name, value))
+
+            attachmentUrl = f'/media/attachments/part/{partId}/datasheet.pdf'
+            self.files[attachmentUrl] = b'%PDF-1.4\n%%EOF\n'
+            attachments.append(self._attachment(len(attachments) + 1, partId, attachmentUrl, 'Datasheet'))
+
+            mpn = f'MPN-{index + 1:05d}'
+            manufacturerParts.append({'pk': index + 1, 'part': partId, 'manufacturer': index % len(MANUFACTURERS) + 1,
+                                      'description': '', 'MPN': mpn, 'link': ''})
+            offers = [('LCSC', f'C{100000 + index}')] + ([('Mouser', f'M-{mpn}')] if index % 2 == 0 else [])
+            for supplier, sku in offers:
+                supplierParts.append({'pk': len(supplierParts) + 1, 'part': partId, 'supplier': suppliers[supplier],
+                                      'manufacturer_part': index + 1, 'MPN': mpn, 'SKU': sku, 'description': '',
+                                      'link': f'https://{supplier.lower()}.example/{sku}', 'note': '',
+                                      'packaging': 'Cut Tape'})
+            if bom:
+                bomItems.append(self._bom_item(index + 1, masterId, partId, f'{package[0]}{index + 1}'))
+
+        for endpoint, endpointRecords in [('part', records), ('part/parameter', parameterRecords),
+                                          ('part/attachment', attachments), ('part/category', [{'pk': 1, 'name': 'Passives'}]),
+                                          ('bom', bomItems), ('company', companies),
+                                          ('company/part/manufacturer', manufacturerParts), ('company/part', supplierParts)]:
+            self.tables[endpoint] = Table(endpointRecords)
+
+    @staticmethod
+    def _part(partId: int, ipn: str, package: str, template: Optional[int], isTemplate: bool = False,
+              assembly: bool = False) -> dict:
+        return {
+            'pk': partId, 'IPN': ipn, 'name': ipn, 'full_name': ipn, 'description': f'{package} part {ipn}',
+            'active': True, 'assembly': assembly, 'category': 1, 'component': not assembly, 'default_expiry': 0,
+            'default_supplier': None, 'image': '', 'thumbnail': '', 'in_stock': 100.0, 'ordering': 0.0,
+            'building': 0.0, 'is_template': isTemplate, 'keywords': package, 'link': '', 'minimum_stock': 0,
+            'notes': None, 'purchaseable': True, 'revision': '', 'salable': assembly, 'starred': False,
+            'stock_item_count': 1, 'suppliers': 1, 'trackable': False, 'units': '', 'variant_of': template,
+            'virtual': False, 'updated': '2022-01-01T00:00:00'
+        }
+
+    def _parameter(self, parameterId: int, partId: int, name: str, value: str) -> dict:
+        templateId = self.parameterTemplates.setdefault(name, len(self.parameterTemplates) + 1)
+        return {'pk': parameterId, 'part': partId, 'template': templateId, 'data': value,
+                'template_detail': {'pk': templateId, 'name': name, 'units': ''}}
+
+    @staticmethod
+    def _attachment(attachmentId: int, partId: int, url: str, comment: str) -> dict:
+        return {'pk': attachmentId, 'part': partId, 'attachment': url, 'filename': url.rsplit('/', 1)[-1],
+                'comment': comment, 'upload_date': '2022-01-01'}
+
+    @staticmethod
+    def _company(companyId: int, name: str, isSupplier: bool) -> dict:
+        return {'pk': companyId, 'url': '', 'name': name, 'description': '', 'website': '', 'phone': '',
+                'address': '', 'email': None, 'currency': 'EUR', 'contact': '', 'link': '', 'image': '',
+                'is_customer': False, 'is_manufacturer': not isSupplier, 'is_supplier': isSupplier, 'notes': '',
+                'parts_supplied': 0, 'parts_manufactured': 0}
+
+    @staticmethod
+    def _bom_item(itemId: int, partId: int, subPartId: int, reference: str, quantity: float = 1.0) -> dict:
+        return {'pk': itemId, 'part': partId, 'sub_part': subPartId, 'quantity': quantity, 'reference': reference,
+                'allow_variants': False, 'inherited': False, 'note': '', 'optional': False, 'overage': '',
+                'validated': False}
+
+    def select(self, endpoint: str, query: Dict[str, str]) -> Optional[List[dict]]:
+        """Get the records of a list endpoint matching the filters of the query, None if the
+        endpoint does not exist. Filters on fields the records do not have are ignored."""
+        table = self.tables.get(endpoint)
+        if table is None:
+            return None
+        records = None
+        for key, value in query.items():
+            if key in ('limit', 'offset', 'ordering', 'search', 'format'):
+                continue
+            if key.endswith('_regex'):
+                # Case insensitive like the `iregex` lookup of the server
+                expression = re.compile(value, re.IGNORECASE)
+                field = key.removesuffix('_regex')
+                matches = [record for record in table.records if expression.search(str(record.get(field)))]
+            else:
+                matches = table.filter(key, value)
+            if matches is not None:
+                matchIds = {id(record) for record in matches}
+                records = matches if records is None else [record for record in records if id(record) in matchIds]
+        records = list(table.records if records is None else records)
+        if 'search' in query:
+            # Only whole part numbers are searched, unlike the text search of a real server
+            term = query['search'].lower()
+            records = [record for record in records if term in (str(record.get('MPN', '')).lower(), str(record.get('SKU', '')).lower())]
+        ordering = query.get('ordering', '')
+        if ordering:
+            records.sort(key=lambda record: str(record.get(ordering.lstrip('-'), '')), reverse=ordering.startswith('-'))
+        return records
+
+    def add_details(self, endpoint: str, records: List[dict], query: Dict[str, str]) -> List[dict]:
+        """Add the nested details a real server adds to supplier parts"""
+        if endpoint != 'company/part':
+            return records
+        parts = self.tables['part'].byId
+        manufacturerParts = self.tables['company/part/manufacturer'].byId
+        detailed = []
+        for record in records:
+            record = dict(record, manufacturer_part_detail=manufacturerParts.get(record['manufacturer_part']))
+            if query.get('part_detail') == 'true':
+                record['part_detail'] = parts.get(record['part'])
+            detailed.append(record)
+        return detailed
+
+class FakeInvenTree():
+    """Threaded HTTP server answering requests from a `Catalog`
+
+    Example:
+        with FakeInvenTree(Catalog(parts=100), latency=0.02) as server:
+            print(server.url, server.requests.most_common(5))
+    """
+
+    def __init__(self, catalog: Catalog, port: int = 0, latency: float = 0.0, jitter: float = 0.0,
+                 bandwidth: Optional[float] = None, errorRate: float = 0.0, errorStatus: int = 503,
+                 retryAfter: Optional[float] = None, tokenLifetime: Optional[int] = None, seed: int = 0):
+        """Create the server, it is started with `start()` or by entering it as context manager
+
+        Args:
+            - catalog (Catalog): Records served
+            - port (int): Port to listen on, 0 for any free port
+            - latency (float): Delay in seconds before each response
+            - jitter (float): Random delay in seconds added to the latency, up to this value
+            - bandwidth (float): Bytes per second each response is sent with, None for no limit
+            - errorRate (float): Share of requests answered with `errorStatus`, from 0 to 1
+            - errorStatus (int): Status code of the injected errors, e.g. 503, 500 or 429
+            - retryAfter (float): Value of the `Retry-After` header of injected errors or None
+            - tokenLifetime (int): Number of requests after which the API token is rejected and
+              a new one has to be requested, None for tokens that never expire
+            - seed (int): Seed of the random generator used for the jitter and the errors
+        """
+        self.catalog = catalog
+        self.latency = latency
+        self.jitter = jitter
+        self.bandwidth = bandwidth
+        self.errorRate = errorRate
+        self.errorStatus = errorStatus
+        self.retryAfter = retryAfter
+        self.tokenLifetime = tokenLifetime
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+        self.token: Optional[str] = None
+        self.tokenUses = 0
+        self.reset_stats()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body are written separately, Nagle's algorithm would delay the body
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _handle(self, method: str):
+                length = int(self.headers.get('Content-Length', 0) or 0)
+                body = self.rfile.read(length) if length > 0 else b''
+                status, headers, content = server.handle(method, self.path, self.headers.get('Authorization', ''), body)
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                server.send(self.wfile, content)
+
+            def do_GET(self):
+                self._handle('GET')
+
+            def do_POST(self):
+                self._handle('POST')
+
+            def do_DELETE(self):
+                self._handle('DELETE')
+
+        self.httpServer = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self.httpServer.daemon_threads = True
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.httpServer.server_address[1]}'
+
+    def start(self) -> 'FakeInvenTree':
+        self.thread = threading.Thread(target=self.httpServer.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpServer.shutdown()
+        self.httpServer.server_close()
+
+    def __enter__(self) -> 'FakeInvenTree':
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def reset_stats(self):
+        """Reset the request counters, e.g. before each measured command"""
+        with self.lock:
+            self.requests: Counter = Counter()
+            """Number of requests by endpoint, e.g. `GET part/<id>/`"""
+            self.bytesSent: Counter = Counter()
+            """Bytes of the response bodies by endpoint"""
+            self.errorsInjected = 0
+            self.rejected = 0
+            """Requests rejected because of an expired or invalid token"""
+            self.tokenRequests = 0
+            self.rotations = 0
+
+    @staticmethod
+    def get_endpoint_name(method: str, path: str) -> str:
+        """Name requests to the same endpoint alike: IDs are replaced and files are grouped by type"""
+        if not path.startswith('/api/'):
+            return f'{method} media/*{path[path.rfind("."):] if "." in path else ""}'
+        return f'{method} {re.sub(r"/[0-9]+/", "/<id>/", path.removeprefix("/api/")) or "/"}'
+
+    def send(self, stream, content: bytes):
+        """Write a response body, limited to the configured bandwidth"""
+        if not self.bandwidth:
+            stream.write(content)
+            return
+        for offset in range(0, len(content), PAGE_CHUNK):
+            chunk = content[offset:offset + PAGE_CHUNK]
+            stream.write(chunk)
+            time.sleep(len(chunk) / self.bandwidth)
+
+    def _authenticate(self, authorization: str) -> bool:
+        with self.lock:
+            if authorization.startswith('Basic '):
+                return b64decode(authorization[6:]).decode(errors='replace') == f'{USERNAME}:{PASSWORD}'
+            if self.token is None or authorization != f'Token {self.token}':
+                self.rejected += 1
+                return False
+            self.tokenUses += 1
+            if self.tokenLifetime is not None and self.tokenUses >= self.tokenLifetime:
+                # Requests still in flight with the expired token are rejected
+                self.token = None
+                self.tokenUses = 0
+                self.rotations += 1
+            return True
+
+    def handle(self, method: str, url: str, authorization: str, body: bytes) -> Tuple[int, dict, bytes]:
+        """Answer a request
+
+        Returns:
+            - tuple: Status code, headers and body of the response
+        """
+        parts = urlsplit(url)
+        endpoint = parts.path.removeprefix('/api/').strip('/')
+        query = dict(parse_qsl(parts.query))
+        name = self.get_endpoint_name(method, parts.path)
+
+        delay = self.latency
+        with self.lock:
+            self.requests[name] += 1
+            if self.jitter > 0:
+                delay += self.random.uniform(0, self.jitter)
+            injectError = self.errorRate > 0 and parts.path not in ('/api/', '/api/user/me/', '/api/user/token/') \
+                and self.random.random() < self.errorRate
+        if delay > 0:
+            time.sleep(delay)
+
+        status, headers, content = self._respond(method, parts.path, endpoint, query, authorization, body, injectError)
+        with self.lock:
+            self.bytesSent[name] += len(content)
+        return status, headers, content
+
+    def _respond(self, method: str, path: str, endpoint: str, query: Dict[str, str], authorization: str,
+                 body: bytes, injectError: bool) -> Tuple[int, dict, bytes]:
+        def reply(status: int, data=None) -> Tuple[int, dict, bytes]:
+            return status, {'Content-Type': 'application/json'}, json.dumps(data).encode() if data is not None else b''
+
+        if path == '/api/':
+            return reply(200, {'server': 'InvenTree', 'version': '0.9.0', 'apiVersion': 300})
+        if injectError:
+            with self.lock:
+                self.errorsInjected += 1
+            status, headers, content = reply(self.errorStatus, {'detail': 'Injected error'})
+            if self.retryAfter is not None:
+                headers['Retry-After'] = str(self.retryAfter)
+            return status, headers, content
+        if not self._authenticate(authorization):
+            return reply(401, {'detail': 'Invalid token.'})
+
+        if not path.startswith('/api/'):
+            content = self.catalog.files.get(path)
+            if content is None:
+                return reply(404, {'detail': 'Not found.'})
+            return 200, {'Content-Type': 'application/octet-stream'}, content
+
+        if endpoint == 'user/me':
+            return reply(200, {'pk': 1, 'username': USERNAME})
+        if endpoint == 'user/token':
+            with self.lock:
+                self.tokenRequests += 1
+                if self.token is None:
+                    self.token = f'token-{self.tokenRequests}'
+                    self.tokenUses = 0
+                return reply(200, {'token': self.token})
+
+        with self.lock:
+            status, data = self._query(method, endpoint, query, body)
+        # Encoded without holding the lock, large pages take a while
+        return reply(status, data)
+
+    def _query(self, method: str, endpoint: str, query: Dict[str, str], body: bytes) -> Tuple[int, object]:
+        """Read or change the catalog, returns the status code and the data of the response.
+        Call with the lock held."""
+        table, _, recordId = endpoint.rpartition('/')
+        if recordId.isdigit():
+            records = self.catalog.tables.get(table)
+            if records is None or int(recordId) not in records.byId:
+                return 404, {'detail': 'Not found.'}
+            if method == 'DELETE':
+                records.delete(int(recordId))
+                return 204, None
+            return 200, self.catalog.add_details(table, [records.byId[int(recordId)]], query)[0]
+
+        if method == 'POST':
+            records = self.catalog.tables.get(endpoint)
+            if endpoint != 'bom' or records is None:
+                return 405, {'detail': f'Method "{method}" not allowed.'}
+            data = json.loads(body or b'{}')
+            item = Catalog._bom_item(0, data['part'], data['sub_part'], data.get('reference', ''), data.get('quantity', 1))
+            return 201, dict(records.insert(item))
+
+        records = self.catalog.select(endpoint, query)
+        if records is None:
+            return 404, {'detail': 'Not found.'}
+        if 'limit' not in query:
+            return 200, self.catalog.add_details(endpoint, records, query)
+        limit, offset = int(query['limit']), int(query.get('offset', 0))
+        page = self.catalog.add_details(endpoint, records[offset:offset + limit], query)
+        return 200, {'count': len(records), 'next': 'next' if offset + limit < len(records) else None,
+                     'previous': None, 'results': page}
+
+def main():
+    parser = argparse.ArgumentParser(description='Fake InvenTree server serving a synthetic catalog')
+    parser.add_argument('--parts', type=int, default=100, help='Number of parts in the catalog')
+    parser.add_argument('--parameters', type=int, default=5, help='Number of parameters per part')
+    parser.add_argument('--model-size', type=int, default=1 << 20, help='Size of each 3D model in bytes')
+    parser.add_argument('--port', type=int, default=8000, help='Port to listen on')
+    parser.add_argument('--latency', type=float, default=0.0, help='Delay of each response in seconds')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Random delay added to the latency in seconds')
+    parser.add_argument('--bandwidth', type=float, default=None, help='Bytes per second of each response')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests failing with --error-status')
+    parser.add_argument('--error-status', type=int, default=503, help='Status code of the injected errors')
+    parser.add_argument('--retry-after', type=float, default=None, help='Retry-After header of the injected errors')
+    args = parser.parse_args()
+
+    catalog = Catalog(args.parts, args.parameters, args.model_size)
+    server = FakeInvenTree(catalog, port=args.port, latency=args.latency, jitter=args.jitter,
+                           bandwidth=args.bandwidth, errorRate=args.error_rate, errorStatus=args.error_status,
+                           retryAfter=args.retry_after)
+    print(f'Fake InvenTree server with {args.parts} parts at {server.url} (user "{USERNAME}", password "{PASSWORD}")')
+    print(f'Master part: {MASTER_PART_IPN}, parts: {", ".join(catalog.ipns[:3])}{" .." if args.parts > 3 else ""}')
+    try:
+        server.httpServer.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print()
+        for name, count in server.requests.most_common():
+            print(f'  {count:8d}  {server.bytesSent[name]:12d} B  {name}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,369 @@
+"""Benchmark of the commands working on local KiCad files
+
+Generates a synthetic KiCad project (see `kicadgen.py`) and times the code paths that read and
+write KiCad files without talking to the InvenTree server: parsing the schematic and the board,
+`enumerate_schematic()`, `enumerate_board()`, both JLC exporters and the symbol and footprint
+transforms of `build libs`. The JLC BOM exporter gets its supplier parts from a stand-in of the
+API, `build libs` gets stand-ins of the downloaded parts.
+
+Each benchmark runs `--repeat` times, the median and the best time are reported. One more run is
+traced with ``tracemalloc`` to record the peak memory, it is not part of the timing.
+
+The report can be written as JSON and compared against a baseline recorded with the same project
+settings. Absolute timings depend on the machine, so the best time of each benchmark is compared
+relative to a fixed calibration workload timed in the same run. This evens out faster or slower
+machines, but not all of their differences: the committed baseline was recorded on one machine and
+is only a rough reference elsewhere. Record a baseline on the machine that runs the comparison,
+e.g. with ``--save-baseline`` before starting an optimisation.
+
+Usage:
+    python benchmarks/kicad_files.py [ --components N ] [ --depth N ] [ --sheets N ] [ --reuse N ]
+                                     [ --pads N ] [ --ipn-ratio R ] [ --parts N ] [ --repeat N ]
+                                     [ --only NAME,... ] [ --json FILE ] [ --baseline FILE ]
+                                     [ --save-baseline ] [ --tolerance R ]
+
+Exits with status 1 if a benchmark is slower, needs more memory or finds a different number of
+items than the baseline, so it can be used as a regression check in CI.
+
+Author:
+    (C) Marvin Mager - @mvnmgrx - 2022
+
+License identifier:
+    GPL-3.0
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import re
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict
+from importlib.metadata import version
+from os import makedirs, path
+from typing import Callable, Dict, List, Optional
+
+BENCHMARK_DIR = path.dirname(path.abspath(__file__))
+sys.path.insert(0, path.join(path.dirname(BENCHMARK_DIR), 'src'))
+
+import kicadgen
+from kicadgen import GeneratedProject
+
+from kiutils.board import Board
+from kiutils.footprint import Footprint
+from kiutils.schematic import Schematic
+from kiutils.symbol import SymbolLib
+
+from app import App
+from commands.build import build_footprint, build_symbol
+from export.exporter import get_exporters
+from misc.logger import Logger
+from misc.tools import enumerate_board, enumerate_schematic
+
+DEFAULT_BASELINE = path.join(BENCHMARK_DIR, 'baselines', 'kicad_files.json')
+
+class LibraryPart():
+    """Stands in for a `Part` whose CAD files were downloaded, with all fields of a sourced part"""
+
+    def __init__(self, project: GeneratedProject, index: int, ipn: str):
+        self.IPN = ipn
+        self.SymbolPath = project.symbolPaths[ipn]
+        self.FootprintPath = project.footprintPaths[ipn]
+        self.ModelPath = path.join(project.path, 'downloads', f'{ipn}.step')
+        self.index = index
+
+    def GetSchematicId(self) -> str:
+        return f'{self.IPN}_SCH'
+
+    def GetFootprintName(self) -> str:
+        return self.IPN
+
+    def GetDatasheetUrl(self) -> str:
+        return f'https://datasheets.example.com/{self.IPN}.pdf'
+
+    def GetManufacturerName(self) -> str:
+        return 'Yageo'
+
+    def GetMPN(self) -> str:
+        return f'MPN-{self.IPN}'
+
+    def GetSupplierName(self) -> str:
+        return 'LCSC'
+
+    def GetSKU(self) -> str:
+        return f'C{self.index + 100000}'
+
+    def GetSupplierLink(self) -> str:
+        return f'https://lcsc.example.com/product/C{self.index + 100000}'
+
+    def get_resolved_parameter(self, name: str) -> Optional[str]:
+        # Like a template setting the rotation of the 3D model for all of its variants
+        return '0, 0, 90' if name == '3DModel Rotation' else None
+
+class CatalogApi():
+    """Stands in for `InvenTreeApi` in the JLC BOM exporter, every part has an LCSC supplier part"""
+
+    pageSize = 250
+
+    def __init__(self, ipns: List[str]):
+        self.ipns = ipns
+
+    def is_offline(self) -> bool:
+        return False
+
+    def get_part_ids(self, partIpns) -> Dict[str, List[int]]:
+        partIds = {ipn: index + 1 for index, ipn in enumerate(self.ipns)}
+        return {ipn: [partIds[ipn]] if ipn in partIds else [] for ipn in partIpns}
+
+    def get_company_ids(self, name: str) -> List[int]:
+        return [1] if name == 'LCSC' else []
+
+    def count_supplier_parts(self, supplierId: int) -> int:
+        return len(self.ipns)
+
+    def get_supplier_parts_of_supplier(self, supplierId: int):
+        for index, ipn in enumerate(self.ipns):
+            yield {
+                'pk': index + 1, 'part': index + 1, 'supplier': supplierId, 'SKU': f'C{index + 100000}',
+                'part_detail': {'pk': index + 1, 'IPN': ipn, 'name': f'Part {ipn}', 'active': True},
+                'manufacturer_part_detail': {'pk': index + 1, 'MPN': f'MPN-{ipn}'},
+            }
+
+class Context():
+    """The generated project together with an app that has it loaded"""
+
+    def __init__(self, project: GeneratedProject):
+        self.project = project
+        self.output = path.join(project.path, 'output')
+        makedirs(self.output, exist_ok=True)
+        self.libpath = path.join(project.path, f'{project.name}-librarys')
+        makedirs(path.join(self.libpath, f'{project.name}-footprints.pretty'), exist_ok=True)
+
+        self.app = App()
+        self.app.console.output = open(os.devnull, 'w')
+        self.app.console.interactive = False
+        self.app.project.name = project.name
+        self.app.project.path = project.path
+        self.app.project.isLoaded = True
+        self.app.project.config.data.parts = list(project.ipns)
+        self.app.project.api = CatalogApi(project.ipns)
+
+        self.parts = [LibraryPart(project, index, ipn) for index, ipn in enumerate(project.ipns)]
+        self.schematic = Schematic.from_file(path.join(project.path, f'{project.name}.kicad_sch'))
+        self.board = Board.from_file(path.join(project.path, f'{project.name}.kicad_pcb'))
+
+    def count_rows(self, fileName: str) -> int:
+        """Count the data rows of an exported CSV file, without the comments and the header"""
+        with open(path.join(self.output, fileName)) as infile:
+            return sum(1 for _ in infile) - 4
+
+def run_parse_schematic(context: Context) -> int:
+    return len(Schematic.from_file(context.schematic.filePath).symbolInstances)
+
+def run_enumerate_schematic(context: Context) -> int:
+    return sum(len(references) for references in enumerate_schematic(context.app, context.schematic).values())
+
+def run_parse_board(context: Context) -> int:
+    return len(Board.from_file(context.board.filePath).footprints)
+
+def run_enumerate_board(context: Context) -> int:
+    return sum(len(references) for references in enumerate_board(context.app, context.board).values())
+
+def run_export_jlc_assembly_bom(context: Context) -> int:
+    if not get_exporters()['jlc_assembly_bom'].export(context.app, [context.output]):
+        raise RuntimeError('Exporting the JLC BOM failed, see the log')
+    return context.count_rows(f'{context.project.name}_jlc_bom.csv')
+
+def run_export_jlc_assembly_xy(context: Context) -> int:
+    if not get_exporters()['jlc_assembly_xy'].export(context.app, [context.output]):
+        raise RuntimeError('Exporting the JLC XY data failed, see the log')
+    return context.count_rows(f'{context.project.name}_jlc_xy.csv')
+
+def run_build_libs_symbols(context: Context) -> int:
+    """The symbol part of `build libs`: read each part's symbol, transform it and write the library"""
+    name = context.project.name
+    library = SymbolLib(filePath=path.join(context.libpath, f'{name}-symbols.kicad_sym'),
+                        generator='kitree_build_libs', version='20211014')
+    for part in context.parts:
+        symbol = SymbolLib().from_file(part.SymbolPath).symbols[0]
+        build_symbol(context.app, part, symbol)
+        library.symbols.append(symbol)
+    library.to_file()
+    return len(library.symbols)
+
+def run_build_libs_footprints(context: Context) -> int:
+    """The footprint part of `build libs`: read, transform and write each part's footprint"""
+    name = context.project.name
+    for part in context.parts:
+        footprint = Footprint().from_file(part.FootprintPath)
+        build_footprint(context.app, part, footprint, f'{name}-librarys')
+        footprint.to_file(path.join(context.libpath, f'{name}-footprints.pretty', f'{part.GetFootprintName()}.kicad_mod'))
+    return len(context.parts)
+
+BENCHMARKS: Dict[str, Callable[[Context], int]] = {
+    'parse_schematic': run_parse_schematic,
+    'enumerate_schematic': run_enumerate_schematic,
+    'parse_board': run_parse_board,
+    'enumerate_board': run_enumerate_board,
+    'export_jlc_assembly_bom': run_export_jlc_assembly_bom,
+    'export_jlc_assembly_xy': run_export_jlc_assembly_xy,
+    'build_libs_symbols': run_build_libs_symbols,
+    'build_libs_footprints': run_build_libs_footprints,
+}
+"""Benchmarks by name, each returns the number of items it found or wrote"""
+
+def calibrate(repeat: int) -> float:
+    """Get the best time of a fixed workload, the unit of the relative times. It tokenizes and
+    nests an S-expression in pure Python like the parser of kiutils, so it depends on the speed of
+    the machine and the interpreter like the benchmarks do."""
+    text = '(kicad_sch ' + ' '.join(f'(symbol (lib_id "Device:R") (at {index} {index * 2} 0) '
+                                    f'(property "Reference" "R{index}" (id 0)))' for index in range(4000)) + ')'
+    times = []
+    for _ in range(max(repeat, 5)):
+        start = time.perf_counter()
+        stack: List[list] = [[]]
+        for token in re.findall(r'\(|\)|"[^"]*"|[^\s()]+', text):
+            if token == '(':
+                stack.append([])
+            elif token == ')':
+                item = stack.pop()
+                stack[-1].append(item)
+            else:
+                stack[-1].append(token)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def measure(benchmark: Callable[[Context], int], context: Context, repeat: int) -> dict:
+    """Time a benchmark, then run it once more to trace its peak memory"""
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        items = benchmark(context)
+        times.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    benchmark(context)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'seconds': statistics.median(times), 'best': min(times), 'peakKb': peak / 1024, 'items': items}
+
+def compare(report: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Get the regressions of a report against a baseline
+
+    Args:
+        - report (dict): The report of this run
+        - baseline (dict): A report recorded with the same settings
+        - tolerance (float): Share by which the relative time and the memory may exceed the baseline
+
+    Returns:
+        - List[str]: Description of each regression, empty if there is none
+    """
+    regressions = []
+    for name, result in report['results'].items():
+        reference = baseline['results'].get(name)
+        if reference is None:
+            continue
+        if result['relative'] > reference['relative'] * (1 + tolerance):
+            regressions.append(f'{name} took {result["relative"]:.2f} instead of {reference["relative"]:.2f} '
+                               f'times the calibration ({result["best"]:.3f} s, baseline {reference["best"]:.3f} s)')
+        if result['peakKb'] > reference['peakKb'] * (1 + tolerance):
+            regressions.append(f'{name} needed {result["peakKb"]:.0f} kB instead of {reference["peakKb"]:.0f} kB')
+        if result['items'] != reference['items']:
+            regressions.append(f'{name} found {result["items"]} items instead of {reference["items"]}')
+    return regressions
+
+def format_change(result: dict, reference: Optional[dict]) -> str:
+    if reference is None or reference['relative'] == 0:
+        return ''
+    return f'{(result["relative"] / reference["relative"] - 1) * 100:+.0f} %'
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark of the commands working on local KiCad files')
+    kicadgen.add_arguments(parser)
+    parser.add_argument('--repeat', type=int, default=3, help='Number of timed runs of each benchmark')
+    parser.add_argument('--only', default=None, help='Comma separated names of the benchmarks to run')
+    parser.add_argument('--json', default=None, help='Write the report to this file')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Report to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='Write the report to the baseline instead of comparing')
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help='Share by which the relative time and the memory may exceed the baseline')
+    args = parser.parse_args()
+
+    names = list(BENCHMARKS) if args.only is None else args.only.split(',')
+    for name in names:
+        if name not in BENCHMARKS:
+            sys.exit(f'Unknown benchmark {name}, available are {", ".join(BENCHMARKS)}')
+
+    settings = kicadgen.get_settings(args)
+    with tempfile.TemporaryDirectory(prefix='kitree-bench-') as directory:
+        # Skipped components are logged, the log is not part of the report
+        Logger.Init(logPath=path.join(directory, 'kitree.log'))
+        project = kicadgen.generate_project(path.join(directory, 'synthetic'), settings)
+        context = Context(project)
+        print(f'{project.components} components ({project.withIpn} with IPN) of {len(project.ipns)} parts, '
+              f'{project.sheetFiles} schematic files, {project.sheetInstances} sheet instances, {settings.pads} pads per footprint')
+
+        # Calibrated before and after, the faster run is the better estimate of the machine's speed
+        calibration = calibrate(args.repeat)
+        results = {}
+        for name in names:
+            results[name] = measure(BENCHMARKS[name], context, args.repeat)
+        calibration = min(calibration, calibrate(args.repeat))
+        for result in results.values():
+            result['relative'] = result['best'] / calibration
+        Logger.Shutdown()
+
+    report = {
+        'settings': asdict(settings),
+        'components': project.components,
+        'python': platform.python_version(),
+        'kiutils': version('kiutils'),
+        'machine': f'{platform.machine()} {platform.system()}',
+        'calibration': calibration,
+        'results': results,
+    }
+
+    baseline = None
+    if not args.save_baseline and path.isfile(args.baseline):
+        with open(args.baseline) as infile:
+            baseline = json.load(infile)
+        if baseline['settings'] != report['settings']:
+            print(f'Not comparing against {args.baseline}, it was recorded with different settings')
+            baseline = None
+        elif 'calibration' not in baseline:
+            print(f'Not comparing against {args.baseline}, it was recorded without calibration')
+            baseline = None
+        elif baseline.get('machine') != report['machine'] or baseline['python'] != report['python']:
+            print(f'Baseline {args.baseline} was recorded with Python {baseline["python"]} on {baseline.get("machine")}, '
+                  f'relative times may differ')
+
+    print(f'  Calibration: {calibration * 1000:.1f} ms, relative times are the best times in units of it')
+
+    print(f'  {"Benchmark":<26} {"Median":>9} {"Best":>9} {"Relative":>9} {"Peak memory":>12} {"Items":>7} {"Baseline":>9}')
+    for name, result in results.items():
+        reference = baseline['results'].get(name) if baseline is not None else None
+        print(f'  {name:<26} {result["seconds"]:>7.3f} s {result["best"]:>7.3f} s {result["relative"]:>9.2f} '
+              f'{result["peakKb"] / 1024:>9.1f} MB {result["items"]:>7} {format_change(result, reference):>9}')
+
+    for fileName in [args.json, args.baseline if args.save_baseline else None]:
+        if fileName is not None:
+            makedirs(path.dirname(path.abspath(fileName)), exist_ok=True)
+            with open(fileName, 'w') as outfile:
+                json.dump(report, outfile, indent=4)
+
+    if baseline is not None:
+        regressions = compare(report, baseline, args.tolerance)
+        for regression in regressions:
+            print(f'  REGRESSION: {regression}')
+        if len(regressions) > 0:
+            sys.exit(f'{len(regressions)} regressions against {args.baseline}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,362 @@
+"""Generator of synthetic KiCad projects for benchmarks
+
+Writes a KiCad 6 project with a hierarchical schematic, a board with one footprint per component
+and the KiTree project file listing its parts. The number of components, the depth of the sheet
+hierarchy, how often each sheet is reused, the number of pads per footprint and the share of
+components carrying an IPN field are configurable, see `ProjectSettings`.
+
+Each sheet holds its own components and `sheets` sub-sheets, each of them placed `reuse` times,
+down to `depth` levels below the root sheet. The components are spread evenly over all sheet
+instances, so the actual number of components is rounded to a multiple of the instance count.
+
+The symbol and footprint files of the parts are written as well, like `build libs` finds them
+after downloading the parts from InvenTree.
+
+Usage:
+    python benchmarks/kicadgen.py DIRECTORY [ --components N ] [ --depth N ] [ --sheets N ]
+                                  [ --reuse N ] [ --pads N ] [ --ipn-ratio R ] [ --parts N ]
+
+The generator is also used as a library by the other benchmarks, see `generate_project()`.
+
+Author:
+    (C) Marvin Mager - @mvnmgrx - 2022
+
+License identifier:
+    GPL-3.0
+"""
+
+import argparse
+import json
+import math
+import random
+import uuid
+from dataclasses import asdict, dataclass, field
+from os import makedirs, path
+from typing import Dict, List, Optional
+
+from fakeserver import PACKAGES, SYMBOL_TEMPLATE
+
+IPN_FIELD = 'Internal Nr.'
+"""Name of the IPN field, KiTree's default"""
+
+@dataclass
+class ProjectSettings():
+    """Shape of a generated project"""
+
+    components: int = 1000
+    """Number of components, rounded to a multiple of the number of sheet instances"""
+
+    depth: int = 1
+    """Levels of sub-sheets below the root sheet, 0 for a flat schematic"""
+
+    sheets: int = 2
+    """Number of different sub-sheets of each sheet"""
+
+    reuse: int = 2
+    """Number of instances of each sub-sheet within its parent sheet"""
+
+    pads: int = 8
+    """Number of pads of each footprint, the silkscreen gets as many lines"""
+
+    ipnRatio: float = 1.0
+    """Share of the components with an IPN field"""
+
+    parts: int = 0
+    """Number of different parts (IPNs), 0 for a quarter of the components"""
+
+    seed: int = 1
+    """Seed of the random generator, the same settings always create the same project"""
+
+@dataclass
+class GeneratedProject():
+    """A project written by `generate_project()`"""
+
+    name: str
+    """Name of the KiCad project"""
+
+    path: str
+    """Folder of the KiCad project"""
+
+    ipns: List[str]
+    """IPNs of the parts, in the order of the KiTree parts list"""
+
+    components: int = 0
+    """Number of components (symbol instances and footprints)"""
+
+    withIpn: int = 0
+    """Number of components with an IPN field"""
+
+    sheetFiles: int = 1
+    """Number of schematic files, including the root schematic"""
+
+    sheetInstances: int = 1
+    """Number of sheet instances, including the root sheet"""
+
+    symbolPaths: Dict[str, str] = field(default_factory=dict)
+    """Path of the symbol file of each part by IPN"""
+
+    footprintPaths: Dict[str, str] = field(default_factory=dict)
+    """Path of the footprint file of each part by IPN"""
+
+def create_ipns(count: int) -> List[str]:
+    """Create IPNs like the fake server's, e.g. `R-00001`"""
+    return [f'{PACKAGES[index % len(PACKAGES)][0]}-{index + 1:05d}' for index in range(count)]
+
+def create_footprint(name: str, package: str, pads: int, throughHole: bool = False) -> str:
+    """Create the S-expression of a footprint with the given number of pads in two rows"""
+    rows = math.ceil(pads / 2)
+    height = rows * 1.27
+    lines = [
+        f'(footprint "{name}" (version 20211014) (generator pcbnew)',
+        '  (layer "F.Cu")',
+        f'  (descr "{package} package with {pads} pads")',
+        f'  (tags "{package}")',
+        f'  (attr {"through_hole" if throughHole else "smd"})',
+        f'  (fp_text reference "REF**" (at 0 {-height / 2 - 1:.2f}) (layer "F.SilkS")',
+        '    (effects (font (size 1 1) (thickness 0.15)))',
+        '  )',
+        f'  (fp_text value "{name}" (at 0 {height / 2 + 1:.2f}) (layer "F.Fab")',
+        '    (effects (font (size 1 1) (thickness 0.15)))',
+        '  )',
+    ]
+    for index in range(pads):
+        # Silkscreen outline as a polyline of one segment per pad
+        x1, x2 = -2.5 + 5.0 * index / pads, -2.5 + 5.0 * (index + 1) / pads
+        y = -height / 2 - 0.5 if index % 2 == 0 else height / 2 + 0.5
+        lines.append(f'  (fp_line (start {x1:.3f} {y:.3f}) (end {x2:.3f} {y:.3f}) (layer "F.SilkS") (width 0.12))')
+    for index in range(pads):
+        x = -1.5 if index < rows else 1.5
+        y = (index % rows - (rows - 1) / 2) * 1.27
+        if throughHole:
+            lines.append(f'  (pad "{index + 1}" thru_hole circle (at {x} {y:.3f}) (size 1.2 1.2) (drill 0.7) '
+                         '(layers *.Cu *.Mask))')
+        else:
+            lines.append(f'  (pad "{index + 1}" smd roundrect (at {x} {y:.3f}) (size 1.2 0.6) '
+                         '(layers "F.Cu" "F.Paste" "F.Mask") (roundrect_rratio 0.25))')
+    lines.append(')')
+    return '\n'.join(lines) + '\n'
+
+class Sheet():
+    """A generated schematic file, with the components and sub-sheets placed on it"""
+
+    def __init__(self, fileName: str, schematic, components: list, children: list):
+        self.fileName = fileName
+        self.schematic = schematic
+        self.components = components
+        """(symbol UUID, IPN or None, package) of each component"""
+        self.children = children
+        """(sheet UUID, Sheet) of each sheet instance on this sheet"""
+
+    def write(self, written: set):
+        if self.fileName in written:
+            return
+        written.add(self.fileName)
+        self.schematic.to_file()
+        for _, child in self.children:
+            child.write(written)
+
+class _Generator():
+    """State of a single `generate_project()` call"""
+
+    def __init__(self, settings: ProjectSettings, name: str, directory: str, ipns: List[str]):
+        self.settings = settings
+        self.name = name
+        self.directory = directory
+        self.ipns = ipns
+        # The parts cycle through the packages in the order of the parts list, like the fake server's
+        self.packages = {ipn: PACKAGES[index % len(PACKAGES)] for index, ipn in enumerate(ipns)}
+        self.random = random.Random(settings.seed)
+        self.sheetFiles = 0
+        self.symbolInstances = []
+        self.sheetInstances = []
+        self.footprints = []
+        self.withIpn = 0
+
+        instances = sum((settings.sheets * settings.reuse) ** level for level in range(settings.depth + 1))
+        self.perSheet = max(round(settings.components / instances), 1)
+
+    def create_uuid(self) -> str:
+        return str(uuid.UUID(int=self.random.getrandbits(128), version=4))
+
+    def create_sheet(self, level: int) -> Sheet:
+        """Create a sheet file with its components and its sub-sheets. Components get their
+        reference once per instance of the sheet, see `place()`."""
+        from kiutils.items.common import Position, Property
+        from kiutils.items.schitems import HierarchicalSheet, SchematicSymbol
+        from kiutils.schematic import Schematic
+
+        schematic = Schematic.create_new()
+        schematic.uuid = self.create_uuid()
+        components = []
+        for index in range(self.perSheet):
+            ipn = self.random.choice(self.ipns)
+            package = self.packages[ipn]
+            hasIpn = self.random.random() < self.settings.ipnRatio
+            symbol = SchematicSymbol(position=Position(X=25.4 + (index % 20) * 10.16, Y=25.4 + (index // 20) * 10.16, angle=0),
+                                     unit=1, inBom=True, onBoard=True, uuid=self.create_uuid())
+            symbol.libId = f'{self.name}-symbols:{package}'
+            symbol.properties = [
+                Property(key='Reference', value=f'{package[0]}?', id=0),
+                Property(key='Value', value=ipn, id=1),
+                Property(key='Footprint', value=f'{self.name}-footprints:{package}', id=2),
+                Property(key='Datasheet', value='', id=3),
+            ]
+            if hasIpn:
+                symbol.properties.append(Property(key=IPN_FIELD, value=ipn, id=4))
+            schematic.schematicSymbols.append(symbol)
+            components.append((symbol.uuid, ipn if hasIpn else None, package))
+
+        children = []
+        if level < self.settings.depth:
+            for index in range(self.settings.sheets):
+                child = self.create_sheet(level + 1)
+                for instance in range(self.settings.reuse):
+                    sheet = HierarchicalSheet(position=Position(X=25.4 + instance * 30.48, Y=180 + index * 20.32),
+                                              width=25.4, height=15.24, uuid=self.create_uuid())
+                    sheet.sheetName = Property(key='Sheet name', value=f'{path.splitext(child.fileName)[0]}_{instance + 1}')
+                    sheet.fileName = Property(key='Sheet file', value=child.fileName, id=1)
+                    schematic.sheets.append(sheet)
+                    children.append((sheet.uuid, child))
+
+        self.sheetFiles += 1
+        fileName = f'{self.name}.kicad_sch' if level == 0 else f'sheet{self.sheetFiles}.kicad_sch'
+        schematic.filePath = path.join(self.directory, fileName)
+        return Sheet(fileName, schematic, components, children)
+
+    def place(self, sheet: Sheet, sheetPath: str):
+        """Give the components of a sheet instance their references and footprints"""
+        from kiutils.items.schitems import HierarchicalSheetInstance, SymbolInstance
+
+        self.sheetInstances.append(HierarchicalSheetInstance(instancePath=sheetPath or '/', page=str(len(self.sheetInstances) + 1)))
+        for symbolUuid, ipn, package in sheet.components:
+            number = len(self.symbolInstances) + 1
+            reference = f'{package[0]}{number}'
+            value = ipn or package
+            self.symbolInstances.append(SymbolInstance(path=f'{sheetPath}/{symbolUuid}', reference=reference, unit=1,
+                                                       value=value, footprint=f'{self.name}-footprints:{package}'))
+            self.footprints.append((reference, ipn, package))
+            if ipn is not None:
+                self.withIpn += 1
+        for sheetUuid, child in sheet.children:
+            self.place(child, f'{sheetPath}/{sheetUuid}')
+
+    def write_board(self):
+        from kiutils.board import Board
+        from kiutils.footprint import Footprint
+        from kiutils.items.common import Position
+        from kiutils.utils import sexpr
+
+        board = Board.create_new()
+        board.setup.auxAxisOrigin = Position(X=0, Y=0)
+        templates = {}
+        for index, (reference, ipn, package) in enumerate(self.footprints):
+            # Every tenth component is a THT part, every fifth is placed on the bottom side
+            throughHole = index % 10 == 9
+            key = (package, throughHole)
+            if key not in templates:
+                templates[key] = sexpr.parse_sexp(create_footprint(f'{self.name}-footprints:{package}', package,
+                                                                   self.settings.pads, throughHole))
+            footprint = Footprint.from_sexpr(templates[key])
+            footprint.position = Position(X=10 + (index % 100) * 5.08, Y=10 + (index // 100) * 5.08,
+                                          angle=90 if index % 4 == 1 else 0)
+            footprint.layer = 'B.Cu' if index % 5 == 4 else 'F.Cu'
+            footprint.tstamp = self.create_uuid()
+            footprint.graphicItems[0].text = reference
+            footprint.graphicItems[1].text = ipn or package
+            footprint.properties = {IPN_FIELD: ipn} if ipn is not None else {}
+            board.footprints.append(footprint)
+        board.to_file(path.join(self.directory, f'{self.name}.kicad_pcb'))
+
+    def write_library(self) -> tuple:
+        """Write the symbol and footprint file of each part"""
+        symbolPaths, footprintPaths = {}, {}
+        directory = path.join(self.directory, 'downloads')
+        makedirs(directory, exist_ok=True)
+        for ipn in self.ipns:
+            package = self.packages[ipn]
+            symbolPaths[ipn] = path.join(directory, f'{ipn}.kicad_sym')
+            with open(symbolPaths[ipn], 'w') as outfile:
+                outfile.write(SYMBOL_TEMPLATE.format(name=ipn, reference=package[0], package=package))
+            footprintPaths[ipn] = path.join(directory, f'{ipn}.kicad_mod')
+            with open(footprintPaths[ipn], 'w') as outfile:
+                outfile.write(create_footprint(ipn, package, self.settings.pads))
+        return symbolPaths, footprintPaths
+
+def generate_project(directory: str, settings: ProjectSettings, name: str = 'synthetic',
+                     ipns: Optional[List[str]] = None, serverId: str = '', masterPart: str = '') -> GeneratedProject:
+    """Write a synthetic KiCad project
+
+    Args:
+        - directory (str): Folder to write the project to, created if missing
+        - settings (ProjectSettings): Shape of the project
+        - name (str): Name of the KiCad project
+        - ipns (List[str]): IPNs of the parts to use, created from `settings.parts` if not given
+        - serverId (str): InvenTree server ID of the KiTree project file
+        - masterPart (str): IPN of the assembly of the KiTree project file
+
+    Returns:
+        - GeneratedProject: Paths, parts and counts of the project
+    """
+    if ipns is None:
+        ipns = create_ipns(settings.parts if settings.parts > 0 else max(settings.components // 4, 1))
+    makedirs(directory, exist_ok=True)
+    generator = _Generator(settings, name, directory, ipns)
+
+    root = generator.create_sheet(0)
+    generator.place(root, '')
+    root.schematic.symbolInstances = generator.symbolInstances
+    root.schematic.sheetInstances = generator.sheetInstances
+    root.write(set())
+    generator.write_board()
+    symbolPaths, footprintPaths = generator.write_library()
+
+    with open(path.join(directory, f'{name}.kicad_pro'), 'w') as outfile:
+        outfile.write('{}\n')
+    with open(path.join(directory, '.kitree'), 'w') as outfile:
+        json.dump({'inventreeServerId': serverId, 'masterPart': masterPart, 'parts': ipns}, outfile, indent=4)
+
+    return GeneratedProject(
+        name           = name,
+        path           = directory,
+        ipns           = ipns,
+        components     = len(generator.symbolInstances),
+        withIpn        = generator.withIpn,
+        sheetFiles     = generator.sheetFiles,
+        sheetInstances = len(generator.sheetInstances),
+        symbolPaths    = symbolPaths,
+        footprintPaths = footprintPaths
+    )
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """Add the options of `ProjectSettings` to a command line parser"""
+    defaults = ProjectSettings()
+    parser.add_argument('--components', type=int, default=defaults.components, help='Number of components')
+    parser.add_argument('--depth', type=int, default=defaults.depth, help='Levels of sub-sheets below the root sheet')
+    parser.add_argument('--sheets', type=int, default=defaults.sheets, help='Different sub-sheets of each sheet')
+    parser.add_argument('--reuse', type=int, default=defaults.reuse, help='Instances of each sub-sheet')
+    parser.add_argument('--pads', type=int, default=defaults.pads, help='Pads of each footprint')
+    parser.add_argument('--ipn-ratio', type=float, default=defaults.ipnRatio, help='Share of components with an IPN field')
+    parser.add_argument('--parts', type=int, default=defaults.parts, help='Different parts, 0 for a quarter of the components')
+    parser.add_argument('--seed', type=int, default=defaults.seed, help='Seed of the random generator')
+
+def get_settings(args: argparse.Namespace) -> ProjectSettings:
+    """Get the settings from the options added by `add_arguments()`"""
+    return ProjectSettings(components=args.components, depth=args.depth, sheets=args.sheets, reuse=args.reuse,
+                           pads=args.pads, ipnRatio=args.ipn_ratio, parts=args.parts, seed=args.seed)
+
+def main():
+    parser = argparse.ArgumentParser(description='Generator of synthetic KiCad projects')
+    parser.add_argument('directory', help='Folder to write the project to')
+    parser.add_argument('--name', default='synthetic', help='Name of the KiCad project')
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    settings = get_settings(args)
+    project = generate_project(args.directory, settings, name=args.name)
+    print(f'Wrote {project.name} to {project.path}: {project.components} components '
+          f'({project.withIpn} with IPN) of {len(project.ipns)} parts, {project.sheetFiles} schematic files, '
+          f'{project.sheetInstances} sheet instances')
+    print(f'Settings: {json.dumps(asdict(settings))}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""Memory benchmark of the InvenTree object model
+
+Loads synthetic parts with parameters, attachments and supplier parts into the component classes
+(`Part`, `PartParameter`, `ManufacturerPart`, ...) and reports the memory retained per part,
+measured with ``tracemalloc``. The same parts are loaded into the previous object model (see
+`baseline_models.py`) and kept as raw API records for reference.
+
+Usage:
+    python benchmarks/memory_models.py [ --parts N ] [ --parameters N ] [ --max-kb KB ]
+
+Exits with status 1 if the retained memory per part exceeds ``--max-kb``, so it can be used as a
+regression check in CI.
+
+Author:
+    (C) Marvin Mager - @mvnmgrx - 2022
+
+License identifier:
+    GPL-3.0
+"""
+
+import argparse
+import gc
+import sys
+import threading
+import tracemalloc
+from os import path
+
+sys.path.insert(0, path.join(path.dirname(path.dirname(path.abspath(__file__))), 'src'))
+
+import baseline_models
+from components.part import Part
+
+UNITS = ['Ohm', 'F', 'V', 'A', 'W', 'mm', '']
+COMPANIES = 20
+
+class FakeApi():
+    """Stands in for `InvenTreeApi`, answering with synthetic records. Every record is created
+    anew like a decoded API response, so shared strings are not shared by accident."""
+
+    def __init__(self, parameters: int):
+        self.parameters = parameters
+        self.partCache = {}
+        self.companyCache = {}
+        self.cacheLock = threading.RLock()
+
+    def part(self, partId: int) -> dict:
+        return {
+            'active': True, 'assembly': False, 'category': 1, 'component': True, 'default_expiry': 0,
+            'default_supplier': None, 'description': f'Resistor {partId} Ohm 0603 1%',
+            'full_name': f'R_{partId}', 'image': '', 'in_stock': 100.0, 'ordering': 0.0,
+            'building': 0.0, 'IPN': f'R-{partId:06d}', 'is_template': False, 'keywords': 'resistor smd',
+            'link': '', 'minimum_stock': 0, 'name': f'R_{partId}', 'notes': None, 'pk': partId,
+            'purchaseable': True, 'revision': '', 'salable': False, 'starred': False,
+            'stock_item_count': 1, 'suppliers': 1, 'thumbnail': '', 'trackable': False,
+            'units': ''.join(['p', 'c', 's']), 'variant_of': None, 'virtual': False
+        }
+
+    def get_part_parameters(self, partId: int) -> list:
+        return [{
+            'pk': partId * 100 + index, 'part': partId, 'template': index, 'data': str(index * 10),
+            'template_detail': {'pk': index, 'name': ''.join(['Parameter ', str(index)]),
+                                'units': ''.join(UNITS[index % len(UNITS)])}
+        } for index in range(self.parameters)]
+
+    def get_part_attachments(self, partId: int) -> list:
+        return [{
+            'pk': partId * 10 + index, 'part': partId, 'attachment': f'/media/part/{partId}/{name}.dat',
+            'filename': f'{name}.dat', 'comment': ''.join([name]), 'upload_date': '2022-01-01'
+        } for index, name in enumerate(['Footprint', 'Symbol', 'Datasheet'])]
+
+    def get_part_bom_items(self, partId: int) -> list:
+        return []
+
+    def get_manufacturer_part_list(self, partId: int) -> list:
+        return [{'pk': partId, 'part': partId, 'manufacturer': partId % COMPANIES + 1,
+                 'description': '', 'MPN': f'MPN-{partId}', 'link': ''}]
+
+    def get_supplier_part_list(self, mpn: str) -> list:
+        partId = int(mpn.removeprefix('MPN-'))
+        return [{'description': '', 'link': f'https://supplier/{partId}', 'manufacturer_part': partId,
+                 'note': '', 'pk': partId, 'packaging': ''.join(['Cut', ' Tape']), 'part': partId,
+                 'SKU': f'SKU-{partId}', 'supplier': COMPANIES + partId % 3 + 1}]
+
+    def get_company(self, companyId: int) -> dict:
+        return {'pk': companyId, 'url': '', 'name': ''.join(['Company ', str(companyId)]),
+                'description': '', 'website': '', 'phone': '', 'address': '', 'email': None,
+                'currency': ''.join(['EU', 'R']), 'contact': '', 'link': '', 'image': '',
+                'is_customer': False, 'is_manufacturer': True, 'is_supplier': True, 'notes': '',
+                'parts_supplied': 0, 'parts_manufactured': 0}
+
+def load_records(api: FakeApi, count: int) -> list:
+    """Keep the raw records of the parts, as a dict based model would"""
+    records = []
+    for partId in range(1, count + 1):
+        record = api.part(partId)
+        record['parameters'] = api.get_part_parameters(partId)
+        record['attachments'] = api.get_part_attachments(partId)
+        record['manufacturer_parts'] = api.get_manufacturer_part_list(partId)
+        for manufacturerPart in record['manufacturer_parts']:
+            manufacturerPart['manufacturer_detail'] = api.get_company(manufacturerPart['manufacturer'])
+            manufacturerPart['supplier_parts'] = api.get_supplier_part_list(manufacturerPart['MPN'])
+            for supplierPart in manufacturerPart['supplier_parts']:
+                supplierPart['supplier_detail'] = api.get_company(supplierPart['supplier'])
+        records.append(record)
+    return records
+
+def load_baseline_parts(api: FakeApi, count: int) -> list:
+    """Load the parts into the classes of the previous object model"""
+    parts = []
+    for partId in range(1, count + 1):
+        part = baseline_models.Part(api, None)
+        part._load(api.part(partId))
+        parts.append(part)
+    return parts
+
+def load_parts(api: FakeApi, count: int) -> list:
+    """Load the parts into the component classes"""
+    parts = []
+    for partId in range(1, count + 1):
+        part = Part(api, None)
+        part._load(api.part(partId))
+        parts.append(part)
+    return parts
+
+def measure(loader, api: FakeApi, count: int) -> int:
+    """Get the memory in bytes retained by the objects the loader returns"""
+    gc.collect()
+    tracemalloc.start()
+    objects = loader(api, count)
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    return retained
+
+def main():
+    parser = argparse.ArgumentParser(description='Memory retained by the InvenTree object model')
+    parser.add_argument('--parts', type=int, default=5000, help='Number of parts to load')
+    parser.add_argument('--parameters', type=int, default=10, help='Number of parameters per part')
+    parser.add_argument('--max-kb', type=float, default=None, help='Fail if a part retains more than this')
+    args = parser.parse_args()
+
+    records = measure(load_records, FakeApi(args.parameters), args.parts)
+    baseline = measure(load_baseline_parts, FakeApi(args.parameters), args.parts)
+    parts = measure(load_parts, FakeApi(args.parameters), args.parts)
+
+    perRecord = records / args.parts / 1024
+    perBaseline = baseline / args.parts / 1024
+    perPart = parts / args.parts / 1024
+    print(f'{args.parts} parts with {args.parameters} parameters, 3 attachments and 1 supplier part each')
+    print(f'  Raw API records:  {records / 1024 / 1024:8.2f} MiB  {perRecord:6.2f} KiB/part')
+    print(f'  Previous model:   {baseline / 1024 / 1024:8.2f} MiB  {perBaseline:6.2f} KiB/part')
+    print(f'  Component model:  {parts / 1024 / 1024:8.2f} MiB  {perPart:6.2f} KiB/part  ({perPart / perBaseline:.0%} of previous)')
+
+    if args.max_kb is not None and perPart > args.max_kb:
+        sys.exit(f'A part retains {perPart:.2f} KiB, more than the allowed {args.max_kb:.2f} KiB')
+
+if __name__ == '__main__':
+    main()
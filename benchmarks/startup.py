@@ -0,0 +1,73 @@
+"""Startup benchmark of the KiTree CLI
+
+Measures the import time of the modules loaded when the CLI starts, using the interpreter's
+``-X importtime`` option, and prints the modules that take the most time to import.
+
+Usage:
+    python benchmarks/startup.py [ --top N ] [ --max-ms MS ] [ --runs N ]
+
+Exits with status 1 if the median total import time exceeds ``--max-ms``, so it can be used as
+a regression check in CI.
+
+Author:
+    (C) Marvin Mager - @mvnmgrx - 2022
+
+License identifier:
+    GPL-3.0
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from os import path
+
+SRC_DIR = path.join(path.dirname(path.dirname(path.abspath(__file__))), 'src')
+
+STARTUP_CODE = "import main; from app import App; App()"
+"""Code that mimics the startup of the CLI without entering the REPL"""
+
+def measure_imports() -> dict:
+    """Run the startup code in a fresh interpreter and collect the import times
+
+    Returns:
+        - dict: Module name as key and a tuple of (self time, cumulative time) in µs as value
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', STARTUP_CODE],
+        cwd=SRC_DIR, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        sys.exit(f'Startup failed:\n{result.stderr}')
+
+    imports = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        selfTime, cumulative, name = line.removeprefix('import time:').split('|')
+        imports[name.strip()] = (int(selfTime), int(cumulative))
+    return imports
+
+def main():
+    parser = argparse.ArgumentParser(description='Import-time breakdown of the KiTree CLI startup')
+    parser.add_argument('--top', type=int, default=15, help='Number of modules to show')
+    parser.add_argument('--max-ms', type=float, default=None, help='Fail if the total import time exceeds this')
+    parser.add_argument('--runs', type=int, default=5, help='Number of runs to take the median of')
+    args = parser.parse_args()
+
+    runs = [measure_imports() for _ in range(args.runs)]
+    totals = [sum(selfTime for selfTime, _ in run.values()) / 1000 for run in runs]
+    median = statistics.median(totals)
+    imports = runs[totals.index(median)] if median in totals else runs[-1]
+
+    print(f'{"module":<50} {"self [ms]":>10} {"cumulative [ms]":>16}')
+    for name, (selfTime, cumulative) in sorted(imports.items(), key=lambda i: -i[1][1])[:args.top]:
+        print(f'{name:<50} {selfTime / 1000:>10.2f} {cumulative / 1000:>16.2f}')
+    print(f'\n{len(imports)} modules imported, median total import time over {args.runs} runs: {median:.2f} ms')
+
+    if args.max_ms is not None and median > args.max_ms:
+        print(f'Import time exceeds the limit of {args.max_ms:.2f} ms!')
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""Stress test of the InvenTree API client
+
+Starts the fake InvenTree server (see `fakeserver.py`) and loads its parts from many threads at
+once through a single `InvenTreeApi`: paginated listings with prefetching, detail requests and
+parts with their templates, parameters and supplier parts. The server rotates its API token while
+the test runs, so requests of several threads are rejected at the same time.
+
+Checks that every thread got complete results, that the part and company caches hand out one
+object per ID, that the request counters and the scheduler are balanced afterwards and that a
+rejected token is renewed once and not once per thread.
+
+Usage:
+    python benchmarks/stress_client.py [ --threads N ] [ --parts N ] [ --rounds N ] [ --rotate N ]
+
+Exits with status 1 if a check fails, so it can be used as a regression check in CI.
+
+Author:
+    (C) Marvin Mager - @mvnmgrx - 2022
+
+License identifier:
+    GPL-3.0
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from os import path
+
+sys.path.insert(0, path.join(path.dirname(path.dirname(path.abspath(__file__))), 'src'))
+
+from fakeserver import PACKAGES, PASSWORD, USERNAME, Catalog, FakeInvenTree
+
+from api.inventree import InvenTreeApi
+from api.tokens import TokenStore
+from components.company import Company
+from components.data import Credentials
+from components.part import Part
+from misc.logger import Logger
+
+def get_expected_parts(catalog: Catalog) -> dict:
+    """Get the IPN and schematic identifier of each part of the catalog by part ID"""
+    ipns = set(catalog.ipns)
+    parts = {record['pk']: record['IPN'] for record in catalog.tables['part'].records if record['IPN'] in ipns}
+    return {record['part']: (parts[record['part']], record['data']) for record in catalog.tables['part/parameter'].records
+            if record['part'] in parts and record['template_detail']['name'] == 'Schematic Identifier'}
+
+def run_worker(api: InvenTreeApi, worker: int, expected: dict, listed: int, rounds: int, stride: int) -> list:
+    """Load listings and parts like a build does, returns the problems found. Each worker loads
+    every `stride`-th part, so several workers load each part at the same time."""
+    problems = []
+    partIds = sorted(expected)
+    for _ in range(rounds):
+        records = [record['pk'] for record in api.iterate_list('part/?active=true', pageSize=50, prefetch=True)]
+        if len(records) != listed or len(set(records)) != listed:
+            problems.append(f'Worker {worker}: listing returned {len(records)} of {listed} parts')
+
+        for partId in partIds[worker % stride::stride]:
+            part = Part.get_by_id(api, partId)
+            if (part.IPN, part.ResolvedParameters.get('Schematic Identifier')) != expected[partId] \
+                    or 'Package' not in part.ResolvedParameters:
+                problems.append(f'Worker {worker}: part {partId} was loaded incompletely')
+            supplier = part.ManufacturerParts[0].SupplierParts[0].Supplier
+            if supplier is not Company.get_by_id(api, supplier.ID):
+                problems.append(f'Worker {worker}: supplier {supplier.ID} is not shared')
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description='Stress test of the InvenTree API client')
+    parser.add_argument('--threads', type=int, default=32, help='Number of threads using the client')
+    parser.add_argument('--parts', type=int, default=300, help='Number of parts on the fake server')
+    parser.add_argument('--rounds', type=int, default=3, help='Number of times each thread loads the parts')
+    parser.add_argument('--rotate', type=int, default=200, help='Requests after which the server replaces the token')
+    args = parser.parse_args()
+
+    catalog = Catalog(parts=args.parts, modelSize=0)
+    expected = get_expected_parts(catalog)
+    listed = len(catalog.tables['part'].records)
+    server = FakeInvenTree(catalog, tokenLifetime=args.rotate).start()
+    with tempfile.TemporaryDirectory() as directory:
+        # Rejected tokens are expected, their warnings go to the log file
+        Logger.Init(logPath=path.join(directory, 'kitree.log'))
+        api = InvenTreeApi(tokens=TokenStore(path.join(directory, 'tokens.json')))
+        if not api.connect(Credentials(id='stress', username=USERNAME, password=PASSWORD, domain=server.url)):
+            sys.exit(f'Connecting to the fake server failed: {api.connectionError}')
+
+        start = time.monotonic()
+        problems = []
+        with ThreadPoolExecutor(max_workers=args.threads) as executor:
+            futures = [executor.submit(run_worker, api, worker, expected, listed, args.rounds, min(args.threads, 7)) for worker in range(args.threads)]
+            for future in futures:
+                problems += future.result()
+        elapsed = time.monotonic() - start
+        Logger.Shutdown()
+    server.stop()
+
+    stats = api.api.stats
+    scheduler = api.api.scheduler
+    if stats.inFlight != 0:
+        problems.append(f'Request counter reports {stats.inFlight} requests in flight')
+    if scheduler.inFlight != 0 or any(scheduler.inFlightByPriority):
+        problems.append(f'Scheduler reports {scheduler.inFlight} requests in flight')
+    # The parts and their templates
+    if len(api.partCache) != len(expected) + len(PACKAGES):
+        problems.append(f'Part cache holds {len(api.partCache)} of {len(expected) + len(PACKAGES)} parts')
+    # One token when connecting and one per rotation, not one per rejected request
+    if server.tokenRequests > server.rotations + 1:
+        problems.append(f'{server.tokenRequests} tokens were requested for {server.rotations} rotations')
+
+    print(f'{args.threads} threads, {args.rounds} rounds over {args.parts} parts in {elapsed:.2f} s')
+    print(f'  Server:  {sum(server.requests.values())} requests, {server.rejected} rejected, '
+          f'{server.rotations} token rotations, {server.tokenRequests} tokens requested')
+    print(f'  Client:  {stats.requests} requests, {stats.requestsSaved} shared, {scheduler.retries} retries, '
+          f'concurrency limit {int(scheduler.limit)}')
+
+    if len(problems) > 0:
+        for problem in problems[:20]:
+            print(f'  FAILED: {problem}')
+        sys.exit(f'{len(problems)} checks failed')
+    print('  All checks passed')
+
+if __name__ == '__main__':
+    main()
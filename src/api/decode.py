@@ -0,0 +1,140 @@
+"""Decoding of InvenTree API responses into the component classes
+
+Author:
+    (C) Marvin Mager - @mvnmgrx - 2022
+
+License identifier:
+    GPL-3.0
+"""
+
+import json
+
+from dataclasses import MISSING, dataclass, fields
+from typing import Any, Callable, Dict, Generic, Iterable, List, Optional, Type, TypeVar, Union
+
+T = TypeVar('T')
+
+_orjson: Any = None
+"""The orjson module once `loads()` imported it, False if it is not installed"""
+
+def loads(content: Union[bytes, str]) -> Any:
+    """Parse a JSON document, using orjson if it is installed and the standard library otherwise.
+    orjson is imported by the first call, it is not needed to start KiTree.
+
+    Args:
+        - content (bytes | str): The JSON document, e.g. the body of a response
+
+    Raises:
+        - ValueError: Content is not valid JSON
+    """
+    global _orjson
+    if _orjson is None:
+        try:
+            import orjson
+            _orjson = orjson
+        except ImportError:
+            _orjson = False
+    if _orjson:
+        return _orjson.loads(content)
+    return json.loads(content)
+
+@dataclass(frozen=True)
+class Key():
+    """Key of an API record that fills an attribute, together with a conversion of its value"""
+
+    name: str
+    """Name of the key in the API record, e.g. `pk`"""
+
+    convert: Optional[Callable[[Any], Any]] = None
+    """Called with the value of the key, e.g. to intern a string or decode a nested record"""
+
+class Decoder(Generic[T]):
+    """Declarative mapping of API records to a component class. Only the mapped keys are read from
+    a record, all other keys are skipped and the attributes not mapped keep their defaults.
+
+    Example:
+        PART_PARAMETER = Decoder(PartParameter, {
+            'ID': 'pk',
+            'TemplateDetail': Key('template_detail', PART_PARAMETER_TEMPLATE.decode),
+        })
+    """
+
+    def __init__(self, cls: Type[T], mapping: Dict[str, Union[str, Key]]):
+        """Create a decoder
+
+        Args:
+            - cls (type): The dataclass to create
+            - mapping (dict): Attribute name as key and the record's key (str or `Key`) as value
+
+        Raises:
+            - AttributeError: An attribute is not a field of the class
+        """
+        self.cls = cls
+        names = [item.name for item in fields(cls)]
+        for attribute in mapping:
+            if attribute not in names:
+                raise AttributeError(f'{cls.__name__} has no field "{attribute}"')
+
+        self.mapping = {attribute: key if isinstance(key, Key) else Key(key) for attribute, key in mapping.items()}
+        self.decode = self._compile()
+
+    def _compile(self) -> Callable[..., T]:
+        """Generate the function creating an object from a record, the way `dataclasses` generates
+        `__init__`. Slotted classes without `__post_init__` are filled through their slots
+        directly, which skips the `object.__setattr__` call per field of frozen dataclasses. Other
+        classes get every field passed positionally. Fields that are not mapped can be passed as
+        keyword arguments, otherwise they keep their defaults.
+
+        Raises KeyError when a mapped key is missing in the record."""
+        direct = '__slots__' in self.cls.__dict__ and not hasattr(self.cls, '__post_init__')
+        namespace = {'cls': self.cls, 'MISSING': MISSING, 'new': object.__new__}
+        values = []
+        parameters = []
+        for index, item in enumerate(fields(self.cls)):
+            if not item.init:
+                continue
+            key = self.mapping.get(item.name)
+            if key is not None:
+                value = f'record[{key.name!r}]'
+                if key.convert is not None:
+                    namespace[f'convert{index}'] = key.convert
+                    value = f'convert{index}({value})'
+            else:
+                if item.default_factory is not MISSING:
+                    namespace[f'factory{index}'] = item.default_factory
+                    default = f'factory{index}()'
+                else:
+                    namespace[f'default{index}'] = item.default
+                    default = f'default{index}'
+                parameters.append(f'{item.name}=MISSING')
+                value = f'({item.name} if {item.name} is not MISSING else {default})'
+            if direct:
+                namespace[f'set{index}'] = getattr(self.cls, item.name).__set__
+                value = f'set{index}(obj, {value})'
+            values.append(value)
+
+        signature = ', '.join(['record'] + (['*'] + parameters if len(parameters) > 0 else []))
+        if direct:
+            body = ['obj = new(cls)'] + values + ['return obj']
+        else:
+            body = [f'return cls({", ".join(values)})']
+        source = f'def decode({signature}):\n' + ''.join(f'    {line}\n' for line in body)
+        exec(source, namespace)
+        return namespace['decode']
+
+    def decode_into(self, target: T, record: dict):
+        """Set the mapped attributes of an existing object from an API record
+
+        Raises:
+            - KeyError: A mapped key is missing in the record
+        """
+        for attribute, key in self.mapping.items():
+            value = record[key.name]
+            setattr(target, attribute, key.convert(value) if key.convert is not None else value)
+
+    def decode_list(self, records: Optional[Iterable[dict]]) -> Optional[List[T]]:
+        """Create an object from each API record, returns None if there are no records"""
+        if records is None:
+            return None
+        decode = self.decode
+        return [decode(record) for record in records]
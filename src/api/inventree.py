@@ -7,85 +7,478 @@ License identifier:
     GPL-3.0
 """
 
+import re
+import threading
+
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass, field
-import time
-from typing import Optional
-from inventree.api import InvenTreeAPI
-from requests import HTTPError
-import requests
+from os import path
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Optional
+from urllib.parse import quote
+from api.decode import loads
+from api.scheduler import Priority, RequestScheduler, get_status_code, request_priority
 from components.data import Credentials
 from misc.logger import Logger
+from misc.progress import RequestStats
+from misc.tracing import Tracer
+
+# The InvenTree client pulls in requests and is only imported once a connection is made, the
+# mirror (sqlite3), the search index and the token store once they are used
+if TYPE_CHECKING:
+    from inventree.api import InvenTreeAPI
+    from api.mirror import CatalogMirror, SyncResult
+    from api.search import PartSearchIndex, SearchResult
+    from api.tokens import TokenStore
+
+def is_unauthorized(ex: Exception) -> bool:
+    """Check if an exception raised by the InvenTree client reports a HTTP 401 response"""
+    detail = ex.args[0] if len(ex.args) > 0 else None
+    return isinstance(detail, dict) and detail.get('status_code') == 401
 
 @dataclass
 class ApiProxy():
-    api: InvenTreeAPI = None
+    """Sends the requests of `InvenTreeApi` through the scheduler, or answers them from the mirror
+    in offline mode. May be used from any number of threads: every thread sends its GET requests
+    through its own HTTP session, identical GET requests in flight are sent once and a rejected
+    token is renewed by a single thread."""
+    api: 'InvenTreeAPI' = None
+    stats: RequestStats = field(default_factory=lambda: RequestStats())
+    """Counters of the requests sent through this proxy"""
+
+    reauthenticate: Optional[Callable[[], bool]] = None
+    """Called when the server rejects the API token, returns True if a new token was obtained"""
+
+    mirror: Optional['CatalogMirror'] = None
+    """Local mirror of the catalog answering GET requests in offline mode"""
+
+    offline: bool = False
+    """Read from the mirror instead of the server"""
+
+    scheduler: RequestScheduler = field(default_factory=lambda: RequestScheduler())
+    """Adapts the number of concurrent requests to the server and retries failed GET requests"""
+
+    pending: Dict[str, Future] = field(default_factory=dict)
+    """GET requests in flight by their URL, resolving to the body of the response"""
+    pendingLock: threading.Lock = field(default_factory=threading.Lock)
+
+    authLock: threading.Lock = field(default_factory=threading.Lock)
+    """Serializes requesting a new token after the server rejected the current one"""
+
+    sessions: threading.local = field(default_factory=threading.local)
+    """HTTP session of each thread sending GET requests"""
+
+    log = Logger.Create(__name__)
+
+    def _request(self, function: Callable, *args, **kwargs):
+        """Send a request, retrying it once with a new token if the current token was rejected"""
+        token = self.api.token
+        try:
+            return function(*args, **kwargs)
+        except Exception as ex:
+            if not is_unauthorized(ex) or self.reauthenticate is None:
+                raise
+            with self.authLock:
+                # Requests rejected at the same time only request one new token
+                if self.api.token == token and not self.reauthenticate():
+                    raise
+        return function(*args, **kwargs)
+
+    def _get_session(self):
+        """Get the HTTP session of the current thread. Sessions keep their connections to the
+        server open, but must not be shared between threads."""
+        session = getattr(self.sessions, 'session', None)
+        if session is None:
+            import requests
+            session = requests.Session()
+            self.sessions.session = session
+        return session
+
+    def _get_content(self, url) -> Optional[bytes]:
+        """Send a GET request with the client's settings. Unlike `InvenTreeAPI.get()`, the raw body
+        is returned and error responses keep their `Retry-After` header."""
+        import requests
+
+        client = self.api
+        if client.use_token_auth and client.token:
+            headers, auth = {'AUTHORIZATION': f'Token {client.token}'}, None
+        else:
+            headers, auth = {}, client.auth
+        response = self._get_session().get(client.constructApiUrl(url), headers=headers, auth=auth,
+                                           timeout=client.timeout, proxies=client.proxies, verify=client.strict)
+        if response.status_code >= 300:
+            raise requests.exceptions.HTTPError({
+                'detail': 'Error occurred during API request',
+                'url': response.url,
+                'method': 'GET',
+                'status_code': response.status_code,
+                'body': response.text,
+                'retry_after': response.headers.get('Retry-After'),
+            })
+        return response.content
+
+    def get_content(self, url) -> Optional[bytes]:
+        """Get the raw body of a GET request, e.g. to decode it with `api.decode`. Identical
+        requests that are issued while one is in flight are not sent again, they wait for the
+        response of the first one instead (single flight)."""
+        if self.offline:
+            return self.mirror.get_content(url)
+
+        with self.pendingLock:
+            pending = self.pending.get(url)
+            leader = pending is None
+            if leader:
+                pending = Future()
+                self.pending[url] = pending
+        if not leader:
+            self.stats.saved()
+            return pending.result()
+
+        try:
+            content = self._send_get(url)
+        except BaseException as ex:
+            pending.set_exception(ex)
+            raise
+        else:
+            pending.set_result(content)
+            return content
+        finally:
+            with self.pendingLock:
+                del self.pending[url]
+
+    def _send(self, function: Callable, *args, idempotent: bool = False, measureLatency: bool = True, **kwargs):
+        """Send a request through the scheduler, counting every attempt"""
+        def attempt():
+            self.stats.started()
+            try:
+                with Tracer.span(str(args[0]), 'api', method=function.__name__):
+                    return self._request(function, *args, **kwargs)
+            finally:
+                self.stats.finished()
+        return self.scheduler.run(attempt, idempotent=idempotent, name=str(args[0]), measureLatency=measureLatency)
+
+    def _send_get(self, url) -> Optional[bytes]:
+        content = self._send(self._get_content, url, idempotent=True)
+        if content is not None:
+            self.stats.received(len(content))
+            self.scheduler.transferred(len(content))
+        return content
 
     def get(self, url):
-        st = time.time()
-        print('.', end='', flush=True)
-        ret = self.api.get(url)
-        et = time.time()
-        #print(f"{et-st:.2}s | {url}")
-        return ret
+        content = self.get_content(url)
+        if content is None:
+            return None
+        try:
+            return loads(content)
+        except ValueError:
+            self.log.error('Error decoding JSON response of %s', url)
+            return None
 
     def post(self, url, data):
-        st = time.time()
-        print('.', end='', flush=True)
-        ret = self.api.post(url, data)
-        et = time.time()
-        #print(f"{et-st:.2}s | {url}")
-        return ret
-    
+        if self.offline:
+            raise ConnectionError("Changing InvenTree data is not possible in offline mode")
+        return self._send(self.api.post, url, data)
+
     def delete(self, url):
-        st = time.time()
-        print('.', end='', flush=True)
-        ret = self.api.delete(url)
-        et = time.time()
-        #print(f"{et-st:.2}s | {url}")
-        return ret
-    
+        if self.offline:
+            raise ConnectionError("Changing InvenTree data is not possible in offline mode")
+        return self._send(self.api.delete, url)
+
     def downloadFile(self, url, destination, **kwargs):
-        st = time.time()
-        print('.', end='', flush=True)
-        ret = self.api.downloadFile(url, destination, **kwargs)
-        et = time.time()
-        #print(f"{et-st:.2}s | {url}")
+        if self.offline:
+            # Files are not mirrored, but files downloaded by earlier builds can be reused
+            if not path.isfile(destination):
+                raise FileNotFoundError(f"{url} was never downloaded and is not available in offline mode")
+            return True
+        ret = self._send(self.api.downloadFile, url, destination, idempotent=True, measureLatency=False, **kwargs)
+        if path.isfile(destination):
+            self.stats.received(path.getsize(destination))
+            self.scheduler.transferred(path.getsize(destination))
         return ret
 
 @dataclass
 class InvenTreeApi():
+    """Wrapper of the InvenTree API used by all commands
+
+    The API is thread-safe once connected: requests, the part and company caches, the search index
+    and the request counters may be used from any thread, e.g. by a thread pool loading parts.
+    Parts and companies loaded by several threads at the same time may be requested more than once,
+    but all threads get the same cached object. `connect()` and `set_offline()` must not run
+    concurrently with other calls."""
     api: ApiProxy = field(default_factory=lambda: ApiProxy())
     connected: bool = False
     credentials: Credentials = field(default_factory=lambda: Credentials())
+    tokens: Optional['TokenStore'] = None
+    """Store of the API tokens, used instead of authenticating with username and password. The
+    default store is created by `get_tokens()`."""
+    searchIndex: Optional['PartSearchIndex'] = None
+    """Local index answering part searches, created by `get_search_index()`"""
+    partCache: Dict[int, object] = field(default_factory=dict)
+    """Parts loaded by ID (see `Part.get_by_id()`), shared e.g. by all variants of a template"""
+    companyCache: Dict[int, object] = field(default_factory=dict)
+    """Companies loaded by ID (see `Company.get_by_id()`), shared by all of their supplier and
+    manufacturer parts"""
+    cacheLock: threading.RLock = field(default_factory=threading.RLock)
+    """Guards `partCache` and `companyCache`"""
     log = Logger.Create(__name__)
 
+    connection: Optional[Future] = None
+    """Connection attempt started by `connect_async()`, resolves to the result of `connect()`"""
+
+    connectionError: Optional[str] = None
+    """Reason the last connection attempt failed"""
+
+    pageSize: int = 250
+    """Number of results requested per page when iterating over list endpoints"""
+
+    maxFilterLength: int = 1500
+    """Maximum length of the quoted IPN filter of a query, see `get_part_ids()`"""
+
+    prefetcher: Optional[ThreadPoolExecutor] = None
+    """Executor requesting the next page of a listing in the background, see `iterate_list()`"""
+    prefetcherLock: threading.Lock = field(default_factory=threading.Lock)
+
     def connect(self, credentials: Credentials) -> bool:
-        """Connects to an Inventree server
+        """Connects to an Inventree server. A stored API token of the server is used if available,
+        otherwise a new token is requested with username and password and stored for the next
+        connection.
 
         Args:
             credentials (dict): Credentials for the inventree server as dict. Fields needed:
-            "username", "password", "domain
+            "id", "domain" and "username" and "password" if no API token is stored yet
 
         Returns:
             bool: True, if connection was successfull. Otherwise False
         """
-        self.credentials.domain = credentials.domain
-        self.credentials.id = credentials.id
-        self.credentials.username = credentials.username
-        self.credentials.password = credentials.password
+        self.set_credentials(credentials)
         try:
-            self.log.debug(f'Connecting to Inventree @ {self.credentials.domain}, Username: {self.credentials.username}, PW: <redacted>')
-            self.api.api = InvenTreeAPI(self.credentials.domain, 
-                                    username=self.credentials.username, 
-                                    password=self.credentials.password, 
-                                    verbose=True)
+            token = self.get_tokens().get(self.credentials.id, self.credentials.domain)
+            try:
+                self.api.api = self._create_client(token)
+            except Exception as ex:
+                # Only a rejected token can be fixed by authenticating again, anything else is
+                # reported without forgetting the token
+                if token is None or get_status_code(ex) not in (401, 403) or not self.credentials.password:
+                    raise
+                self.log.warning('API token of server "%s" was rejected, authenticating with username and password', self.credentials.id)
+                self.get_tokens().remove(self.credentials.id)
+                token = None
+                self.api.api = self._create_client(None)
+
+            if token is None and self.api.api.token:
+                self.get_tokens().set(self.credentials.id, self.credentials.domain, self.api.api.token)
+            self.api.reauthenticate = self.reauthenticate
             self.connected = True
+            self.connectionError = None
         except Exception as ex:
             self.connected = False
-            self.log.error(f'Connecting to Inventree failed! Exception: {ex}')
+            self.connectionError = str(ex)
+            self.log.error('Connecting to Inventree failed! Exception: %s', ex)
 
         return self.connected
 
+    def set_credentials(self, credentials: Credentials):
+        """Set the credentials of the server without connecting to it, e.g. to use its mirror"""
+        if credentials.id != self.credentials.id and self.api.mirror is not None:
+            self.api.mirror.close()
+            self.api.mirror = None
+        self.credentials.domain = credentials.domain
+        self.credentials.id = credentials.id
+        self.credentials.username = credentials.username
+        self.credentials.password = credentials.password
+
+    def get_tokens(self) -> 'TokenStore':
+        """Get the store of the API tokens, creating the default store if required"""
+        if self.tokens is None:
+            from api.tokens import TokenStore
+            self.tokens = TokenStore()
+        return self.tokens
+
+    def get_search_index(self) -> 'PartSearchIndex':
+        """Get the local search index, creating an empty one if required"""
+        with self.cacheLock:
+            if self.searchIndex is None:
+                from api.search import PartSearchIndex
+                self.searchIndex = PartSearchIndex()
+            return self.searchIndex
+
+    def get_mirror(self) -> 'CatalogMirror':
+        """Get the local mirror of the server's catalog, opening it if required"""
+        if self.api.mirror is None:
+            from api.mirror import CatalogMirror
+            self.api.mirror = CatalogMirror.for_server(self.credentials.id)
+        return self.api.mirror
+
+    def has_mirror(self) -> bool:
+        """Check if the local mirror of the server exists, without creating an empty one"""
+        if self.api.mirror is not None:
+            return True
+        from api.mirror import CatalogMirror
+        return bool(self.credentials.id) and CatalogMirror.exists_for_server(self.credentials.id)
+
+    def set_offline(self, offline: bool):
+        """Switch between reading from the server and reading from the local mirror. Writing
+        requests fail in offline mode.
+
+        Args:
+            offline (bool): True to read from the mirror, False to read from the server
+        """
+        if offline:
+            self.get_mirror()
+        self.api.offline = offline
+
+    def is_offline(self) -> bool:
+        return self.api.offline
+
+    def sync(self, full: bool = False, onProgress: Optional[Callable[['SyncResult'], None]] = None) -> List['SyncResult']:
+        """Update the local mirror from the server, see `CatalogMirror.sync()`
+
+        Raises:
+            ConnectionError: API is not connected or in offline mode
+        """
+        if self.api.offline:
+            raise ConnectionError("Syncing is not possible in offline mode")
+        self._require_connection()
+        with request_priority(Priority.Background):
+            return self.get_mirror().sync(self, full, onProgress)
+
+    def search_parts(self, query: str, limit: int = 20) -> List['SearchResult']:
+        """Search active parts by IPN, name, description, keywords, MPN and SKU in the local
+        search index. The index is brought up to date first, see `PartSearchIndex.refresh()`.
+
+        Args:
+            query (str): Words to search for
+            limit (int): Maximum number of results
+
+        Raises:
+            ConnectionError: The index has to be built from the server, but the API is not connected
+
+        Returns:
+            List[SearchResult]: Matching parts, most relevant first
+        """
+        searchIndex = self.get_search_index()
+        searchIndex.refresh(self)
+        return searchIndex.search(query, limit)
+
+    def complete_ipn(self, prefix: str) -> List[str]:
+        """Get the IPNs starting with the given prefix without waiting for the server. Only local
+        data is used: the search index if it was built and the mirror if it was synced.
+        """
+        searchIndex = self.get_search_index()
+        if not searchIndex.is_built() and self.has_mirror() and self.get_mirror().is_synced():
+            searchIndex.refresh(self)
+        return searchIndex.complete_ipn(prefix)
+
+    def _create_client(self, token: Optional[str]) -> 'InvenTreeAPI':
+        """Create the InvenTree client and connect it to the server
+
+        Args:
+            token (str): API token to authenticate with or None to authenticate with username and
+            password and request a new token
+
+        Raises:
+            ConnectionError: Connecting or authenticating failed
+            HTTPError: The server rejected the token, see `get_status_code()` for the status
+        """
+        from inventree.api import InvenTreeAPI
+        from requests.auth import HTTPBasicAuth
+        from requests.exceptions import Timeout
+
+        if token is None and not self.credentials.password:
+            raise ConnectionError(f'No API token stored for server "{self.credentials.id}" and no password configured')
+
+        self.log.debug('Connecting to Inventree @ %s, Username: %s, PW: <redacted>, using %s', self.credentials.domain,
+                       self.credentials.username, 'stored token' if token is not None else 'password')
+        client = InvenTreeAPI(self.credentials.domain,
+                              username=self.credentials.username,
+                              password=self.credentials.password,
+                              token=token,
+                              verbose=True,
+                              connect=token is None)
+        if token is not None:
+            # The client's own check hides the status of a failed authentication, so the token is
+            # checked here to tell a rejected token from any other error
+            try:
+                client.connected = client.testServer()
+            except Timeout:
+                raise
+            except Exception:
+                client.connected = False
+            if not client.connected:
+                raise ConnectionRefusedError("Could not connect to InvenTree server")
+            client.auth = HTTPBasicAuth(client.username, client.password)
+            client.get('user/me/')
+        return client
+
+    def reauthenticate(self) -> bool:
+        """Request a new API token with username and password after the server rejected the
+        current one
+
+        Returns:
+            bool: True if a new token was obtained, otherwise False
+        """
+        self.log.warning('API token of server "%s" was rejected', self.credentials.id)
+        self.get_tokens().remove(self.credentials.id)
+        if not self.credentials.password or self.api.api is None:
+            return False
+
+        self.api.api.token = None
+        token = self.api.api.requestToken()
+        if not token:
+            self.log.error('Requesting a new API token from server "%s" failed', self.credentials.id)
+            return False
+        self.get_tokens().set(self.credentials.id, self.credentials.domain, token)
+        return True
+
+    def connect_async(self, credentials: Credentials) -> Future:
+        """Connects to an Inventree server in a background thread. API calls made before the
+        connection is established wait for it.
+
+        Args:
+            credentials (Credentials): Credentials for the inventree server, see `connect()`
+
+        Returns:
+            Future: Resolves to True if the connection was successfull, otherwise False
+        """
+        connection = Future()
+        self.connected = False
+        self.connectionError = None
+        self.connection = connection
+
+        def run():
+            try:
+                connection.set_result(self.connect(credentials))
+            except BaseException as ex:
+                connection.set_exception(ex)
+
+        threading.Thread(target=run, name='inventree-connect', daemon=True).start()
+        return connection
+
+    def get_connection_state(self) -> str:
+        """Get the state of the connection without waiting for it
+
+        Returns:
+            str: `offline`, `connecting`, `connected` or `not connected`
+        """
+        if self.api.offline:
+            return 'offline'
+        if self.connection is not None and not self.connection.done():
+            return 'connecting'
+        return 'connected' if self.connected else 'not connected'
+
+    def _require_connection(self):
+        """Wait for a pending connection attempt and make sure the API is connected
+
+        Raises:
+            ConnectionError: API is not connected
+        """
+        if self.api.offline:
+            return
+        if not self.is_connected():
+            self.log.critical('Not connected to Inventree API!')
+            if self.connectionError is not None:
+                raise ConnectionError(f"Could not connect to InvenTree server at {self.credentials.domain}: {self.connectionError}")
+            raise ConnectionError("Inventree API not connected")
+
     def get_part_detail(self, partIpn: str) -> Optional[dict]:
         """Retrieves details about a part from Inventree
 
@@ -99,9 +492,7 @@ class InvenTreeApi():
             dict: Dictionary containting information about the part as documented by api-doc
             None: Part does not exist
         """
-        if not self.is_connected():
-            self.log.critical(f'Not connected to Inventree API!')
-            raise ConnectionError("Inventree API not connected")
+        self._require_connection()
 
         partId = self.get_part_id(partIpn)
         if partId == -1:
@@ -109,13 +500,43 @@ class InvenTreeApi():
 
         query = f"part/{partId}/"
         result = self.api.get(query)
-        self.log.debug(f'Requesting API at { query }')
+        self.log.debug('Requesting API at %s', query)
+
+        if type(result) != type({}) or len(result) == 0:
+            return None
+
+        return result
+
+    def get_part(self, partId: int) -> Optional[dict]:
+        """Retrieves details about a part by its ID
+
+        Raises:
+            ConnectionError: API is not connected
+
+        Returns:
+            dict: Dictionary containting information about the part as documented by api-doc
+            None: Part ID is negative or the part does not exist
+        """
+        self._require_connection()
+
+        if partId <= 0:
+            return None
+
+        query = f"part/{partId}/"
+        result = self.api.get(query)
+        self.log.debug('Requesting API at %s', query)
 
         if type(result) != type({}) or len(result) == 0:
             return None
 
         return result
 
+    def clear_part_cache(self):
+        """Forget all cached parts and companies, e.g. before a build to pick up changes made on the server"""
+        with self.cacheLock:
+            self.partCache.clear()
+            self.companyCache.clear()
+
     def get_part_id(self, partIpn: str) -> int:
         """Gets the unique ID of an active part's IPN
 
@@ -129,16 +550,12 @@ class InvenTreeApi():
             int: Unique ID of the part or -1, if the part does not exist, is not marked as active or
             the IPN is not unique
         """
-        if not self.is_connected():
-            self.log.critical(f'Not connected to Inventree API!')
-            raise ConnectionError("Inventree API not connected")
+        self._require_connection()
 
-        query = f'part/?IPN={partIpn}&active=true'
-        result = self.api.get(query)
-        self.log.debug(f'Requesting API at { query }')
+        result = list(self.iterate_list(f'part/?IPN={quote(partIpn)}&active=true'))
 
         if len(result) != 1:
-            self.log.error(f"Received multiple variants of {partIpn}! Expected: 1, got: {len(result)}")
+            self.log.error("Received multiple variants of %s! Expected: 1, got: %s", partIpn, len(result))
             return -1
 
         return int(result[0]["pk"])
@@ -153,16 +570,14 @@ class InvenTreeApi():
             str: IPN of the given part ID
             None: Part ID is negative or no part IPN was found
         """
-        if not self.is_connected():
-            self.log.critical(f'Not connected to Inventree API!')
-            raise ConnectionError("Inventree API not connected")
+        self._require_connection()
 
         if partId <= 0:
             return None
 
         query = f"part/{partId}/"
         result = self.api.get(query)
-        self.log.debug(f'Requesting API at { query }')
+        self.log.debug('Requesting API at %s', query)
 
         if type(result) != type({}) or len(result) == 0:
             return None
@@ -179,16 +594,12 @@ class InvenTreeApi():
             list: Part parameters as a list of dicts
             None: Part ID is negative or query did not yield any results
         """
-        if not self.is_connected():
-            self.log.critical(f'Not connected to Inventree API!')
-            raise ConnectionError("Inventree API not connected")
+        self._require_connection()
 
         if partId <= 0:
             return None
 
-        query = f"part/parameter/?template=&limit=&part={partId}&offset=/"
-        result = self.api.get(query)
-        self.log.debug(f'Requesting API at { query }')
+        result = list(self.iterate_list(f"part/parameter/?part={partId}"))
 
         if len(result) == 0:
             return None
@@ -205,16 +616,12 @@ class InvenTreeApi():
             list: Part attachments as a list of dicts
             None: Part ID is negative or query did not yield any results
         """
-        if not self.is_connected():
-            self.log.critical(f'Not connected to Inventree API!')
-            raise ConnectionError("Inventree API not connected")
+        self._require_connection()
 
         if partId <= 0:
             return None
 
-        query = f"part/attachment/?part={partId}&offset=/"
-        result = self.api.get(query)
-        self.log.debug(f'Requesting API at { query }')
+        result = list(self.iterate_list(f"part/attachment/?part={partId}"))
 
         if len(result) == 0:
             return None
@@ -231,16 +638,12 @@ class InvenTreeApi():
             list: Part BOM items as a list of dicts
             None: Part ID is negative or query did not yield any results
         """
-        if not self.is_connected():
-            self.log.critical(f'Not connected to Inventree API!')
-            raise ConnectionError("Inventree API not connected")
+        self._require_connection()
 
         if partId <= 0:
             return None
 
-        query = f"bom/?part={partId}&offset=/"
-        result = self.api.get(query)
-        self.log.debug(f'Requesting API at { query }')
+        result = list(self.iterate_list(f"bom/?part={partId}"))
 
         if len(result) == 0:
             return None
@@ -257,16 +660,14 @@ class InvenTreeApi():
             dict: ManufacturerPart as dictionary
             None: ID is negative or query did not yield any results
         """
-        if not self.is_connected():
-            self.log.critical(f'Not connected to Inventree API!')
-            raise ConnectionError("Inventree API not connected")
+        self._require_connection()
 
         if id <= 0:
             return None
 
         query = f"company/part/manufacturer/{id}/"
         result = self.api.get(query)
-        self.log.debug(f'Requesting API at { query }')
+        self.log.debug('Requesting API at %s', query)
 
 
         if len(result) == 0 or type(result) != type({}):
@@ -288,16 +689,14 @@ class InvenTreeApi():
             dict: Company as dictionary
             None: ID is negative or query did not yield any results
         """
-        if not self.is_connected():
-            self.log.critical(f'Not connected to Inventree API!')
-            raise ConnectionError("Inventree API not connected")
+        self._require_connection()
 
         if id <= 0:
             return None
 
         query = f"company/{id}/"
         result = self.api.get(query)
-        self.log.debug(f'Requesting API at { query }')
+        self.log.debug('Requesting API at %s', query)
 
         if len(result) == 0 or type(result) != type({}):
             return None
@@ -318,16 +717,14 @@ class InvenTreeApi():
             dict: SupplierPart as dictionary
             None: ID is negative or query did not yield any results
         """
-        if not self.is_connected():
-            self.log.critical(f'Not connected to Inventree API!')
-            raise ConnectionError("Inventree API not connected")
+        self._require_connection()
 
         if id <= 0:
             return None
 
         query = f"company/part/{id}/"
         result = self.api.get(query)
-        self.log.debug(f'Requesting API at { query }')
+        self.log.debug('Requesting API at %s', query)
 
         if len(result) == 0 or type(result) != type({}):
             return None
@@ -348,15 +745,11 @@ class InvenTreeApi():
             list: A list of SupplierParts as dicts
             None: ID is negative or query did not yield any results
         """
-        if not self.is_connected():
-            self.log.critical(f'Not connected to Inventree API!')
-            raise ConnectionError("Inventree API not connected")
+        self._require_connection()
 
-        query = f"company/part/?search={partMpn}&offset=/"
-        result = self.api.get(query)
-        self.log.debug(f'Requesting API at { query }')
+        result = list(self.iterate_list(f"company/part/?search={quote(partMpn)}"))
 
-        if len(result) == 0 or type(result) != type([]):
+        if len(result) == 0:
             return None
 
         return result
@@ -371,47 +764,252 @@ class InvenTreeApi():
             list: A list of ManufacturerParts as dicts
             None: ID is negative or query did not yield any results
         """
-        if not self.is_connected():
-            self.log.critical(f'Not connected to Inventree API!')
-            raise ConnectionError("Inventree API not connected")
+        self._require_connection()
 
         if partId < 0:
             return None
 
-        query = f"company/part/manufacturer/?part={partId}&ordering=/"
-        self.log.debug(f'Requesting API at { query }')
+        from requests import HTTPError
+
         try:
-            result = self.api.get(query)
+            result = list(self.iterate_list(f"company/part/manufacturer/?part={partId}"))
         except HTTPError:
             return None
 
-        if len(result) == 0 or type(result) != type([]):
+        if len(result) == 0:
             return None
 
         return result
 
+    def iterate_list(self, query: str, pageSize: Optional[int] = None, prefetch: bool = False) -> Iterator[dict]:
+        """Iterates over all results of a list endpoint by requesting it page by page. Only one
+        page (two when prefetching) is held in memory at a time, each page is decoded on its own.
+
+        Args:
+            query (str): Query of the list endpoint including its filters, e.g. `company/?name=LCSC`
+            pageSize (int): Number of results to request per page, `pageSize` of the API if None
+            prefetch (bool): Request the next page in the background while the results of the
+            current page are processed, e.g. for complete listings of large endpoints. Prefetched
+            pages are requested with background priority.
+
+        Raises:
+            ConnectionError: API is not connected
+
+        Returns:
+            Iterator[dict]: Iterator over the results as dicts
+        """
+        self._require_connection()
+
+        separator = '&' if '?' in query else '?'
+        pageSize = pageSize if pageSize is not None else self.pageSize
+
+        def get_page(offset: int):
+            pagedQuery = f"{query}{separator}limit={pageSize}&offset={offset}"
+            self.log.debug('Requesting API at %s', pagedQuery)
+            return self.api.get(pagedQuery)
+
+        def prefetch_page(offset: int):
+            with request_priority(Priority.Background):
+                return get_page(offset)
+
+        offset = 0
+        result = get_page(offset)
+        while True:
+            # Endpoints without pagination support (and the mirror) return a plain list
+            if type(result) == type([]):
+                yield from result
+                return
+
+            results = result['results']
+            if result['next'] is None or len(results) == 0:
+                yield from results
+                return
+
+            offset += len(results)
+            nextPage = self._get_prefetcher().submit(prefetch_page, offset) if prefetch else None
+            try:
+                yield from results
+            except BaseException:
+                # Iteration was stopped early, the next page is not needed anymore
+                if nextPage is not None:
+                    nextPage.cancel()
+                raise
+            result = nextPage.result() if nextPage is not None else get_page(offset)
+
+    def _get_prefetcher(self) -> ThreadPoolExecutor:
+        """Get the executor requesting the next pages of listings in the background"""
+        with self.prefetcherLock:
+            if self.prefetcher is None:
+                self.prefetcher = ThreadPoolExecutor(max_workers=4, thread_name_prefix='inventree-prefetch')
+            return self.prefetcher
+
+    def get_company_ids(self, name: str) -> List[int]:
+        """Retrieves the IDs of all supplier companies with the given name
+
+        Args:
+            name (str): Exact name of the company, e.g. `LCSC`
+
+        Raises:
+            ConnectionError: API is not connected
+
+        Returns:
+            list: IDs of the companies, empty if none was found
+        """
+        return [company['pk'] for company in self.iterate_list(f"company/?is_supplier=true&name={quote(name)}")]
+
+    def get_supplier_parts_of_supplier(self, supplierId: int) -> Iterator[dict]:
+        """Retrieves all SupplierParts of the given supplier including details about their part and
+        manufacturer part
+
+        Args:
+            supplierId (int): ID of the supplier company
+
+        Raises:
+            ConnectionError: API is not connected
+
+        Returns:
+            Iterator[dict]: Iterator over the SupplierParts as dicts
+        """
+        return self.iterate_list(f"company/part/?supplier={supplierId}&part_detail=true&manufacturer_detail=true", prefetch=True)
+
+    def count_supplier_parts(self, supplierId: int) -> int:
+        """Counts the SupplierParts of the given supplier by requesting a single entry
+
+        Args:
+            supplierId (int): ID of the supplier company
+
+        Raises:
+            ConnectionError: API is not connected
+
+        Returns:
+            int: Number of SupplierParts of the supplier
+        """
+        self._require_connection()
+
+        result = self.api.get(f"company/part/?supplier={supplierId}&limit=1")
+        # Endpoints without pagination support (and the mirror) return a plain list
+        if type(result) == type([]):
+            return len(result)
+        return int(result['count'])
+
+    def get_supplier_parts_of_parts(self, supplierId: int, partIds: Iterable[int]) -> Iterator[dict]:
+        """Retrieves the SupplierParts of the given supplier for the given parts including details
+        about their part and manufacturer part. The endpoint filters a single part only, so one
+        request per part is sent, several of them concurrently.
+
+        Args:
+            supplierId (int): ID of the supplier company
+            partIds (Iterable[int]): IDs of the parts
+
+        Raises:
+            ConnectionError: API is not connected
+
+        Returns:
+            Iterator[dict]: Iterator over the SupplierParts as dicts
+        """
+        self._require_connection()
+
+        def get_supplier_parts(partId: int) -> list:
+            return list(self.iterate_list(f"company/part/?supplier={supplierId}&part={partId}&part_detail=true&manufacturer_detail=true"))
+
+        requests = [self._get_prefetcher().submit(get_supplier_parts, partId) for partId in partIds]
+        try:
+            for request in requests:
+                yield from request.result()
+        finally:
+            # Iteration was stopped early, the remaining parts are not needed anymore
+            for request in requests:
+                request.cancel()
+
+    def get_part_ids(self, partIpns: Iterable[str]) -> Dict[str, List[int]]:
+        """Gets the unique IDs of many active parts' IPNs at once. The IPNs are matched by a few
+        queries filtering the IPN with a regular expression of many IPNs each, instead of one
+        request per IPN. All active parts are listed instead in offline mode, as the mirror has no
+        regular expression filter, and if the server ignores the filter.
+
+        Args:
+            partIpns (Iterable[str]): IPNs of the parts
+
+        Raises:
+            ConnectionError: API is not connected
+
+        Returns:
+            Dict[str, List[int]]: IPN as key and the IDs of all active parts with this IPN as value.
+            The list is empty if the part does not exist and has more than one entry if the IPN is
+            not unique.
+        """
+        partIds: Dict[str, List[int]] = {ipn: [] for ipn in partIpns}
+        # An empty alternative would match every part without an IPN
+        ipns = [ipn for ipn in partIds.keys() if ipn]
+
+        if self.api.offline:
+            queries = [('part/?active=true', None)]
+        else:
+            queries = [(f'part/?active=true&IPN_regex={quote(pattern)}', re.compile(pattern, re.IGNORECASE))
+                       for pattern in self._get_ipn_patterns(ipns)]
+
+        for query, expression in queries:
+            unfiltered = False
+            for part in self.iterate_list(query, prefetch=True):
+                if part['IPN'] and part['IPN'] in partIds:
+                    partIds[part['IPN']].append(int(part['pk']))
+                elif expression is not None and (part['IPN'] is None or expression.search(part['IPN']) is None):
+                    unfiltered = True
+            if unfiltered:
+                # The server does not support the filter and listed all active parts
+                self.log.warning('Server ignored the IPN filter, listed all active parts instead')
+                break
+        return partIds
+
+    def _get_ipn_patterns(self, partIpns: List[str]) -> List[str]:
+        """Join the IPNs to regular expressions matching exactly these IPNs. Each expression is
+        kept below `maxFilterLength` when quoted, so the URLs stay short enough for any server."""
+        patterns = []
+        chunk: List[str] = []
+        length = 0
+        for ipn in partIpns:
+            escaped = re.escape(ipn)
+            # Plus the separator `|`, quoted as `%7C`
+            escapedLength = len(quote(escaped)) + 3
+            if len(chunk) > 0 and length + escapedLength > self.maxFilterLength:
+                patterns.append(f'^({"|".join(chunk)})$')
+                chunk, length = [], 0
+            chunk.append(escaped)
+            length += escapedLength
+        if len(chunk) > 0:
+            patterns.append(f'^({"|".join(chunk)})$')
+        return patterns
+
     def part_exists(self, partIpn: str) -> bool:
         """Checks if a part exists
 
         Args:
             partIpn (str): IPN of the part
 
+        Raises:
+            ConnectionError: API is not connected
+
         Returns:
-            bool: True if the part exists. False if not or if the API is not connected
+            bool: True if the part exists, otherwise False
         """
         partId = -1
         try:
             partId = self.get_part_id(partIpn)
-        except:
+        except ConnectionError:
+            raise
+        except Exception as ex:
+            self.log.error('Checking if part %s exists failed: %s', partIpn, ex)
             partId = -1
         return partId != -1
 
     def is_connected(self) -> bool:
-        """Check if the API was connected
+        """Check if the API was connected. Waits for a connection attempt still in progress.
 
         Returns:
             bool: True, if the connect() function was called and succeeded. Otherwise False
         """
+        if self.connection is not None:
+            self.connection.exception()
         return self.connected
 
     def delete_bom_item(self, bomItemId: int) -> bool:
@@ -423,12 +1021,12 @@ class InvenTreeApi():
         Returns:
             bool: True if successfull, otherwise False
         """
-        if not self.is_connected:
-            self.log.critical(f'Not connected to Inventree API!')
+        if not self.is_connected():
+            self.log.critical('Not connected to Inventree API!')
             return False
 
         # TODO: Guard this more
-        self.log.debug(f'Deleting BOM item at /bom/{bomItemId}/')
+        self.log.debug('Deleting BOM item at /bom/%s/', bomItemId)
         self.api.delete(f'bom/{bomItemId}/')
         return True
 
@@ -444,18 +1042,18 @@ class InvenTreeApi():
         Returns:
             bool: True if the item was added. Otherwise False
         """
-        if not self.is_connected:
-            self.log.critical(f'Not connected to Inventree API!')
+        if not self.is_connected():
+            self.log.critical('Not connected to Inventree API!')
             return False
 
         partId = self.get_part_id(partIpn)
         if partId == -1:
-            self.log.error(f'Part ID of {partIpn} could not be retrieved!')
+            self.log.error('Part ID of %s could not be retrieved!', partIpn)
             return False
 
         bomItemId = self.get_part_id(bomItemIpn)
         if partId == -1:
-            self.log.error(f'Part ID of {bomItemIpn} could not be retrieved!')
+            self.log.error('Part ID of %s could not be retrieved!', bomItemIpn)
             return False
 
         partData = {
@@ -464,9 +1062,10 @@ class InvenTreeApi():
             "sub_part": bomItemId,
             "reference": ", ".join(references)
         }
-        self.log.debug(f'Adding {quantity}x {bomItemIpn} to BOM of part {partIpn} ({partId})')
+        self.log.debug('Adding %sx %s to BOM of part %s (%s)', quantity, bomItemIpn, partIpn, partId)
         try:
             self.api.post("bom/", partData)
-        except:
+        except Exception as ex:
+            self.log.error('Adding %s to BOM of part %s failed: %s', bomItemIpn, partIpn, ex)
             return False
         return True
\ No newline at end of file
@@ -0,0 +1,305 @@
+"""Local SQLite mirror of the InvenTree catalog
+
+Author:
+    (C) Marvin Mager - @mvnmgrx - 2022
+
+License identifier:
+    GPL-3.0
+"""
+
+import json
+import re
+import sqlite3
+import threading
+import time
+
+from dataclasses import dataclass
+from os import makedirs, path
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple, Union
+from urllib.parse import parse_qsl, urlsplit
+
+from api.decode import loads
+from misc.logger import Logger
+
+if TYPE_CHECKING:
+    from api.inventree import InvenTreeApi
+
+MIRROR_FOLDER = path.join(path.expanduser('~'), '.kitree', 'mirror')
+"""Folder containing the mirror databases, one per InvenTree server"""
+
+@dataclass(frozen=True)
+class MirroredEndpoint():
+    """A list endpoint of the InvenTree API that is mirrored"""
+
+    endpoint: str
+    """Endpoint without the API prefix and slashes, e.g. `part/parameter`"""
+
+    query: str = ''
+    """Additional query parameters used when syncing, e.g. to include details of related objects"""
+
+    updatedField: Optional[str] = None
+    """Modification timestamp of the records used for incremental syncs. Endpoints without one are
+    synced completely every time."""
+
+MIRRORED_ENDPOINTS = [
+    MirroredEndpoint('part'),
+    MirroredEndpoint('part/category'),
+    MirroredEndpoint('part/parameter', updatedField='updated'),
+    MirroredEndpoint('part/attachment'),
+    MirroredEndpoint('bom'),
+    MirroredEndpoint('company'),
+    MirroredEndpoint('company/part/manufacturer'),
+    MirroredEndpoint('company/part', query='part_detail=true&manufacturer_detail=true&manufacturer_part_detail=true',
+                     updatedField='updated'),
+]
+"""The catalog subset KiTree uses"""
+
+IGNORED_PARAMETERS = {'limit', 'offset', 'ordering'}
+"""Query parameters that do not filter the results"""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    endpoint  TEXT    NOT NULL,
+    pk        INTEGER NOT NULL,
+    data      TEXT    NOT NULL,
+    synced_at REAL    NOT NULL,
+    PRIMARY KEY (endpoint, pk)
+);
+CREATE INDEX IF NOT EXISTS records_ipn ON records (endpoint, json_extract(data, '$.IPN'));
+CREATE INDEX IF NOT EXISTS records_part ON records (endpoint, json_extract(data, '$.part'));
+CREATE TABLE IF NOT EXISTS endpoints (
+    endpoint  TEXT PRIMARY KEY,
+    synced_at REAL NOT NULL,
+    cursor    TEXT
+);
+"""
+
+@dataclass
+class SyncResult():
+    """Outcome of syncing a single endpoint"""
+
+    endpoint: str
+    """The synced endpoint"""
+
+    received: int = 0
+    """Number of records received from the server"""
+
+    removed: int = 0
+    """Number of records removed because they no longer exist on the server"""
+
+    incremental: bool = False
+    """True if only records changed since the last sync were requested"""
+
+class CatalogMirror():
+    """Local copy of the InvenTree catalog in a SQLite database. The records are stored as the
+    JSON returned by the API, so the mirror answers the same GET queries as the server and all
+    components (`Part`, `Company`, ...) are filled the same way online and offline."""
+
+    log = Logger.Create(__name__)
+
+    def __init__(self, dbPath: str):
+        """Open or create the mirror database
+
+        Args:
+            - dbPath (str): Path of the SQLite database file
+        """
+        self.dbPath = dbPath
+        self.lock = threading.Lock()
+        makedirs(path.dirname(dbPath), exist_ok=True)
+        self.db = sqlite3.connect(dbPath, check_same_thread=False)
+        self.db.executescript(SCHEMA)
+
+    @staticmethod
+    def get_path(serverId: str) -> str:
+        """Get the path of the database file of the InvenTree server with the given credentials ID"""
+        fileName = re.sub(r'[^\w.-]', '_', serverId) or 'default'
+        return path.join(MIRROR_FOLDER, f'{fileName}.sqlite3')
+
+    @staticmethod
+    def for_server(serverId: str) -> 'CatalogMirror':
+        """Open the mirror of the InvenTree server with the given credentials ID"""
+        return CatalogMirror(CatalogMirror.get_path(serverId))
+
+    @staticmethod
+    def exists_for_server(serverId: str) -> bool:
+        """Check if a mirror of the InvenTree server with the given credentials ID was created,
+        without creating it"""
+        return path.isfile(CatalogMirror.get_path(serverId))
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+    def get(self, url: str) -> Union[dict, list]:
+        """Answer a GET query of the InvenTree API from the mirror
+
+        Args:
+            - url (str): Query as passed to the API, e.g. `part/?IPN=R-0001&active=true` or `part/12/`
+
+        Returns:
+            - dict: The record for detail queries, empty if it is not mirrored
+            - list: The matching records for list queries. Pagination parameters are ignored and
+              all results are returned at once.
+        """
+        return loads(self.get_content(url))
+
+    def get_content(self, url: str) -> bytes:
+        """Answer a GET query of the InvenTree API from the mirror with the JSON document the
+        server would respond with, see `get()`. The stored records are joined by the database,
+        so list queries are decoded with a single call instead of one per record."""
+        parts = urlsplit(url)
+        segments = [segment for segment in parts.path.split('/') if segment]
+
+        # Detail query, e.g. `company/part/12/`
+        if len(segments) > 0 and segments[-1].isdigit():
+            with self.lock:
+                row = self.db.execute('SELECT data FROM records WHERE endpoint = ? AND pk = ?',
+                                      ('/'.join(segments[:-1]), int(segments[-1]))).fetchone()
+            return row[0].encode() if row is not None else b'{}'
+
+        sql = 'SELECT data FROM records WHERE endpoint = ?'
+        arguments: List = ['/'.join(segments)]
+        for key, value in parse_qsl(parts.query, keep_blank_values=True):
+            value = value.strip('/')
+            if key in IGNORED_PARAMETERS or key.endswith('_detail') or value == '':
+                continue
+            if key == 'search':
+                sql += ' AND data LIKE ?'
+                arguments.append(f'%{value}%')
+                continue
+            if not re.fullmatch(r'\w+', key):
+                raise ValueError(f'Unsupported filter "{key}" in mirror query {url}')
+            sql += f" AND json_extract(data, '$.{key}') = ?"
+            arguments.append(self._convert(value))
+        sql += ' ORDER BY pk'
+
+        with self.lock:
+            row = self.db.execute(f"SELECT '[' || COALESCE(group_concat(data, ','), '') || ']' FROM ({sql})",
+                                  arguments).fetchone()
+        return row[0].encode()
+
+    @staticmethod
+    def _convert(value: str) -> Union[str, int]:
+        """Convert a query parameter to the value stored in the JSON data"""
+        if value.lower() in ['true', 'false']:
+            return 1 if value.lower() == 'true' else 0
+        if value.isdigit():
+            return int(value)
+        return value
+
+    def sync(self, api: 'InvenTreeApi', full: bool = False,
+             onProgress: Optional[Callable[[SyncResult], None]] = None) -> List[SyncResult]:
+        """Update the mirror from the server. Endpoints with a modification timestamp only request
+        the records changed since the last sync, all others are paged through completely.
+
+        Args:
+            - api (InvenTreeApi): Connected API to sync from
+            - full (bool): Request all records of every endpoint, removing deleted records
+            - onProgress (Callable): Called with the result of every synced endpoint
+
+        Raises:
+            - ConnectionError: API is not connected
+
+        Returns:
+            - List[SyncResult]: Result of each endpoint
+        """
+        results = []
+        for endpoint in MIRRORED_ENDPOINTS:
+            result = self._sync_endpoint(api, endpoint, full)
+            results.append(result)
+            if onProgress is not None:
+                onProgress(result)
+        return results
+
+    def _sync_endpoint(self, api: 'InvenTreeApi', endpoint: MirroredEndpoint, full: bool) -> SyncResult:
+        with self.lock:
+            row = self.db.execute('SELECT cursor FROM endpoints WHERE endpoint = ?', (endpoint.endpoint,)).fetchone()
+        cursor = row[0] if row is not None else None
+        incremental = not full and endpoint.updatedField is not None and cursor is not None
+        result = SyncResult(endpoint=endpoint.endpoint, incremental=incremental)
+
+        query = f'{endpoint.endpoint}/'
+        filters = [endpoint.query] if endpoint.query else []
+        if incremental:
+            filters.append(f'ordering=-{endpoint.updatedField}')
+        if len(filters) > 0:
+            query += '?' + '&'.join(filters)
+
+        syncStart = time.time()
+        newest = cursor
+        previous = None
+        ordered = True
+        batch: List[Tuple[str, int, str, float]] = []
+        for record in api.iterate_list(query, prefetch=True):
+            updated = record.get(endpoint.updatedField) if endpoint.updatedField is not None else None
+            if updated is not None:
+                newest = updated if newest is None or updated > newest else newest
+
+            if incremental:
+                # Stop at the first record older than the last sync, as long as the server
+                # really returns the records ordered by their modification time
+                if updated is None or (previous is not None and updated > previous):
+                    ordered = False
+                previous = updated
+                if ordered and updated < cursor:
+                    break
+
+            batch.append((endpoint.endpoint, int(record['pk']), json.dumps(record), syncStart))
+            result.received += 1
+            if len(batch) >= 1000:
+                self._store(batch)
+
+        with self.lock, self.db:
+            self.db.executemany('INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?)', batch)
+            if not incremental:
+                # Records not received in a complete sync were deleted on the server
+                result.removed = self.db.execute('DELETE FROM records WHERE endpoint = ? AND synced_at < ?',
+                                                 (endpoint.endpoint, syncStart)).rowcount
+            self.db.execute('INSERT OR REPLACE INTO endpoints VALUES (?, ?, ?)', (endpoint.endpoint, syncStart, newest))
+
+        self.log.info('Synced %s: %s records received, %s removed (%s)', endpoint.endpoint, result.received,
+                      result.removed, 'incremental' if incremental else 'full')
+        return result
+
+    def _store(self, batch: List[Tuple[str, int, str, float]]):
+        """Write a batch of received records and clear the batch"""
+        with self.lock, self.db:
+            self.db.executemany('INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?)', batch)
+        batch.clear()
+
+    def get_records(self, endpoint: str, since: Optional[float] = None) -> List[Tuple[int, dict, float]]:
+        """Get the records of an endpoint, e.g. to build an index from them
+
+        Args:
+            - endpoint (str): The endpoint, e.g. `part`
+            - since (float): Only return records synced after this time or None for all records
+
+        Returns:
+            - list: Tuples of the record's primary key, its data and the time it was synced
+        """
+        with self.lock:
+            rows = self.db.execute('SELECT pk, data, synced_at FROM records WHERE endpoint = ? AND synced_at > ?',
+                                   (endpoint, since if since is not None else -1.0)).fetchall()
+        return [(pk, loads(data), syncedAt) for pk, data, syncedAt in rows]
+
+    def get_primary_keys(self, endpoint: str) -> set:
+        """Get the primary keys of all records of an endpoint"""
+        with self.lock:
+            return {row[0] for row in self.db.execute('SELECT pk FROM records WHERE endpoint = ?', (endpoint,))}
+
+    def get_status(self) -> Dict[str, Tuple[int, Optional[float]]]:
+        """Get the state of the mirror
+
+        Returns:
+            - dict: Endpoint as key and the number of records and the time of the last sync (or None
+              if it was never synced) as value
+        """
+        with self.lock:
+            counts = dict(self.db.execute('SELECT endpoint, COUNT(*) FROM records GROUP BY endpoint').fetchall())
+            syncTimes = dict(self.db.execute('SELECT endpoint, synced_at FROM endpoints').fetchall())
+        return {endpoint.endpoint: (counts.get(endpoint.endpoint, 0), syncTimes.get(endpoint.endpoint))
+                for endpoint in MIRRORED_ENDPOINTS}
+
+    def is_synced(self) -> bool:
+        """Check if every endpoint was synced at least once"""
+        return all(syncTime is not None for _, syncTime in self.get_status().values())
@@ -0,0 +1,363 @@
+"""Adaptive concurrency and rate control of the requests sent to the InvenTree server
+
+Author:
+    (C) Marvin Mager - @mvnmgrx - 2022
+
+License identifier:
+    GPL-3.0
+"""
+
+import random
+import threading
+import time
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Callable, Iterator, List, Optional, TypeVar
+
+from misc.logger import Logger
+
+T = TypeVar('T')
+
+OVERLOAD_STATUS = {429, 503}
+"""Status codes of a server (or reverse proxy) asking the client to slow down"""
+
+TRANSIENT_STATUS = {500, 502, 504}
+"""Status codes of errors that may disappear when the request is repeated"""
+
+class Priority():
+    """Priority classes of requests. Waiting requests of a lower class are sent first."""
+    Interactive = 0
+    """Lookups a user waits for at the prompt, e.g. `part add` or `project set master`"""
+
+    Normal = 1
+    """Everything else, e.g. the requests of a build"""
+
+    Background = 2
+    """Bulk traffic nobody waits for directly: prefetching, syncing and file downloads"""
+
+REQUEST_PRIORITY: ContextVar[int] = ContextVar('REQUEST_PRIORITY', default=Priority.Normal)
+"""Priority of the requests sent by the current thread or task"""
+
+@contextmanager
+def request_priority(priority: int) -> Iterator[None]:
+    """Send all requests within the context with the given priority
+
+    Example:
+        with request_priority(Priority.Background):
+            api.sync()
+    """
+    token = REQUEST_PRIORITY.set(priority)
+    try:
+        yield
+    finally:
+        REQUEST_PRIORITY.reset(token)
+
+class CircuitOpenError(ConnectionError):
+    """Raised instead of sending a request while the server is considered down"""
+
+def get_status_code(ex: Exception) -> Optional[int]:
+    """Get the HTTP status code of an exception raised by the InvenTree client or the proxy"""
+    detail = ex.args[0] if len(ex.args) > 0 else None
+    if isinstance(detail, dict) and isinstance(detail.get('status_code'), int):
+        return detail['status_code']
+    response = getattr(ex, 'response', None)
+    return getattr(response, 'status_code', None)
+
+def get_retry_after(ex: Exception) -> Optional[float]:
+    """Get the delay in seconds requested by the `Retry-After` header of an error response"""
+    detail = ex.args[0] if len(ex.args) > 0 else None
+    value = detail.get('retry_after') if isinstance(detail, dict) else None
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+def is_transport_error(ex: Exception) -> bool:
+    """Check if a request failed without a response, e.g. connection refused or timed out"""
+    from requests.exceptions import ConnectionError as RequestsConnectionError, Timeout
+    return isinstance(ex, (RequestsConnectionError, Timeout, ConnectionError, TimeoutError)) and get_status_code(ex) is None
+
+def is_timeout(ex: Exception) -> bool:
+    from requests.exceptions import Timeout
+    return isinstance(ex, (Timeout, TimeoutError))
+
+@dataclass
+class RequestScheduler():
+    """Limits the number of requests in flight to what the server handles well. The limit grows
+    by one per window of successful requests and is halved when the server is overloaded
+    (429/503, timeouts) or its latency rises well above the best latency seen (AIMD). Idempotent
+    requests are retried with jittered exponential backoff, honouring `Retry-After`. After
+    repeated failures the circuit opens: requests fail immediately until a single trial request
+    succeeds after the cooldown.
+
+    Requests are sent by priority (see `Priority`): Interactive requests get one slot above the
+    limit, background requests are capped in concurrency and bandwidth while requests of a higher
+    priority are waiting or in flight, so the prompt stays responsive while a sync or prefetch
+    runs. Without such requests, background requests use the full limit."""
+
+    minConcurrency: int = 1
+    """Lowest limit of requests in flight"""
+
+    maxConcurrency: int = 16
+    """Highest limit of requests in flight"""
+
+    limit: float = 4.0
+    """Current limit of requests in flight, adapted to the server's responses"""
+
+    latencyTolerance: float = 3.0
+    """Latency relative to the best latency seen above which the server counts as congested"""
+
+    latencyFloor: float = 0.5
+    """Latency in seconds below which the server never counts as congested"""
+
+    maxRetries: int = 4
+    """Number of times an idempotent request is repeated after a transient error"""
+
+    backoffBase: float = 0.5
+    """Upper bound of the first backoff delay in seconds, doubled for each further retry"""
+
+    backoffCap: float = 30.0
+    """Upper bound of any backoff delay in seconds"""
+
+    failureThreshold: int = 5
+    """Number of consecutive failed requests that opens the circuit"""
+
+    cooldown: float = 30.0
+    """Time in seconds the circuit stays open before a trial request is sent"""
+
+    backgroundConcurrency: int = 2
+    """Highest number of background requests in flight while other requests are pending, always
+    leaving a slot for them"""
+
+    backgroundBandwidth: Optional[float] = 4e6
+    """Highest average rate in bytes per second of background responses while other requests are
+    pending or None for no limit"""
+
+    inFlight: int = 0
+    """Number of requests currently sent"""
+
+    inFlightByPriority: List[int] = field(default_factory=lambda: [0, 0, 0])
+    """Number of requests currently sent per priority"""
+
+    waiting: List[int] = field(default_factory=lambda: [0, 0, 0])
+    """Number of requests waiting for a slot per priority"""
+
+    backgroundAvailableAt: float = 0.0
+    """No background request is sent before this time, set by the bandwidth limit"""
+
+    failures: int = 0
+    """Number of consecutive failed requests"""
+
+    openedAt: Optional[float] = None
+    """Time the circuit was opened or None while it is closed"""
+
+    pausedUntil: float = 0.0
+    """No request is sent before this time, set by `Retry-After`"""
+
+    retries: int = 0
+    """Number of repeated requests"""
+
+    bestLatency: Optional[float] = None
+    """Lowest latency of a successful request in seconds, slowly forgotten"""
+
+    lastDecrease: float = 0.0
+    condition: threading.Condition = field(default_factory=threading.Condition)
+
+    log = Logger.Create(__name__)
+
+    def run(self, function: Callable[[], T], idempotent: bool = False, name: str = '',
+            measureLatency: bool = True) -> T:
+        """Send a request once a slot is free
+
+        Args:
+            - function (Callable): Sends the request and returns its result
+            - idempotent (bool): The request may be repeated after a transient error, e.g. GET
+            - name (str): Description of the request for the log, e.g. its URL
+            - measureLatency (bool): Adapt the limit to the latency of the request. False for
+              requests whose duration depends on their size, e.g. file downloads
+
+        Raises:
+            - CircuitOpenError: The server failed repeatedly and the cooldown has not passed yet
+            - Exception: The error of the last attempt
+        """
+        priority = REQUEST_PRIORITY.get()
+        attempt = 0
+        while True:
+            self._acquire(priority)
+            start = time.monotonic()
+            try:
+                # The slot is freed before retrying and also on KeyboardInterrupt or SystemExit
+                try:
+                    result = function()
+                finally:
+                    self._release(priority)
+            except Exception as ex:
+                delay = self._on_error(ex, time.monotonic() - start, attempt)
+                if delay is None or not idempotent or attempt >= self.maxRetries:
+                    raise
+                attempt += 1
+                with self.condition:
+                    self.retries += 1
+                status = get_status_code(ex)
+                self.log.warning('Request %s failed (%s), retrying in %.1f s (%s/%s)', name,
+                                 f'HTTP {status}' if status is not None else ex, delay, attempt, self.maxRetries)
+                time.sleep(delay)
+                continue
+            self._on_success(time.monotonic() - start if measureLatency else None)
+            return result
+
+    def _acquire(self, priority: int):
+        with self.condition:
+            self.waiting[priority] += 1
+            try:
+                while True:
+                    timeout = self._get_wait_time(priority)
+                    if timeout == 0.0:
+                        break
+                    self.condition.wait(timeout)
+            finally:
+                self.waiting[priority] -= 1
+                # Requests of lower priority may have waited for this one
+                self.condition.notify_all()
+            self.inFlight += 1
+            self.inFlightByPriority[priority] += 1
+
+    def _get_wait_time(self, priority: int) -> Optional[float]:
+        """Get the time a request has to wait before it may be sent, 0.0 if it can be sent now and
+        None if it has to wait for another request to finish. Call with the condition held.
+
+        Raises:
+            - CircuitOpenError: The circuit is open
+        """
+        now = time.monotonic()
+        if self.openedAt is not None:
+            if now - self.openedAt < self.cooldown:
+                raise CircuitOpenError(f'InvenTree server failed {self.failures} times in a row, '
+                                       f'not sending requests for {self.cooldown - (now - self.openedAt):.0f} s')
+            # Half open: only a single trial request until it succeeds
+            return 0.0 if self.inFlight == 0 else 1.0
+        if now < self.pausedUntil:
+            return self.pausedUntil - now
+        if any(self.waiting[higher] > 0 for higher in range(priority)):
+            return None
+
+        limit = int(self.limit)
+        if priority == Priority.Interactive:
+            limit += 1
+        if self.inFlight >= limit:
+            return None
+
+        if priority == Priority.Background and self._is_contended():
+            if self.inFlightByPriority[Priority.Background] >= min(self.backgroundConcurrency, max(limit - 1, 1)):
+                return None
+            if now < self.backgroundAvailableAt:
+                return self.backgroundAvailableAt - now
+        return 0.0
+
+    def _is_contended(self) -> bool:
+        """Check if requests of a higher priority than background are waiting or in flight. Call
+        with the condition held."""
+        return any(self.waiting[priority] > 0 or self.inFlightByPriority[priority] > 0
+                   for priority in range(Priority.Background))
+
+    def _release(self, priority: int):
+        with self.condition:
+            self.inFlight -= 1
+            self.inFlightByPriority[priority] -= 1
+            self.condition.notify_all()
+
+    def transferred(self, byteCount: int):
+        """Account the size of a response to the bandwidth limit of its priority. Background
+        responses only count while other requests are pending, so no delay builds up while the
+        background requests have the server to themselves."""
+        if REQUEST_PRIORITY.get() != Priority.Background or not self.backgroundBandwidth:
+            return
+        with self.condition:
+            if not self._is_contended():
+                return
+            now = time.monotonic()
+            self.backgroundAvailableAt = max(self.backgroundAvailableAt, now) + byteCount / self.backgroundBandwidth
+
+    def _on_success(self, latency: Optional[float]):
+        with self.condition:
+            self.failures = 0
+            if self.openedAt is not None:
+                self.log.info('InvenTree server is responding again, closing circuit')
+                self.openedAt = None
+
+            if latency is not None:
+                # Forget the best latency slowly, the server's load changes over time
+                self.bestLatency = latency if self.bestLatency is None else min(latency, self.bestLatency * 1.01)
+            if latency is not None and latency > max(self.bestLatency * self.latencyTolerance, self.latencyFloor):
+                self._decrease(latency, 'latency rose to %.0f ms' % (latency * 1000))
+            else:
+                # Additive increase: one more slot per window of `limit` successful requests
+                self.limit = min(self.limit + 1.0 / self.limit, float(self.maxConcurrency))
+            self.condition.notify_all()
+
+    def _on_error(self, ex: Exception, latency: float, attempt: int) -> Optional[float]:
+        """Adapt to a failed request
+
+        Args:
+            - ex (Exception): Error of the request
+            - latency (float): Time in seconds until the request failed
+            - attempt (int): Number of times the request was already repeated, the exponent of
+              the backoff delay
+
+        Returns:
+            - float: Delay before the request may be repeated
+            - None: The error is permanent, e.g. 404
+        """
+        status = get_status_code(ex)
+        if status is None and not is_transport_error(ex):
+            # Not a problem of the server, e.g. an invalid response or a local error
+            return None
+
+        with self.condition:
+            if status is not None and status not in OVERLOAD_STATUS and status not in TRANSIENT_STATUS:
+                # The server answered, the request itself is wrong
+                self.failures = 0
+                if self.openedAt is not None:
+                    self.log.info('InvenTree server is responding again, closing circuit')
+                    self.openedAt = None
+                    self.condition.notify_all()
+                return None
+
+            if status in OVERLOAD_STATUS or is_timeout(ex):
+                self._decrease(latency, f'server overloaded ({status or "timeout"})')
+
+            self.failures += 1
+            if self.openedAt is not None:
+                # Trial request failed, wait another cooldown
+                self.openedAt = time.monotonic()
+            elif self.failures >= self.failureThreshold:
+                self.log.error('InvenTree server failed %s times in a row, opening circuit for %.0f s', self.failures, self.cooldown)
+                self.openedAt = time.monotonic()
+
+            # Full jitter, so clients that failed together do not retry together
+            delay = random.uniform(0, min(self.backoffCap, self.backoffBase * 2 ** min(attempt, 16)))
+            retryAfter = get_retry_after(ex)
+            if retryAfter is not None:
+                delay = min(retryAfter, self.backoffCap) + random.uniform(0, self.backoffBase)
+                self.pausedUntil = max(self.pausedUntil, time.monotonic() + delay)
+            self.condition.notify_all()
+            return delay
+
+    def _decrease(self, latency: float, reason: str):
+        """Multiplicative decrease, at most once per round trip so one burst halves the limit once"""
+        now = time.monotonic()
+        if now - self.lastDecrease < max(latency, 0.1):
+            return
+        self.lastDecrease = now
+        previous = self.limit
+        self.limit = max(self.limit / 2, float(self.minConcurrency))
+        self.log.info('Reducing concurrent InvenTree requests from %s to %s: %s', int(previous), int(self.limit), reason)
@@ -0,0 +1,307 @@
+"""Local full text search over the parts of the InvenTree catalog
+
+Author:
+    (C) Marvin Mager - @mvnmgrx - 2022
+
+License identifier:
+    GPL-3.0
+"""
+
+import bisect
+import re
+import threading
+import time
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Set, Tuple
+
+from misc.logger import Logger
+
+if TYPE_CHECKING:
+    from api.inventree import InvenTreeApi
+
+TOKEN = re.compile(r'[\w.+/-]+')
+"""Characters forming the searchable tokens, e.g. `R-0603-10K` or `100nF/50V`"""
+
+SEARCHED_FIELDS = ['IPN', 'name', 'description', 'keywords']
+"""Fields of a part that are searched, together with the MPNs and SKUs of the part"""
+
+def get_trigrams(token: str) -> Set[str]:
+    """Get the trigrams of a token. Tokens shorter than three characters have none."""
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+@dataclass
+class SearchResult():
+    """A part matching a search query"""
+
+    partId: int
+    """ID of the part"""
+
+    ipn: str
+    """IPN of the part"""
+
+    name: str
+    """Name of the part"""
+
+    description: str
+    """Description of the part"""
+
+    score: int
+    """Relevance of the result, higher is better"""
+
+@dataclass
+class IndexedPart():
+    """Searchable fields of a single part"""
+
+    fields: Dict[str, str] = field(default_factory=dict)
+    """Searched fields of the part itself, see `SEARCHED_FIELDS`"""
+
+    numbers: Dict[Tuple[str, int], List[str]] = field(default_factory=dict)
+    """MPNs and SKUs of the part by endpoint and ID of the manufacturer or supplier part"""
+
+    def get_text(self) -> str:
+        numbers = ' '.join(number for values in self.numbers.values() for number in values)
+        return f'{" ".join(self.fields.values())} {numbers}'.lower()
+
+class PartSearchIndex():
+    """Trigram index over IPN, name, description, keywords, MPN and SKU of all active parts.
+    The index is built from the local mirror if it was synced, otherwise from one paginated
+    listing of the parts and one of the supplier parts. Searches never use the server's
+    `search=` filter."""
+
+    log = Logger.Create(__name__)
+
+    refreshInterval: float = 300.0
+    """Minimum time in seconds between two rebuilds from the server, if no mirror is available"""
+
+    def __init__(self):
+        self.parts: Dict[int, IndexedPart] = {}
+        self.texts: Dict[int, str] = {}
+        self.trigrams: Dict[str, Set[int]] = {}
+        self.ipns: List[Tuple[str, int]] = []
+        """(IPN, part ID) sorted by IPN for prefix lookups"""
+        self.lock = threading.RLock()
+        self.refreshLock = threading.Lock()
+        """Makes threads refreshing at the same time wait for a single refresh"""
+        self.builtAt: Optional[float] = None
+        self.mirrorSyncedAt: Optional[float] = None
+        self.numberParts: Dict[Tuple[str, int], int] = {}
+        """Part ID of each indexed manufacturer or supplier part by endpoint and ID"""
+
+    def _remove(self, partId: int):
+        for trigram in get_trigrams(self.texts.pop(partId, '')):
+            postings = self.trigrams.get(trigram)
+            if postings is not None:
+                postings.discard(partId)
+
+    def _reindex(self, partId: int):
+        """Update the postings of a part after its fields changed"""
+        self._remove(partId)
+        part = self.parts.get(partId)
+        if part is None or len(part.fields) == 0:
+            return
+        text = part.get_text()
+        self.texts[partId] = text
+        for trigram in get_trigrams(text):
+            self.trigrams.setdefault(trigram, set()).add(partId)
+
+    def _rebuild_ipns(self):
+        self.ipns = sorted((part.fields.get('IPN', ''), partId) for partId, part in self.parts.items()
+                           if part.fields.get('IPN'))
+
+    def _add_part(self, record: dict):
+        partId = int(record['pk'])
+        if not record.get('active', True):
+            self.parts.pop(partId, None)
+            self._remove(partId)
+            return
+        part = self.parts.setdefault(partId, IndexedPart())
+        part.fields = {name: str(record.get(name) or '') for name in SEARCHED_FIELDS}
+        self._reindex(partId)
+
+    def _add_numbers(self, endpoint: str, record: dict) -> List[int]:
+        """Index the MPN and SKU of a manufacturer or supplier part, returns the IDs of the parts
+        whose numbers changed: its part and the part it belonged to before"""
+        key = (endpoint, int(record['pk']))
+        changed = [partId for partId in [self._remove_numbers(key)] if partId is not None]
+        partId = record.get('part')
+        if partId is None:
+            return changed
+        manufacturerPart = record.get('manufacturer_part_detail') or {}
+        numbers = [str(number) for number in [record.get('MPN') or manufacturerPart.get('MPN'), record.get('SKU')] if number]
+        part = self.parts.setdefault(int(partId), IndexedPart())
+        part.numbers[key] = numbers
+        self.numberParts[key] = int(partId)
+        return changed + [int(partId)]
+
+    def _remove_numbers(self, key: Tuple[str, int]) -> Optional[int]:
+        """Remove the MPN and SKU of a manufacturer or supplier part, returns the ID of its part"""
+        partId = self.numberParts.pop(key, None)
+        part = self.parts.get(partId) if partId is not None else None
+        if part is not None:
+            part.numbers.pop(key, None)
+        return partId
+
+    def build(self, parts: Iterable[dict], numberRecords: Iterable[Tuple[str, dict]]):
+        """Build the index from scratch
+
+        Args:
+            - parts (Iterable[dict]): Part records as returned by the API
+            - numberRecords (Iterable): Tuples of endpoint and record of the manufacturer and
+              supplier parts
+        """
+        with self.lock:
+            self.parts.clear()
+            self.texts.clear()
+            self.trigrams.clear()
+            self.numberParts.clear()
+            for record in parts:
+                self._add_part(record)
+            for endpoint, record in numberRecords:
+                self._add_numbers(endpoint, record)
+            for partId in list(self.parts.keys()):
+                if len(self.parts[partId].fields) == 0:
+                    # Supplier part of an inactive or unknown part
+                    del self.parts[partId]
+                else:
+                    self._reindex(partId)
+            self._rebuild_ipns()
+            self.builtAt = time.monotonic()
+        self.log.info('Built search index of %s parts', len(self.parts))
+
+    def refresh(self, api: 'InvenTreeApi'):
+        """Bring the index up to date. With a synced mirror, only records synced since the last
+        refresh are indexed again. Otherwise the index is rebuilt from the server once it is older
+        than `refreshInterval`.
+
+        Args:
+            - api (InvenTreeApi): API to read the catalog from
+
+        Raises:
+            - ConnectionError: No mirror is available and the API is not connected
+        """
+        with self.refreshLock:
+            self._refresh(api)
+
+    def _refresh(self, api: 'InvenTreeApi'):
+        if api.has_mirror() and api.get_mirror().is_synced():
+            self._refresh_from_mirror(api)
+            return
+
+        if self.builtAt is not None and time.monotonic() - self.builtAt < self.refreshInterval:
+            return
+        self.build(api.iterate_list('part/?active=true', prefetch=True),
+                   (('company/part', record) for record in api.iterate_list('company/part/?manufacturer_part_detail=true', prefetch=True)))
+
+    def _refresh_from_mirror(self, api: 'InvenTreeApi'):
+        mirror = api.get_mirror()
+        with self.lock:
+            since = self.mirrorSyncedAt
+            if since is None:
+                self.build((record for _, record, _ in mirror.get_records('part')),
+                           ((endpoint, record) for endpoint in ['company/part/manufacturer', 'company/part']
+                            for _, record, _ in mirror.get_records(endpoint)))
+                self.mirrorSyncedAt = max((syncTime for _, syncTime in mirror.get_status().values() if syncTime is not None), default=None)
+                return
+
+            changed: Set[int] = set()
+            newest = since
+            for _, record, syncedAt in mirror.get_records('part', since):
+                self._add_part(record)
+                newest = max(newest, syncedAt)
+            for endpoint in ['company/part/manufacturer', 'company/part']:
+                for _, record, syncedAt in mirror.get_records(endpoint, since):
+                    changed.update(self._add_numbers(endpoint, record))
+                    newest = max(newest, syncedAt)
+                # Manufacturer and supplier parts removed from the mirror by a full sync
+                existing = mirror.get_primary_keys(endpoint)
+                for key in [key for key in self.numberParts if key[0] == endpoint and key[1] not in existing]:
+                    changed.add(self._remove_numbers(key))
+
+            # Parts removed from the mirror by a full sync
+            for partId in set(self.parts.keys()) - mirror.get_primary_keys('part'):
+                self.parts.pop(partId)
+                self._remove(partId)
+
+            for partId in changed:
+                if partId in self.parts and len(self.parts[partId].fields) > 0:
+                    self._reindex(partId)
+            self._rebuild_ipns()
+            self.mirrorSyncedAt = newest
+
+    def search(self, query: str, limit: int = 20) -> List[SearchResult]:
+        """Search parts matching all words of the query
+
+        Args:
+            - query (str): Words to search for, e.g. `10k 0603`
+            - limit (int): Maximum number of results
+
+        Returns:
+            - List[SearchResult]: Matching parts, most relevant first
+        """
+        tokens = [token.lower() for token in TOKEN.findall(query)]
+        if len(tokens) == 0:
+            return []
+
+        with self.lock:
+            candidates: Optional[Set[int]] = None
+            for token in tokens:
+                trigrams = get_trigrams(token)
+                if len(trigrams) == 0:
+                    continue
+                # Parts containing every trigram of every word
+                postings = sorted((self.trigrams.get(trigram, set()) for trigram in trigrams), key=len)
+                matches = set(postings[0]).intersection(*postings[1:])
+                candidates = matches if candidates is None else candidates & matches
+                if len(candidates) == 0:
+                    return []
+            if candidates is None:
+                candidates = set(self.texts.keys())
+
+            results = []
+            for partId in candidates:
+                text = self.texts[partId]
+                # Trigrams may match in different places, the words have to match as a whole
+                if not all(token in text for token in tokens):
+                    continue
+                fields = self.parts[partId].fields
+                results.append(SearchResult(
+                    partId      = partId,
+                    ipn         = fields.get('IPN', ''),
+                    name        = fields.get('name', ''),
+                    description = fields.get('description', ''),
+                    score       = self._score(fields, tokens)
+                ))
+
+        results.sort(key=lambda result: (-result.score, result.ipn))
+        return results[:limit]
+
+    @staticmethod
+    def _score(fields: Dict[str, str], tokens: List[str]) -> int:
+        ipn = fields.get('IPN', '').lower()
+        name = fields.get('name', '').lower()
+        score = 0
+        for token in tokens:
+            if ipn == token:
+                score += 100
+            elif ipn.startswith(token):
+                score += 50
+            elif token in ipn:
+                score += 20
+            if token in name:
+                score += 10
+        return score
+
+    def complete_ipn(self, prefix: str, limit: int = 100) -> List[str]:
+        """Get the IPNs starting with the given prefix, e.g. for tab completion"""
+        with self.lock:
+            start = bisect.bisect_left(self.ipns, (prefix, -1))
+            matches = []
+            for ipn, _ in self.ipns[start:start + limit]:
+                if not ipn.startswith(prefix):
+                    break
+                matches.append(ipn)
+        return matches
+
+    def is_built(self) -> bool:
+        return self.builtAt is not None
@@ -0,0 +1,83 @@
+"""Persistent store of InvenTree API tokens
+
+Author:
+    (C) Marvin Mager - @mvnmgrx - 2022
+
+License identifier:
+    GPL-3.0
+"""
+
+import json
+import threading
+
+from dataclasses import dataclass, field
+from os import chmod, makedirs, path
+from typing import Dict, Optional
+
+from misc.files import write_atomic
+from misc.logger import Logger
+
+DEFAULT_TOKEN_PATH = path.join(path.expanduser('~'), '.kitree', 'tokens.json')
+"""Default path of the token file"""
+
+@dataclass
+class TokenStore():
+    """API tokens of the configured InvenTree servers, keyed by the ID of their credentials. The
+    token file is only readable by its owner. A token is only used for the domain it was issued
+    by, so changing a server's domain in the config invalidates its token."""
+
+    path: str = DEFAULT_TOKEN_PATH
+    """Path to the token file"""
+
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    """Lock serializing the accesses to the token file"""
+
+    log = Logger.Create(__name__)
+
+    def _read(self) -> Dict[str, dict]:
+        if not path.isfile(self.path):
+            return {}
+        try:
+            with open(self.path) as infile:
+                return json.load(infile)
+        except (OSError, ValueError) as ex:
+            self.log.warning('Could not read token file at %s: %s', self.path, ex)
+            return {}
+
+    def _write(self, tokens: Dict[str, dict]):
+        makedirs(path.dirname(self.path), exist_ok=True)
+        write_atomic(self.path, json.dumps(tokens, indent=4), mode=0o600)
+        chmod(self.path, 0o600)
+
+    def get(self, credentialsId: str, domain: str) -> Optional[str]:
+        """Get the stored token of a server
+
+        Args:
+            - credentialsId (str): ID of the server's credentials
+            - domain (str): Domain of the server
+
+        Returns:
+            - str: The token or None if no token for this server and domain is stored
+        """
+        with self.lock:
+            entry = self._read().get(credentialsId)
+        if entry is None or entry.get('domain') != domain:
+            return None
+        return entry.get('token')
+
+    def set(self, credentialsId: str, domain: str, token: str):
+        """Store the token of a server, replacing any previous token"""
+        with self.lock:
+            tokens = self._read()
+            tokens[credentialsId] = {"domain": domain, "token": token}
+            self._write(tokens)
+        self.log.info('Stored API token for server "%s"', credentialsId)
+
+    def remove(self, credentialsId: str):
+        """Remove the token of a server, e.g. after the server rejected it"""
+        with self.lock:
+            tokens = self._read()
+            if tokens.pop(credentialsId, None) is None:
+                return
+            self._write(tokens)
+        self.log.info('Removed API token of server "%s"', credentialsId)
@@ -14,6 +14,20 @@ class App():
         self.console.parent_app = self
         self.project.parent_app = self
 
+        # Show the project's request counters in the console's progress bars
+        self.console.requestStats = self.project.api.api.stats
+        self.console.requestStats.listener = self.console
+
+    def flush(self):
+        """Write pending changes of the configuration and the project to disk
+
+        Raises:
+            - OSError: If the configuration or the project could not be written
+        """
+        self.config.flush()
+        if not self.project.flush():
+            raise OSError(f'Could not write KiTree project at {self.project.path}')
+
     def run(self):
         pass
 
@@ -3,4 +3,4 @@ from app import App
 
 def command_exit(app: App, args: List[str]):
     app.console.write('Goodbye!')
-    exit()
\ No newline at end of file
+    app.console.isRunning = False
\ No newline at end of file
@@ -2,11 +2,10 @@ from typing import List
 
 from app import App
 from export.exporter import get_exporters
-from misc.colors import Color as C
 
 def command_export(app: App, args: List[str]):
     if not app.project.isLoaded:
-        return app.console.write(f"{C.Fail}No project loaded!{C.End}")
+        return app.console.fail("No project loaded!")
 
     if len(args) < 1:
         app.console.write("")
@@ -19,8 +18,9 @@ def command_export(app: App, args: List[str]):
         for name, exporter in get_exporters().items():
             app.console.write(f"  {name} - {exporter.get_description()}")
         app.console.write("")
+        app.console.set_failed()
         return
 
     if args[0] in get_exporters().keys():
         get_exporters()[args[0]].export(app, args[1:])
-    else: app.console.write(f"{C.Fail}Unknown option!{C.End}")
+    else: app.console.fail("Unknown option!")
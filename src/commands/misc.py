@@ -1,20 +1,88 @@
+import re
 from typing import List
 from app import App
+from misc.logger import Logger
+from misc.logtail import LogFilter, LogRecord, follow, parse_time, tail
+
+def show_log_usage(app: App):
+    app.console.write("")
+    app.console.write("log: Show the last records of the logfile, including its rotated backup")
+    app.console.write("")
+    app.console.write("Usage:")
+    app.console.write("  log [ level ] [ lines ] [ options ]")
+    app.console.write("")
+    app.console.write("Options:")
+    app.console.write("  -n <lines>               Number of records to show (default: 5)")
+    app.console.write("  -l <level>               Minimum level of the records, e.g. WARNING")
+    app.console.write("  -m <logger>              Only records of this logger and its children, e.g. api")
+    app.console.write("  --since <time>           Only records since the time, e.g. 10m, 2h, 1d or 2023-01-31 12:00")
+    app.console.write("  --until <time>           Only records until the time")
+    app.console.write("  -r <regex>               Only records matching the regular expression")
+    app.console.write("  -f                       Follow the logfile and show new records until Ctrl+C")
+    app.console.write("")
+    app.console.set_failed()
 
 def command_show_log(app: App, args: List[str]):
-    level = 'DEBUG' if len(args) == 0 else args[0]
-    numLines = 5 if len(args) < 2 else int(args[1])
-
-    app.console.write(f'Showing last {numLines} lines of the logfile..')
-
-    with open('kitree.log', 'r') as logfile:
-        lines = logfile.readlines()
-        lines.reverse()
-        counter = 0
-        for line in lines:
-            if counter > numLines:
-                break
-            if level != 'DEBUG' and level not in line:
-                continue
-            app.console.write(f'{line}', newline=False)
-            counter = counter + 1
+    numLines = 5
+    followLog = False
+    logFilter = LogFilter()
+
+    try:
+        positional = 0
+        iterator = iter(args)
+        for arg in iterator:
+            if arg == '-f':
+                followLog = True
+            elif arg == '-n':
+                numLines = int(next(iterator))
+            elif arg == '-l':
+                logFilter.level = next(iterator).upper()
+            elif arg == '-m':
+                logFilter.name = next(iterator)
+            elif arg == '--since':
+                logFilter.since = parse_time(next(iterator))
+            elif arg == '--until':
+                logFilter.until = parse_time(next(iterator))
+            elif arg == '-r':
+                logFilter.pattern = re.compile(next(iterator))
+            # Positional arguments as in `log [ level ] [ lines ]`
+            elif positional == 0 and arg.upper() in Logger.Levels:
+                logFilter.level = arg.upper()
+                positional = 1
+            elif positional < 2 and arg.isdigit():
+                numLines = int(arg)
+                positional = 2
+            else:
+                return show_log_usage(app)
+    except StopIteration:
+        return show_log_usage(app)
+    except (ValueError, re.error) as ex:
+        return app.console.fail(f'Invalid option: {ex}')
+
+    if logFilter.level is not None and logFilter.level not in Logger.Levels:
+        return app.console.fail(f'Unknown log level {logFilter.level}!')
+    if logFilter.level == 'DEBUG':
+        logFilter.level = None
+
+    def show(record: LogRecord):
+        for line in record.lines:
+            app.console.write(line)
+
+    app.console.write(f'Showing last {numLines} records of the logfile..')
+    for record in tail(Logger.LogPath, numLines, logFilter):
+        show(record)
+
+    if not followLog:
+        return
+    if app.console.output is not None:
+        return app.console.fail('Following the logfile is not possible on the daemon!')
+
+    app.console.write('Following the logfile, press Ctrl+C to stop..')
+    app.console.flush()
+    def show_flushed(record: LogRecord):
+        show(record)
+        app.console.flush()
+    try:
+        follow(Logger.LogPath, logFilter, show_flushed)
+    except KeyboardInterrupt:
+        pass
@@ -1,4 +1,7 @@
+import csv
+from os import path
 from typing import List
+from api.scheduler import Priority, request_priority
 from app import App
 from misc.colors import Color
 from project.project import DescriptiveError
@@ -13,18 +16,23 @@ def command_parts(app: App, args: List[str]):
         app.console.write("  part add                 Add a part to the parts list")
         app.console.write("  part rm <ipn>            Remove a part from the parts list")
         app.console.write("  part rm all              Remove all parts from the parts list")
+        app.console.write("  part import <source>     Add all parts used in a schematic, board or CSV file")
+        app.console.write("  part search <query>      Search parts by IPN, name, description, keywords, MPN and SKU")
         app.console.write("")
+        app.console.set_failed()
         return
     
     if args[0] == "list": command_list_parts(app, args)
     elif args[0] == "add": command_add_part(app, args)
     elif args[0] == "rm": command_remove_part(app, args)
-    else: app.console.write(f"{Color.Fail}Unknown option!{Color.End}")
+    elif args[0] == "import": command_import_parts(app, args)
+    elif args[0] == "search": command_search_parts(app, args)
+    else: app.console.fail("Unknown option!")
 
 
 def command_list_parts(app: App, args: List[str]):
     if not app.project.isLoaded:
-        return app.console.write('No project loaded!')
+        return app.console.fail('No project loaded!')
 
     parts_list = app.project.get_parts_list()
     if len(parts_list) == 0:
@@ -37,22 +45,23 @@ def command_list_parts(app: App, args: List[str]):
 
 def command_add_part(app: App, args: List[str]):
     if not app.project.isLoaded:
-        return app.console.write('No project loaded!')
+        return app.console.fail('No project loaded!')
 
     if len(args) != 2:
-        return app.console.write('Usage: part add [ IPN ]')
+        return app.console.fail('Usage: part add [ IPN ]')
 
     try:
-        app.project.add_part(args[1])
+        with request_priority(Priority.Interactive):
+            app.project.add_part(args[1])
     except DescriptiveError as ex:
-        app.console.write(ex)
+        app.console.fail(str(ex))
 
 def command_remove_part(app: App, args: List[str]):
     if not app.project.isLoaded:
-        return app.console.write('No project loaded!')
+        return app.console.fail('No project loaded!')
 
     if len(args) != 2:
-        app.console.write('Usage: part rm [ IPN | "all" ]')
+        return app.console.fail('Usage: part rm [ IPN | "all" ]')
 
     try:
         if args[1] == "all":
@@ -68,4 +77,118 @@ def command_remove_part(app: App, args: List[str]):
         else:
             app.project.remove_part(args[1])
     except DescriptiveError as ex:
-        app.console.write(ex)
\ No newline at end of file
+        app.console.fail(str(ex))
+
+def command_search_parts(app: App, args: List[str]):
+    if not app.project.isLoaded:
+        return app.console.fail('No project loaded!')
+
+    if len(args) < 2:
+        return app.console.fail('Usage: part search [ query ]')
+
+    query = ' '.join(args[1:])
+    with request_priority(Priority.Interactive):
+        results = app.project.api.search_parts(query)
+    if len(results) == 0:
+        return app.console.write(f'No parts found for "{query}"')
+
+    partsList = set(app.project.get_parts_list())
+    app.console.inc()
+    for result in results:
+        marker = f' {Color.OkBlue}<in project>{Color.End}' if result.ipn in partsList else ''
+        description = f' - {result.description}' if result.description else ''
+        app.console.write(f'{Color.Bold}{result.ipn}{Color.End} {result.name}{description}{marker}')
+    app.console.dec()
+
+def show_import_usage(app: App):
+    app.console.write("")
+    app.console.write("part import: Add all parts used in a design to the parts list")
+    app.console.write("")
+    app.console.write("Usage:")
+    app.console.write("  part import schematic [ file ]       Parts of a schematic and its sub-sheets (default: project's schematic)")
+    app.console.write("  part import board [ file ]           Parts of a board (default: project's board)")
+    app.console.write("  part import csv <file> [ column ]    Parts in a column of a CSV file (default: IPN field name)")
+    app.console.write("")
+    app.console.set_failed()
+
+def read_csv_ipns(filePath: str, column: str) -> List[str]:
+    """Read the IPNs in the given column of a CSV file with a header row"""
+    with open(filePath, newline='') as csvFile:
+        sample = csvFile.read(4096)
+        csvFile.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+        except csv.Error:
+            dialect = csv.excel
+        reader = csv.DictReader(csvFile, dialect=dialect)
+        if reader.fieldnames is None or column not in reader.fieldnames:
+            raise DescriptiveError(f"Column '{column}' not found in {filePath}!")
+        return [row[column].strip() for row in reader if row[column] and row[column].strip()]
+
+def command_import_parts(app: App, args: List[str]):
+    if not app.project.isLoaded:
+        return app.console.fail('No project loaded!')
+
+    if len(args) < 2 or args[1] not in ['schematic', 'board', 'csv'] or (args[1] == 'csv' and len(args) < 3):
+        return show_import_usage(app)
+
+    source = args[1]
+    if len(args) > 2:
+        filePath = args[2] if path.isabs(args[2]) or path.exists(args[2]) else path.join(app.project.path, args[2])
+    else:
+        extension = 'kicad_sch' if source == 'schematic' else 'kicad_pcb'
+        filePath = path.join(app.project.path, f'{app.project.name}.{extension}')
+
+    if not path.isfile(filePath):
+        return app.console.fail(f'File {filePath} not found!')
+
+    # Collect the IPNs of the design
+    try:
+        if source == 'schematic':
+            from kiutils.schematic import Schematic
+            from misc.tools import enumerate_schematic
+            ipns = list(enumerate_schematic(app, Schematic().from_file(filePath), use_parts_list=False).keys())
+        elif source == 'board':
+            from kiutils.board import Board
+            from misc.tools import enumerate_board
+            ipns = list(enumerate_board(app, Board().from_file(filePath), use_parts_list=False).keys())
+        else:
+            column = args[3] if len(args) > 3 else app.config.get_ipn_field_name()
+            ipns = list(dict.fromkeys(read_csv_ipns(filePath, column)))
+    except DescriptiveError as ex:
+        return app.console.fail(str(ex))
+
+    # Symbols and footprints may have an empty IPN field
+    ipns = list(dict.fromkeys(ipn.strip() for ipn in ipns if ipn and ipn.strip()))
+    if len(ipns) == 0:
+        return app.console.write(f'No IPNs found in {path.basename(filePath)}!')
+
+    partsList = set(app.project.get_parts_list())
+    newIpns = [ipn for ipn in ipns if ipn not in partsList]
+    app.console.write(f'Found {len(ipns)} IPNs in {path.basename(filePath)}, {len(newIpns)} not yet on the parts list')
+    if len(newIpns) == 0:
+        return
+
+    # Validate all IPNs with a single listing of the InvenTree parts
+    app.console.write('Validating IPNs against InvenTree ..')
+    partIds = app.project.api.get_part_ids(newIpns)
+    missing = [ipn for ipn, ids in partIds.items() if len(ids) == 0]
+    ambiguous = [ipn for ipn, ids in partIds.items() if len(ids) > 1]
+    valid = [ipn for ipn, ids in partIds.items() if len(ids) == 1]
+
+    added = app.project.add_parts(valid)
+    app.console.write(f'{Color.OkGreen}Added {len(added)} parts to the parts list{Color.End}')
+
+    if len(missing) > 0:
+        app.console.write(f'{Color.Warning}{len(missing)} IPNs do not exist in the InvenTree database or are inactive:{Color.End}')
+        app.console.inc()
+        for ipn in missing:
+            app.console.write(f'- { ipn }')
+        app.console.dec()
+
+    if len(ambiguous) > 0:
+        app.console.write(f'{Color.Warning}{len(ambiguous)} IPNs are used by more than one active part:{Color.End}')
+        app.console.inc()
+        for ipn in ambiguous:
+            app.console.write(f'- { ipn } (IDs { ", ".join(str(id) for id in partIds[ipn]) })')
+        app.console.dec()
@@ -1,6 +1,7 @@
 from genericpath import isfile
 from os import listdir, path
 from typing import List
+from api.scheduler import Priority, request_priority
 from app import App
 from misc.colors import Color
 from project.project import ApiConnectionError, DescriptiveError, InvalidServerIdError, NoProjectFileError, \
@@ -20,6 +21,7 @@ def command_project(app: App, args: List[str]):
         app.console.write("  project status           Information about the current active project")
         app.console.write("  project set <option>     Set some option in the project")
         app.console.write("")
+        app.console.set_failed()
         return
         
     if args[0] == "load": command_load_project(app, args)
@@ -27,22 +29,22 @@ def command_project(app: App, args: List[str]):
     elif args[0] == "status": command_show_status(app, args)
     elif args[0] == "list": command_list_known_projects(app, args)
     elif args[0] == "set": command_project_set(app, args)
-    else: app.console.write(f"{Color.Fail}Unknown option!{Color.End}")
+    else: app.console.fail("Unknown option!")
 
 def command_load_project(app: App, args: List[str]):
     if len(args) != 2:
-        return app.console.write('Usage: load [ last / <name> / <path> ]')
+        return app.console.fail('Usage: load [ last / <name> / <path> ]')
 
     path = None
 
     if args[1] == "last":
         lastProject = app.config.get_last_known_project_name()
         if lastProject == "":
-            return app.console.write('No last project known!')
+            return app.console.fail('No last project known!')
 
         path = app.config.get_known_project_path(lastProject)
         if path is None:
-            return app.console.write('No path to known project known!')
+            return app.console.fail('No path to known project known!')
 
         app.console.log.info(f'Using path "{path}" for last known project "{lastProject}"')
 
@@ -62,15 +64,15 @@ def command_load_project(app: App, args: List[str]):
         app.config.set_last_loaded_project_name(app.project.name)
         app.config.add_known_project(app.project.name, app.project.path)
     except ProjectNotFoundError as ex:
-        app.console.write(f"No project was found! {ex}.")
+        app.console.fail(f"No project was found! {ex}.")
     except NoProjectFileError:
-        app.console.write("No .kitree project file found! Use <init> to initialize a new project.")
+        app.console.fail("No .kitree project file found! Use <init> to initialize a new project.")
     except ProjectLoadError:
-        app.console.write(f"Error while loading project .kitree file! Check log for more info.")
+        app.console.fail("Error while loading project .kitree file! Check log for more info.")
     except InvalidServerIdError as ex:
-        app.console.write(f"Project server id '{ex}' not found in configured InvenTree servers!")
+        app.console.fail(f"Project server id '{ex}' not found in configured InvenTree servers!")
     except ApiConnectionError as ex:
-        app.console.write(f"Could not connect to InvenTree server at {ex}!")
+        app.console.fail(f"Could not connect to InvenTree server at {ex}!")
 
 def command_list_known_projects(app: App, args: List[str]):
     projects = app.config.get_known_projects()
@@ -85,10 +87,10 @@ def command_list_known_projects(app: App, args: List[str]):
 
 def command_init_project(app: App, args: List[str]):
     if app.project.isLoaded:
-        return app.console.write("A project is already loaded!")
+        return app.console.fail("A project is already loaded!")
 
     if len(args) != 3:
-        return app.console.write('Usage: project init [ path ] [ inventree-server-id ]')
+        return app.console.fail('Usage: project init [ path ] [ inventree-server-id ]')
 
     # Check if a KiCad project exists at the given path
     suppliedPath = args[1]
@@ -100,10 +102,10 @@ def command_init_project(app: App, args: List[str]):
             app.console.write(f'Found valid KiCad project "{projectName}"')
             break
     else:
-        return app.console.write(f'{Color.Fail}No valid KiCad project found at this location!')
+        return app.console.fail('No valid KiCad project found at this location!')
 
     if isfile(path.join(projectPath, '.kitree')):
-        return app.console.write(f'Project is already initialized! Use "load" instead..')
+        return app.console.fail('Project is already initialized! Use "load" instead..')
 
     # TODO: Check if server ID is known to kitree
 
@@ -116,11 +118,11 @@ def command_init_project(app: App, args: List[str]):
         app.project.save()
         app.console.write(f'Project "{projectName}" successfully initialized! Use "load last" to load it')
     except DescriptiveError as ex:
-        app.console.write(f'{Color.Fail}{ex}{Color.End}')
+        app.console.fail(str(ex))
 
 def command_show_status(app: App, args: List[str]):
     if not app.project.isLoaded:
-        return app.console.write('No project loaded!')
+        return app.console.fail('No project loaded!')
 
     app.console.write(f'Project "{ app.project.name }" loaded')
     app.console.write(f'  🌐 Path: {Color.OkBlue}{ app.project.path }')
@@ -128,6 +130,7 @@ def command_show_status(app: App, args: List[str]):
         app.console.write(f'  ⭐ Master IPN: undefined')
     else:
         app.console.write(f'  ⭐ Master IPN: {Color.Bold}{app.project.get_master_part()}')
+    app.console.write(f'  🔌 InvenTree: { app.project.api.get_connection_state() }')
 
 def command_project_set(app: App, args: List[str]):
     if len(args) < 2:
@@ -135,23 +138,25 @@ def command_project_set(app: App, args: List[str]):
         app.console.write("  project set master       Change the master-part of the active project")
         app.console.write("  project set server-id    Change the InvenTree server ID")
         app.console.write("")
+        app.console.set_failed()
         return
         
     if args[1] == "master": command_set_master_part(app, args)
     elif args[1] == "server-id": command_set_server_id(app, args)
-    else: app.console.write(f"{Color.Fail}Unknown option!{Color.End}")
+    else: app.console.fail("Unknown option!")
 
 def command_set_master_part(app: App, args: List[str]):
     if not app.project.isLoaded:
-        return app.console.write('No project loaded!')
+        return app.console.fail('No project loaded!')
 
     if len(args) != 3:
-        return app.console.write('Usage: project set master [ IPN ]')
+        return app.console.fail('Usage: project set master [ IPN ]')
 
     master_part = args[2]
 
-    if not app.project.api.part_exists(master_part):
-        return app.console.write(f'Part {master_part} does not exist in Inventree!')
+    with request_priority(Priority.Interactive):
+        if not app.project.api.part_exists(master_part):
+            return app.console.fail(f'Part {master_part} does not exist in Inventree!')
 
     app.project.set_master_part(master_part)
     app.console.log.info(f'Changed master-part of {app.project.name} to {master_part}')
@@ -159,10 +164,10 @@ def command_set_master_part(app: App, args: List[str]):
 
 def command_set_server_id(app: App, args: List[str]):
     if not app.project.isLoaded:
-        return app.console.write('No project loaded!')
+        return app.console.fail('No project loaded!')
 
     if len(args) != 3:
-        return app.console.write('Usage: project set server-id [ server-id ]')
+        return app.console.fail('Usage: project set server-id [ server-id ]')
 
     server_id = args[2]
 
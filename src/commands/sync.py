@@ -0,0 +1,70 @@
+from datetime import datetime
+from typing import List
+
+from app import App
+from misc.colors import Color
+
+def command_sync(app: App, args: List[str]):
+    if len(args) > 0 and args[0] not in ["full", "status", "offline"]:
+        app.console.write("")
+        app.console.write("sync: Mirror the InvenTree catalog of the active project's server locally")
+        app.console.write("")
+        app.console.write("Usage:")
+        app.console.write("  sync                     Fetch the catalog changes since the last sync")
+        app.console.write("  sync full                Fetch the complete catalog, removing deleted records")
+        app.console.write("  sync status              Show the state of the local mirror")
+        app.console.write("  sync offline [on|off]    Read the catalog from the local mirror instead of the server")
+        app.console.write("")
+        app.console.set_failed()
+        return
+
+    if len(args) > 0 and args[0] == "offline":
+        return command_sync_offline(app, args)
+
+    if not app.project.isLoaded:
+        return app.console.fail('No project loaded!')
+
+    if len(args) > 0 and args[0] == "status":
+        return command_sync_status(app, args)
+
+    if app.project.api.is_offline():
+        return app.console.fail('Syncing is not possible in offline mode! Use "sync offline off" first.')
+
+    full = len(args) > 0 and args[0] == "full"
+    app.console.write(f'Syncing the {"complete " if full else ""}catalog of "{app.project.get_server_id()}" ..')
+    app.console.inc()
+    def show_result(result):
+        removed = f', {result.removed} removed' if result.removed > 0 else ''
+        mode = 'changes' if result.incremental else 'full'
+        app.console.write(f'{result.endpoint}: {result.received} received{removed} ({mode})')
+    app.project.api.sync(full=full, onProgress=show_result)
+    app.console.dec()
+    app.console.write(f'{Color.OkGreen}Catalog synced!')
+
+def command_sync_status(app: App, args: List[str]):
+    api = app.project.api
+    app.console.write(f'Mirror of "{app.project.get_server_id()}" at {api.get_mirror().dbPath}')
+    app.console.write(f'Mode: {"offline" if api.is_offline() else "online"}')
+    app.console.inc()
+    for endpoint, (count, syncTime) in api.get_mirror().get_status().items():
+        synced = datetime.fromtimestamp(syncTime).strftime('%Y-%m-%d %H:%M:%S') if syncTime is not None else 'never'
+        app.console.write(f'{endpoint}: {count} records, synced {synced}')
+    app.console.dec()
+
+def command_sync_offline(app: App, args: List[str]):
+    if len(args) < 2:
+        return app.console.write(f'Offline mode is {"on" if app.config.get_offline_mode() else "off"}')
+    if args[1] not in ["on", "off"]:
+        return app.console.fail('Usage: sync offline [on|off]')
+
+    offline = args[1] == "on"
+    app.config.set_offline_mode(offline)
+
+    if app.project.isLoaded:
+        api = app.project.api
+        if offline and not api.get_mirror().is_synced():
+            app.console.write(f'{Color.Warning}The local mirror is incomplete, run "sync" before going offline!')
+        api.set_offline(offline)
+        if not offline and not api.is_connected():
+            api.connect_async(app.config.get_credentials_from_id(app.project.get_server_id()))
+    app.console.write(f'Offline mode {"enabled" if offline else "disabled"}')
@@ -8,12 +8,13 @@ License identifier:
 """
 
 from dataclasses import dataclass, field
-from types import NoneType
 from typing import Optional
 
+from api.decode import Decoder, Key
 from api.inventree import InvenTreeApi
+from components.data import intern_string
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Company():
     """This class represents a Company of the Inventree API
     """
@@ -24,7 +25,7 @@ class Company():
     Website: str = ""
     Phone: str = ""
     Address: str = ""
-    EMail: str = None
+    EMail: Optional[str] = None
     Currency: str = ""
     Contact: str = ""
     Link: str = ""
@@ -36,122 +37,102 @@ class Company():
     PartsSupplied: int = 0
     PartsManufactured: int = 0
 
-    def __init__(self, data: dict | None = None):
-        """Initializes a Company object with the data obtained from Inventree API
+    @classmethod
+    def from_data(cls, data: dict) -> 'Company':
+        """Creates a Company object with the data obtained from Inventree API
 
         Args:
-            data (dict): Data from Inventree API or None to create an empty object
+            data (dict): Data from Inventree API
         """
-        if data is None:
-            return
-
-        self.ID = data['pk']
-        self.Url = data['url']
-        self.Name = data['name']
-        self.Description = data['description']
-        self.Website = data['website']
-        self.Phone = data['phone']
-        self.Address = data['address']
-        self.EMail = data['email']
-        self.Currency = data['currency']
-        self.Contact = data['contact']
-        self.Link = data['link']
-        self.ImagePath = data['image']
-        self.IsCustomer = data['is_customer']
-        self.IsManufacturer = data['is_manufacturer']
-        self.IsSupplier = data['is_supplier']
-        self.Notes = data['notes']
-        self.PartsSupplied = data['parts_supplied']
-        self.PartsManufactured = data['parts_manufactured']
-
-@dataclass
+        return COMPANY.decode(data)
+
+    @staticmethod
+    def get_by_id(api: InvenTreeApi, companyId: int) -> Optional['Company']:
+        """Get a company by its ID. Companies are cached by the API, so all parts of a supplier or
+        manufacturer share the same Company object.
+
+        Args:
+            api (InvenTreeApi): The API to load the company from
+            companyId (int): ID of the company
+
+        Returns:
+            Company: The company or None, if it does not exist
+        """
+        with api.cacheLock:
+            if companyId in api.companyCache:
+                return api.companyCache[companyId]
+        data = api.get_company(companyId)
+        company = Company.from_data(data) if data is not None else None
+        with api.cacheLock:
+            return api.companyCache.setdefault(companyId, company)
+
+COMPANY = Decoder(Company, {
+    'ID': 'pk',
+    'Name': Key('name', intern_string),
+})
+
+@dataclass(frozen=True, slots=True)
 class SupplierPart():
     """This class represents a Company/Part of the Inventree API
     """
-    api: InvenTreeApi = None
-
     Description: str = ""
     Link: str = ""
     ManufacturerPart: int = -1
-    #ManufacturerPart: ManufacturerPart = ManufacturerPart(None)
     Note: str = ""
     ID: int = -1
     Packaging: str = ""
     Part: int = -1
     SKU: str = ""
-    Supplier: Company = field(default_factory=lambda: Company(None))
+    Supplier: Company = field(default_factory=lambda: Company())
 
-    def __init__(self, api: InvenTreeApi, data: Optional[dict] = None):
-        """Initializes a SupplierPart object with the data obtained from Inventree API
+    @classmethod
+    def from_data(cls, api: InvenTreeApi, data: dict) -> 'SupplierPart':
+        """Creates a SupplierPart object with the data obtained from Inventree API and loads its
+        supplier
 
         Args:
-            data (dict): Data from Inventree API or None to create an empty object
+            api (InvenTreeApi): The API to load the supplier from
+            data (dict): Data from Inventree API
         """
-        self.api = api
-        if data is None:
-            return
-
-        self.Description = data['description']
-        self.Link = data['link']
-        self.ManufacturerPart = data['manufacturer_part']
-        self.Note = data['note']
-        self.ID = data['pk']
-        self.Packaging = data['packaging']
-        self.Part = data['part']
-        self.SKU = data['SKU']
-
-        # Load supplier data from Inventree
-        company = self.api.get_company(data['supplier'])
-        if company is not None:
-            self.Supplier = Company(company)
-
-        # Get manufacturer part of this supplier part
-        #manPart = ITApi.GetManufacturerPart(data['manufacturer_part'])
-        #if manPart is not None:
-        #    self.ManufacturerPart = ManufacturerPart(manPart)
-
-@dataclass
+        return SUPPLIER_PART.decode(data, Supplier=Company.get_by_id(api, data['supplier']) or Company())
+
+SUPPLIER_PART = Decoder(SupplierPart, {
+    'Link': 'link',
+    'ID': 'pk',
+    'SKU': 'SKU',
+})
+
+@dataclass(frozen=True, slots=True)
 class ManufacturerPart():
     """This class represents a Company/Part/Manufacturer of the Inventree API
     """
-    api: InvenTreeApi = None
-
     ID: int = -1
     Part: int = -1
-    Manufacturer: Company = field(default_factory=lambda: Company(None))
+    Manufacturer: Company = field(default_factory=lambda: Company())
     Description: str = ""
     MPN: str = ""
     Link: str = ""
-    SupplierParts: list[SupplierPart] = None
+    SupplierParts: tuple[SupplierPart, ...] = ()
 
-    def __init__(self, api: InvenTreeApi, data: Optional[dict] = None):
-        """Initializes a ManufacturerPart object with the data obtained from Inventree API
+    @classmethod
+    def from_data(cls, api: InvenTreeApi, data: dict) -> 'ManufacturerPart':
+        """Creates a ManufacturerPart object with the data obtained from Inventree API and loads its
+        manufacturer and supplier parts
 
         Args:
-            data (dict): Data from Inventree API or None to create an empty object
+            api (InvenTreeApi): The API to load the manufacturer and supplier parts from
+            data (dict): Data from Inventree API
         """
-        self.api = api
-        if data is None:
-            return
-
-        self.ID = data['pk']
-        self.Part = data['part']
-        self.Description = data['description']
-        self.MPN = data['MPN']
-        self.Link = data['link']
-
-        # Load manufacturer data from Inventree
-        company = self.api.get_company(data['manufacturer'])
-        if company is not None:
-            self.Manufacturer = Company(company)
-
         # Get a list of supplier parts for this manufacturer part
-        parts = self.api.get_supplier_part_list(self.MPN)
-        if parts is not None:
-            self.SupplierParts = []
-            for part in parts:
-                self.SupplierParts.append(SupplierPart(self.api, part))
-
-
-
-
+        parts = api.get_supplier_part_list(data['MPN'])
+
+        return MANUFACTURER_PART.decode(
+            data,
+            Manufacturer = Company.get_by_id(api, data['manufacturer']) or Company(),
+            SupplierParts = tuple(SupplierPart.from_data(api, part) for part in parts or [])
+        )
+
+MANUFACTURER_PART = Decoder(ManufacturerPart, {
+    'ID': 'pk',
+    'MPN': 'MPN',
+})
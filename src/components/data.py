@@ -7,7 +7,15 @@ License identifier:
     GPL-3.0
 """
 
+import sys
+
 from dataclasses import dataclass
+from typing import Any
+
+def intern_string(value: Any) -> Any:
+    """Intern a string, so repeated values like units, template or company names are stored once.
+    Other values are returned as they are."""
+    return sys.intern(value) if isinstance(value, str) else value
 
 @dataclass
 class Credentials():
@@ -20,7 +28,8 @@ class Credentials():
     """The username to use for login"""
 
     password: str = ""
-    """The password to use for login"""
+    """The password to use for login. May be left empty once an API token of the server is
+    stored (see `api.tokens.TokenStore`)"""
 
     domain: str = ""
     """The domain to authenticate to"""
@@ -7,22 +7,25 @@ License identifier:
     GPL-3.0
 """
 
-from dataclasses import dataclass, field
+from dataclasses import MISSING, dataclass, field, fields
 from os import getcwd, makedirs, path
-from types import NoneType
+from typing import ClassVar, Dict, Optional
 
+from api.decode import Decoder, Key
 from api.inventree import InvenTreeApi
+from api.scheduler import Priority, request_priority
 from components.company import ManufacturerPart
+from components.data import intern_string
 from misc.logger import Logger
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class PartCategory():
     """This class represents a Part/Category of the Inventree API
     """
     ID: int = 0
     Name: str = ""
     Description: str = ""
-    DefaultLocation = NoneType
+    DefaultLocation: Optional[int] = None
     DefaultKeywords: str = ""
     Level: int = 0
     Parent: int = 0
@@ -30,30 +33,23 @@ class PartCategory():
     PathString: str = ""
     Url: str = ""
 
-    def __init__(self, data: dict | None):
-        """Initializes a PartCategory object with the data obtained from Inventree API
+    @classmethod
+    def from_data(cls, data: dict) -> 'PartCategory':
+        """Creates a PartCategory object with the data obtained from Inventree API
 
         Args:
-            data (dict): Data from Inventree API or None to create an empty object
+            data (dict): Data from Inventree API
         """
-        if data is None:
-            return
+        return PART_CATEGORY.decode(data)
 
-        self.ID = data['pk']
-        self.Name = data['name']
-        self.Description = data['description']
-        self.DefaultLocation = data['default_location']
-        self.DefaultKeywords = data['default_keywords']
-        self.Level = data['level']
-        self.Parent = data['parent']
-        # try:
-        #     self.Parts = data['parts']
-        # except:
-        #     self.Parts = None
-        self.PathString = data['pathstring']
-        self.Url = data['url']
-
-@dataclass
+# Only the attributes KiTree reads are decoded, here and in all mappings below and in
+# `components.company`. All other attributes keep their defaults.
+PART_CATEGORY = Decoder(PartCategory, {
+    'ID': 'pk',
+    'Name': Key('name', intern_string),
+})
+
+@dataclass(frozen=True, slots=True)
 class PartParameterTemplate():
     """This class represents a Part/Parameter/Template of the Inventree API
     """
@@ -61,45 +57,46 @@ class PartParameterTemplate():
     Name: str = ""
     Units: str = ""
 
-    def __init__(self, data: dict | None):
-        """Initializes a PartParameterTemplate object with the data obtained from Inventree API
+    @classmethod
+    def from_data(cls, data: dict) -> 'PartParameterTemplate':
+        """Creates a PartParameterTemplate object with the data obtained from Inventree API
 
         Args:
-            data (dict): Data from Inventree API or None to create an empty object
+            data (dict): Data from Inventree API
         """
-        if data is None:
-            return
+        return PART_PARAMETER_TEMPLATE.decode(data)
 
-        self.ID = data['pk']
-        self.Name = data['name']
-        self.Units = data['units']
+PART_PARAMETER_TEMPLATE = Decoder(PartParameterTemplate, {
+    'ID': 'pk',
+    'Name': Key('name', intern_string),
+})
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class PartParameter():
     """This class represents a Part/Parameter of the Inventree API
     """
     ID: int = -1
     Part: int = -1
     Template: int = -1
-    TemplateDetail: PartParameterTemplate = None
+    TemplateDetail: PartParameterTemplate = field(default_factory=lambda: PartParameterTemplate())
     Data: str = ""
 
-    def __init__(self, data: dict | None):        
-        """Initializes a PartParameter object with the data obtained from Inventree API
+    @classmethod
+    def from_data(cls, data: dict) -> 'PartParameter':
+        """Creates a PartParameter object with the data obtained from Inventree API
 
         Args:
-            data (dict): Data from Inventree API or None to create an empty object
+            data (dict): Data from Inventree API
         """
-        if data is None:
-            return
+        return PART_PARAMETER.decode(data)
 
-        self.ID = data['pk']
-        self.Part = data['part']
-        self.Template = data['template']
-        self.TemplateDetail = PartParameterTemplate(data['template_detail'])
-        self.Data = data['data']
+PART_PARAMETER = Decoder(PartParameter, {
+    'ID': 'pk',
+    'TemplateDetail': Key('template_detail', PART_PARAMETER_TEMPLATE.decode),
+    'Data': 'data',
+})
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class PartAttachment():
     """This class represents a Part/Attachment of the Inventree API
     """
@@ -110,23 +107,23 @@ class PartAttachment():
     Comment: str = ""
     UploadDate: str = ""
 
-    def __init__(self, data: dict | None):        
-        """Initializes a PartAttachment object with the data obtained from Inventree API
+    @classmethod
+    def from_data(cls, data: dict) -> 'PartAttachment':
+        """Creates a PartAttachment object with the data obtained from Inventree API
 
         Args:
-            data (dict): Data from Inventree API or None to create an empty object
+            data (dict): Data from Inventree API
         """
-        if data is None:
-            return
+        return PART_ATTACHMENT.decode(data)
 
-        self.ID = data['pk']
-        self.Part = data['part']
-        self.Attachment = data['attachment']
-        self.FileName = data['filename']
-        self.Comment = data['comment']
-        self.UploadDate = data['upload_date']
+PART_ATTACHMENT = Decoder(PartAttachment, {
+    'ID': 'pk',
+    'Attachment': 'attachment',
+    'FileName': 'filename',
+    'Comment': Key('comment', intern_string),
+})
 
-@dataclass 
+@dataclass(frozen=True, slots=True)
 class BomItem():
     """Represents a Bom of the Inventree API
     """
@@ -140,32 +137,24 @@ class BomItem():
     Quantity: float = 0.0
     Reference: str = ""
     SubPart: int = -1
-    PriceRange = None
+    PriceRange: str | None = None
     Validated: bool = False
 
-    def __init__(self, data: dict | None):        
-        """Initializes a BomItem object with the data obtained from Inventree API
+    @classmethod
+    def from_data(cls, data: dict) -> 'BomItem':
+        """Creates a BomItem object with the data obtained from Inventree API
 
         Args:
-            data (dict): Data from Inventree API or None to create an empty object
+            data (dict): Data from Inventree API
         """
-        if data is None:
-            return
+        return BOM_ITEM.decode(data)
+
+BOM_ITEM = Decoder(BomItem, {
+    'ID': 'pk',
+})
 
-        self.AllowVariants = data['allow_variants']
-        self.Inherited = data['inherited']
-        self.Note = data['note']
-        self.Optional = data['optional']
-        self.Overage = data['overage']
-        self.ID = data['pk']
-        self.Part = data['part']
-        self.Quantity = data['quantity']
-        self.Reference = data['reference']
-        self.SubPart = data['sub_part']
-        self.Validated = data['validated']
-
-@dataclass
-class Part():    
+@dataclass(slots=True)
+class Part():
     """This class represents a Part of the Inventree API
     """
     api: InvenTreeApi = None
@@ -173,24 +162,24 @@ class Part():
     Active: bool = False
     Assembly: bool = False
     Category: int = 0
-    CategoryDetail: PartCategory = field(default_factory=lambda: PartCategory(None))
+    CategoryDetail: PartCategory = field(default_factory=lambda: PartCategory())
     Component: bool = False
     DefaultExpiry: int = 0
-    DefaultLocation: str = NoneType
-    DefaultSupplier: str = NoneType
-    Description: str = NoneType
-    FullName: str = NoneType
-    ImagePath: str = NoneType
+    DefaultLocation: Optional[int] = None
+    DefaultSupplier: Optional[int] = None
+    Description: Optional[str] = None
+    FullName: Optional[str] = None
+    ImagePath: Optional[str] = None
     InStock: float = 0.0
     Ordering: float = 0.0
     Building: float = 0.0
-    IPN: str = NoneType
+    IPN: Optional[str] = None
     IsTemplate: bool = False
     Keywords: str = ""
     Link: str = ""
     MinimumStock: int = 0
     Name: str = ""
-    Notes: str = NoneType
+    Notes: Optional[str] = None
     ID: int = 0
     Purchaseable: bool = False
     Revision: str = ""
@@ -201,14 +190,22 @@ class Part():
     ThumbnailPath: str = ""
     Trackable: bool = False
     Units: str = ""
-    VariantOf: int = NoneType
-    VariantPart = None
+    VariantOf: Optional[int] = None
+    VariantPart: Optional['Part'] = None
     Virtual: bool = False
     Parameters: list[PartParameter] = None
     Attachments: list[PartAttachment] = None
     Bom: list[BomItem] = None
     ManufacturerParts: list[ManufacturerPart] = None
-    Log: Logger = Logger.Create(__name__)
+    Log: ClassVar[Logger] = Logger.Create(__name__)
+
+    ResolvedParameters: Dict[str, str] = None
+    """Parameter name as key and its value as value, merged down the variant chain: A parameter
+    of the part overrides the one of its template"""
+
+    ResolvedAttachments: Dict[str, PartAttachment] = None
+    """Attachment comment (e.g. `Footprint`) as key and the attachment as value, merged down the
+    variant chain like `ResolvedParameters`"""
 
     # Paths of the temporary files downloaded by KiTree
     ModelPath: str = None
@@ -221,79 +218,114 @@ class Part():
     """Path to the temporary symbol file downloaded by DownloadCadData()"""
 
     def __init__(self, api: InvenTreeApi, partIpn: str | None):
+        # Slotted classes have no class level defaults to fall back to
+        for item in fields(self):
+            if item.default_factory is not MISSING:
+                setattr(self, item.name, item.default_factory())
+            else:
+                setattr(self, item.name, item.default)
+
         self.api = api
         if partIpn is None:
-            return 
+            return
 
         data = self.api.get_part_detail(partIpn)
         if data is None:
             raise Exception(f'Part {partIpn} does not exist!')
+        self._load(data)
+
+    @staticmethod
+    def get_by_id(api: InvenTreeApi, partId: int) -> 'Part':
+        """Get a part by its ID. Parts are cached by the API, so a template is only loaded once and
+        shared by all of its variants.
+
+        Args:
+            api (InvenTreeApi): The API to load the part from
+            partId (int): ID of the part
+
+        Returns:
+            Part: The part
+        """
+        with api.cacheLock:
+            part = api.partCache.get(partId)
+        if part is not None:
+            return part
+
+        # Loaded without holding the lock, the part's templates are loaded recursively
+        data = api.get_part(partId)
+        if data is None:
+            raise Exception(f'Part with ID {partId} does not exist!')
+        part = Part(api, None)
+        part._load(data)
+        with api.cacheLock:
+            # Another thread may have loaded the part in the meantime, all have to share one
+            return api.partCache.setdefault(partId, part)
+
+    def _load(self, data: dict):
+        """Fill the part with the data obtained from Inventree API and load its parameters,
+        attachments, BOM items, manufacturer parts and templates"""
+        #self.CategoryDetail = PartCategory.from_data(data['category_detail'])
 
-        #self.CategoryDetail = PartCategory(data['category_detail'])
-
-        self.Active = data['active']
-        self.Assembly = data['assembly']
-        self.Category = data['category']
-        self.Component = data['component']
-        self.DefaultExpiry = data['default_expiry']
-        self.DefaultSupplier = data['default_supplier']
-        self.Description = data['description']
-        self.FullName = data['full_name']
-        self.ImagePath = data['image']
-        self.InStock = data['in_stock']
-        self.Ordering = data['ordering']
-        self.Building = data['building']
-        self.IPN = data['IPN']
-        self.IsTemplate = data['is_template']
-        self.Keywords = data['keywords']
-        self.Link = data['link']
-        self.MinimumStock = data['minimum_stock']
-        self.Name = data['name']
-        self.Notes = data['notes']
-        self.ID = data['pk']
-        self.Purchaseable = data['purchaseable']
-        self.Revision = data['revision']
-        self.Salable = data['salable']
-        self.Starred = data['starred']
-        self.StockItemCount = data['stock_item_count']
-        self.Suppliers = data['suppliers']
-        self.ThumbnailPath = data['thumbnail']
-        self.Trackable = data['trackable']
-        self.Units = data['units']
-        self.VariantOf = data['variant_of']
-        self.Virtual = data['virtual']
+        PART.decode_into(self, data)
 
         # Check if the part is a variant of another part and load it
-        if self.VariantOf is not NoneType and self.VariantOf is not None:
-            self.VariantPart = Part(self.api, self.api.get_part_ipn(self.VariantOf))
-
-        # Retrieve the part's parameter list
-        parameterList = self.api.get_part_parameters(self.ID)
-        if parameterList is not None:
-            self.Parameters = []
-            for data in parameterList:
-                self.Parameters.append(PartParameter(data))
-
-        # Retrieve the part's attachment list
-        attachmentList = self.api.get_part_attachments(self.ID)
-        if attachmentList is not None:
-            self.Attachments = []
-            for data in attachmentList:
-                self.Attachments.append(PartAttachment(data))
-
-        # Retrieve the part's BOM items
-        bomItems = self.api.get_part_bom_items(self.ID)
-        if bomItems is not None:
-            self.Bom = []
-            for data in bomItems:
-                self.Bom.append(BomItem(data))
+        if self.VariantOf is not None:
+            self.VariantPart = Part.get_by_id(self.api, self.VariantOf)
+
+        # Retrieve the part's parameters, attachments and BOM items
+        self.Parameters = PART_PARAMETER.decode_list(self.api.get_part_parameters(self.ID))
+        self.Attachments = PART_ATTACHMENT.decode_list(self.api.get_part_attachments(self.ID))
+        self.Bom = BOM_ITEM.decode_list(self.api.get_part_bom_items(self.ID))
 
         # Get list of manufacturer parts for this Part
         parts = self.api.get_manufacturer_part_list(self.ID)
         if parts is not None:
             self.ManufacturerParts = []
             for part in parts:
-                self.ManufacturerParts.append(ManufacturerPart(self.api, part))
+                self.ManufacturerParts.append(ManufacturerPart.from_data(self.api, part))
+
+        self._resolve()
+
+    def _resolve(self):
+        """Merge the parameters and attachments of the part with the resolved ones of its template"""
+        if self.VariantPart is not None:
+            self.ResolvedParameters = dict(self.VariantPart.ResolvedParameters)
+            self.ResolvedAttachments = dict(self.VariantPart.ResolvedAttachments)
+        else:
+            self.ResolvedParameters = {}
+            self.ResolvedAttachments = {}
+
+        ownParameters: Dict[str, str] = {}
+        for parameter in self.Parameters or []:
+            ownParameters.setdefault(parameter.TemplateDetail.Name, parameter.Data)
+        self.ResolvedParameters.update(ownParameters)
+
+        ownAttachments: Dict[str, PartAttachment] = {}
+        for attachment in self.Attachments or []:
+            ownAttachments.setdefault(attachment.Comment, attachment)
+        self.ResolvedAttachments.update(ownAttachments)
+
+    def get_resolved_parameter(self, name: str) -> Optional[str]:
+        """Get the value of a parameter of the part or of its nearest template defining it
+
+        Args:
+            name (str): Name of the parameter
+
+        Returns:
+            str: Value of the parameter or None, if neither the part nor its templates define it
+        """
+        return self.ResolvedParameters.get(name) if self.ResolvedParameters is not None else None
+
+    def get_resolved_attachment(self, comment: str) -> Optional[PartAttachment]:
+        """Get the attachment with the given comment of the part or of its nearest template
+
+        Args:
+            comment (str): Comment of the attachment, e.g. `Footprint`, `Symbol` or `3D-Model`
+
+        Returns:
+            PartAttachment: The attachment or None, if neither the part nor its templates have one
+        """
+        return self.ResolvedAttachments.get(comment) if self.ResolvedAttachments is not None else None
 
     def download_cad_data(self) -> bool:
         """Download the CAD data of the part to KiTree's temp directory
@@ -309,56 +341,31 @@ class Part():
          - self.ModelPath: Path to 3D-model file in KiTree temp folder
         """
 
-        def waterfall_to_component_attachment(component: Part, type: str) -> str:
-            """Search for a component's attachment of given type by recursively checking its or its 
-            parents (variants) attachments.
+        def get_attachment_url(type: str) -> Optional[str]:
+            """Get the relative path (URL) of the part's attachment of the given type, inherited
+            from its templates if the part has none
 
             Args:
-                component (Part): Component to search for
                 type (str): Type of attachment to get. Available: `3D-Model`, `Footprint`, `Symbol`
-
-            Raises:
-                Exception: Attachment of given type not found
-
-            Returns:
-                str: Relative path (URL) to the attachment
             """
-            if component.Attachments is None:
-                # If the component has no attachments registered, its parent may have the 
-                # attachments assigned to. Search the parent or return None, if no parent is set.
-                if component.VariantOf is not None:
-                    return waterfall_to_component_attachment(component.VariantPart, type)
-                else:
-                    self.Log.warning(f'No asset of type "{type}" for {component.IPN} found!')
-                    raise Exception()
-            else:
-                # Search in the part's attachments for the given attachment type and return its 
-                # URL or None, if the requested attachment of the given type is not available.
-                for item in component.Attachments:
-                    if item.Comment == type:
-                        self.Log.info(f'Using this asset of type "{type}" for {component.IPN}: {item.FileName}')
-                        return item.Attachment
-                else:
-                    if component.VariantOf is not None:
-                        return waterfall_to_component_attachment(component.VariantPart, type)
-                    else:
-                        self.Log.warning(f'No asset of type "{type}" for {component.IPN} found!')
-                        raise Exception()
+            attachment = self.get_resolved_attachment(type)
+            if attachment is None:
+                self.Log.warning(f'No asset of type "{type}" for {self.IPN} found!')
+                return None
+            self.Log.info(f'Using this asset of type "{type}" for {self.IPN}: {attachment.FileName}')
+            return attachment.Attachment
 
         # Footprint and symbol have to be present at all times
-        try:
-            footprintPath = waterfall_to_component_attachment(self, "Footprint")
-            symbolPath = waterfall_to_component_attachment(self, "Symbol")
-        except Exception:
+        footprintPath = get_attachment_url("Footprint")
+        symbolPath = get_attachment_url("Symbol")
+        if footprintPath is None or symbolPath is None:
             self.Log.error(f'Not all attachments for part "{self.IPN}" found!')
             return False
-        
+
         # 3D-Model may be present, but could be omited
-        try:
-            modelPath = waterfall_to_component_attachment(self, "3D-Model")
-        except Exception: 
+        modelPath = get_attachment_url("3D-Model")
+        if modelPath is None:
             self.Log.warning(f'No 3D-model found for part "{self.IPN}"')
-            modelPath = None
 
         # FIXME: Does this work every time KiTree is called?
         modelFolder = path.join(path.expanduser('~'), '.kitree', 'temp/', 'models/')
@@ -380,24 +387,25 @@ class Part():
         self.SymbolPath = symbolFolder + symbolPath.split('/')[-1]
 
         # Download the component's files to the KiTree temp directory
-        try:
-            self.api.api.api.downloadFile(url=itUrl + footprintPath, destination=self.FootprintPath, overwrite=True)
-            self.Log.info(f'Downloaded footprint for part "{self.IPN}" to "{self.FootprintPath}"')
-            self.api.api.api.downloadFile(url=itUrl + symbolPath, destination=self.SymbolPath, overwrite=True)
-            self.Log.info(f'Downloaded symbol for part "{self.IPN}" to "{self.FootprintPath}"')
-        except Exception as ex:
-            self.Log.error(f'Downloading attachments from Inventree API failed for part "{self.IPN}"!')
-            self.Log.debug(f'Exception: {ex}')
-            return False
-
-        # Download the 3D-Model, if one was uploaded to InvenTree
-        if self.ModelPath is not None:
+        with request_priority(Priority.Background):
             try:
-                self.api.api.downloadFile(url=itUrl + modelPath, destination=self.ModelPath, overwrite=True)
-                self.Log.info(f'Downloaded 3D-model for part "{self.IPN}" to "{self.ModelPath}"')
+                self.api.api.downloadFile(url=itUrl + footprintPath, destination=self.FootprintPath, overwrite=True)
+                self.Log.info(f'Downloaded footprint for part "{self.IPN}" to "{self.FootprintPath}"')
+                self.api.api.downloadFile(url=itUrl + symbolPath, destination=self.SymbolPath, overwrite=True)
+                self.Log.info(f'Downloaded symbol for part "{self.IPN}" to "{self.FootprintPath}"')
             except Exception as ex:
-                self.Log.warning(f'Downloading 3D-Model from Inventree API failed for part "{self.IPN}"!')
+                self.Log.error(f'Downloading attachments from Inventree API failed for part "{self.IPN}"!')
                 self.Log.debug(f'Exception: {ex}')
+                return False
+
+            # Download the 3D-Model, if one was uploaded to InvenTree
+            if self.ModelPath is not None:
+                try:
+                    self.api.api.downloadFile(url=itUrl + modelPath, destination=self.ModelPath, overwrite=True)
+                    self.Log.info(f'Downloaded 3D-model for part "{self.IPN}" to "{self.ModelPath}"')
+                except Exception as ex:
+                    self.Log.warning(f'Downloading 3D-Model from Inventree API failed for part "{self.IPN}"!')
+                    self.Log.debug(f'Exception: {ex}')
         return True
 
     def GetSchematicId(self) -> str:
@@ -509,4 +517,10 @@ class Part():
         for item in self.Bom:
             self.api.delete_bom_item(item.ID)
         return True
-        
\ No newline at end of file
+
+PART = Decoder(Part, {
+    'IPN': 'IPN',
+    'Link': 'link',
+    'ID': 'pk',
+    'VariantOf': 'variant_of',
+})
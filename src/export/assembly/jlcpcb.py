@@ -1,7 +1,8 @@
 import csv
+from dataclasses import dataclass
 from datetime import datetime
 from os import path
-from typing import List
+from typing import Dict, List, Set
 from kiutils.board import Board
 from app import App
 from misc.constants import KITREE_VERSION
@@ -9,9 +10,23 @@ from misc.constants import KITREE_VERSION
 from misc.logger import Logger
 from misc.colors import Color as C
 from misc.tools import enumerate_board
-from components.part import Part
+from misc.tracing import Tracer
+from export.panel import BoardPlacements, PanelSettings, get_board_outline_extent
 from export.templates import GenericExporter
 
+@dataclass(frozen=True)
+class SourcingMatch():
+    """Supplier part of a KiTree part that can be ordered through JLCPCB"""
+
+    MPN: str = ""
+    """Manufacturer part number"""
+
+    Name: str = ""
+    """Name of the part in InvenTree"""
+
+    SKU: str = ""
+    """Part number of the supplier (LCSC or JLCPCB part number)"""
+
 class JlcAssemblyBom(GenericExporter):
     """Class that implements the JLC BOM export functionality"""
 
@@ -24,7 +39,7 @@ class JlcAssemblyBom(GenericExporter):
 
     def export(self, app: App, args: List[str]) -> bool:
         if len(args) == 0:
-            app.console.write('Usage: export jlc_assembly_bom [ output_folder ]')
+            app.console.fail('Usage: export jlc_assembly_bom [ output_folder ]')
             return False
         
         csv_file_name = path.join(args[0], f'{app.project.name}_jlc_bom.csv')
@@ -41,18 +56,20 @@ class JlcAssemblyBom(GenericExporter):
                 app.console.write('Parsing KiCad board .. ', newline=False)
                 boardPath = path.join(app.project.path, f'{app.project.name}.kicad_pcb')
                 try:
-                    board = Board().from_file(boardPath)
+                    with Tracer.span('parse board', 'kiutils', file=boardPath):
+                        board = Board().from_file(boardPath)
                     app.console.append(f'{C.OkGreen}Done!')
                 except Exception as ex:
                     self.log.error(f'Could not parse board of project "{app.project.name}" at {boardPath}!')
                     self.log.debug(f'Exception: {str(ex)}')
-                    app.console.append(f'{C.Fail}Failed!')
+                    app.console.fail('Failed!', append=True)
                     return False
 
                 # Enumerate parts in schematic
                 app.console.write('Enumerating KiCad board .. ', newline=False)
                 enumerated_parts = {}
-                enumerated_parts = enumerate_board(app, board, use_tht=False)
+                with Tracer.span('enumerate board', 'export'):
+                    enumerated_parts = enumerate_board(app, board, use_tht=False)
                 app.console.append(f'{C.OkGreen}Done!')
                 app.console.write('Found the following parts:')
                 app.console.inc()
@@ -60,39 +77,22 @@ class JlcAssemblyBom(GenericExporter):
                     app.console.write(f'- {C.Bold}{part}{C.End}: {", ".join(enumerated_parts[part])}')
                 app.console.dec()
 
-                for partIpn in enumerated_parts.keys():
-                    app.console.write(f'Processing {partIpn} ..', newline=False)
+                # Resolve the JLCPCB/LCSC supplier parts of all enumerated parts at once
+                supplierNames = app.config.get_jlc_supplier_names()
+                app.console.write(f'Resolving supplier parts of {", ".join(supplierNames)} .. ', newline=False)
+                with Tracer.span('resolve supplier parts', 'export'):
+                    sourcing = self.get_sourcing_index(app, supplierNames, set(enumerated_parts.keys()))
+                app.console.append(f'{C.OkGreen}Done!')
 
-                    # Get part information from API
-                    if not app.project.api.part_exists(partIpn):
-                        self.log.error(f'Part {partIpn} not found on InvenTree server ..')
-                        app.console.append(f'{C.Fail}Not available in InvenTree!')
-                        continue
+                progress = app.console.progress('Exporting parts', len(enumerated_parts), 'parts')
+                for partIpn in progress.track(enumerated_parts.keys()):
+                    app.console.write(f'Processing {partIpn} ..', newline=False)
 
-                    part = Part(app.project.api, partIpn)
-                    manufacturerPartOfIntrest = None
-                    supplierPartOfIntrest = None
-
-                    # Check if a manufacturer part with JLC/LCSC as vendor is available
-                    for manufacturerPart in part.ManufacturerParts:
-                        for supplierPart in manufacturerPart.SupplierParts:
-                            # Check each supplier part to be a LCSC or JLCPCB supplier
-                            if supplierPart.Supplier.Name != 'LCSC' and \
-                               supplierPart.Supplier.Name != 'JLCPCB':
-                               continue
-
-                            # This manufacturer part is the first to have LCSC or JLCPCB as 
-                            # a vendor. Use it then
-                            manufacturerPartOfIntrest = manufacturerPart
-                            supplierPartOfIntrest = supplierPart
-                            break
-                        if manufacturerPartOfIntrest is not None:
-                            # A manufacturer part of intrest was found, break the outer loop here
-                            break
-                    else:
+                    if partIpn not in sourcing:
                         app.console.write(f'{C.Warning}No JLCPCB part! Skipping ..')
                         self.log.warning(f'No part with JLCPCB supplier found for {partIpn}!')
                         continue
+                    partOfInterest = sourcing[partIpn]
 
                     partFootprint = "xxxx:n.a."
                     for footprint in board.footprints:
@@ -103,11 +103,11 @@ class JlcAssemblyBom(GenericExporter):
 
                     # Write the row to the CSV file
                     csv_writer.writerow([
-                        manufacturerPartOfIntrest.MPN, 
-                        part.Name, 
-                        ', '.join(enumerated_parts[partIpn]), 
-                        partFootprint, 
-                        supplierPartOfIntrest.SKU
+                        partOfInterest.MPN,
+                        partOfInterest.Name,
+                        ', '.join(enumerated_parts[partIpn]),
+                        partFootprint,
+                        partOfInterest.SKU
                     ])
 
                     app.console.write(f'{C.OkGreen}OK')
@@ -117,12 +117,61 @@ class JlcAssemblyBom(GenericExporter):
         except Exception as ex:
             self.log.error(f'Could not write to CSV file {csv_file_name}!')
             self.log.debug(f'Exception: {ex}!')
-            app.console.write(f'{C.Fail}Failed!')
+            app.console.fail('Failed!')
             return False
         return True
 
+    def get_sourcing_index(self, app: App, supplierNames: List[str], partIpns: Set[str]) -> Dict[str, SourcingMatch]:
+        """Build an index of the JLCPCB-orderable supplier parts for the given part IPNs. The
+        part IDs are resolved in bulk first. Then the supplier parts of each supplier are either
+        requested page by page until all parts are found, if the supplier's catalog takes fewer
+        pages than there are parts left, or else requested for each of the remaining parts. The
+        number of requests is therefore bounded by both the catalog and the BOM size.
+
+        Args:
+            - ``app``: The kitree application
+            - ``supplierNames``: Names of the supplier companies in order of preference
+            - ``partIpns``: IPNs of the parts to index
+
+        Returns:
+            - Dictionary with the part IPN as key and its preferred supplier part as value
+        """
+        api = app.project.api
+        partIpnsById = {partId: ipn for ipn, partIds in api.get_part_ids(partIpns).items() for partId in partIds}
+
+        index: Dict[str, SourcingMatch] = {}
+        for supplierName in supplierNames:
+            for supplierId in api.get_company_ids(supplierName):
+                remaining = {partId: ipn for partId, ipn in partIpnsById.items() if ipn not in index}
+                missing = set(remaining.values())
+                if len(missing) == 0:
+                    break
+
+                if api.is_offline() or api.count_supplier_parts(supplierId) <= len(remaining) * api.pageSize:
+                    supplierParts = api.get_supplier_parts_of_supplier(supplierId)
+                else:
+                    supplierParts = api.get_supplier_parts_of_parts(supplierId, remaining.keys())
+
+                for supplierPart in supplierParts:
+                    partIpn = remaining.get(supplierPart.get('part'))
+                    if partIpn not in missing:
+                        continue
+
+                    partDetail = supplierPart.get('part_detail') or {}
+                    manufacturerPart = supplierPart.get('manufacturer_part_detail') or {}
+                    index[partIpn] = SourcingMatch(
+                        MPN  = manufacturerPart.get('MPN', supplierPart.get('MPN', '')),
+                        Name = partDetail.get('name', ''),
+                        SKU  = supplierPart['SKU']
+                    )
+                    missing.discard(partIpn)
+                    if len(missing) == 0:
+                        break
+        self.log.info(f'Found supplier parts for {len(index)} of {len(partIpns)} parts')
+        return index
+
 class JlcAssemblyXY(GenericExporter):
-    """Class that implements the JLC BOM export functionality"""
+    """Class that implements the JLC XY export functionality, optionally for a whole panel"""
 
     log = Logger.Create(__name__)
     """The logger of the JlcAssembly class"""
@@ -133,7 +182,21 @@ class JlcAssemblyXY(GenericExporter):
 
     def export(self, app: App, args: List[str]) -> bool:        
         if len(args) == 0:
-            app.console.write('Usage: export jlc_assembly_xy [ output_folder ]')
+            app.console.fail('Usage: export jlc_assembly_xy [ output_folder ] [ options ]')
+            app.console.write('Panel options:')
+            app.console.inc()
+            app.console.write('panel <rows>x<columns>      Number of board instances on the panel')
+            app.console.write('pitch <x>,<y>               Distance between the board instances in mm')
+            app.console.write('rotate <degrees>            Rotation of each board instance around its centre')
+            app.console.write('alternate rotate|mirror     Turn or flip every other board instance')
+            app.console.write('suffix <scheme>             Designator scheme, fields: {ref} {n} {row} {col}')
+            app.console.dec()
+            return False
+
+        try:
+            panel = PanelSettings.from_args(args[1:])
+        except ValueError as ex:
+            app.console.fail(f'Invalid panel options: {ex}')
             return False
 
         csv_file_name = path.join(args[0], f'{app.project.name}_jlc_xy.csv')
@@ -150,19 +213,30 @@ class JlcAssemblyXY(GenericExporter):
                 app.console.write('Parsing KiCad board .. ', newline=False)
                 boardPath = path.join(app.project.path, f'{app.project.name}.kicad_pcb')
                 try:
-                    board = Board().from_file(boardPath)
+                    with Tracer.span('parse board', 'kiutils', file=boardPath):
+                        board = Board().from_file(boardPath)
                     app.console.append(f'{C.OkGreen}Done!')
                 except Exception as ex:
                     self.log.error(f'Could not parse board of project "{app.project.name}" at {boardPath}!')
                     self.log.debug(f'Exception: {str(ex)}')
-                    app.console.append(f'{C.Fail}Failed!')
+                    app.console.fail('Failed!', append=True)
                     return False
 
                 if board.setup.auxAxisOrigin is None:
                     self.log.error("Aux axis origin is not set!")
-                    app.console.append(f"{C.Fail}No aux axis origin defined!{C.End}")
+                    app.console.fail("No aux axis origin defined!", append=True)
+                    return False
+
+                placements = BoardPlacements()
+                extent = get_board_outline_extent(board)
+                if extent is not None:
+                    placements.centerX = (extent[0] + extent[2]) / 2 - board.setup.auxAxisOrigin.X
+                    placements.centerY = -((extent[1] + extent[3]) / 2 - board.setup.auxAxisOrigin.Y)
+                elif panel.rotation % 360 != 0 or panel.alternate is not None:
+                    self.log.error("Board has no outline on Edge.Cuts, its centre is unknown!")
+                    app.console.fail("No board outline on Edge.Cuts to rotate or mirror the board around!", append=True)
                     return False
-                
+
                 for footprint in board.footprints:
                     reference = footprint.graphicItems[0].text
                     app.console.write(f'Processing {reference} ..', newline=False)
@@ -198,24 +272,30 @@ class JlcAssemblyXY(GenericExporter):
                         self.log.info(f'Skipping {reference} as only SMD components shall be used!')
                         continue
 
-                    layer = 'Top' if footprint.layer == 'F.Cu' else 'Bottom'
                     rotation = footprint.position.angle if footprint.position.angle is not None else 0
-                    csv_writer.writerow([
-                            reference, 
-                            footprint.position.X - board.setup.auxAxisOrigin.X, 
-                            -(footprint.position.Y - board.setup.auxAxisOrigin.Y), 
-                            layer, 
-                            rotation
-                        ]
+                    placements.add(
+                        reference,
+                        footprint.position.X - board.setup.auxAxisOrigin.X,
+                        -(footprint.position.Y - board.setup.auxAxisOrigin.Y),
+                        rotation,
+                        footprint.layer != 'F.Cu'
                     )
 
                     app.console.write(f'{C.OkGreen}OK')
 
-            self.log.info(f'Successfully exported JLCPCB BOM to {csv_file_name}!')
+                # Write the placements of every board instance on the panel
+                app.console.write(f'Writing {len(placements) * panel.instance_count()} placements '
+                                  f'({panel.rows}x{panel.columns} panel) .. ', newline=False)
+                suffix = panel.suffix if panel.instance_count() > 1 else None
+                for instance in panel.instances():
+                    csv_writer.writerows(placements.rows(instance, suffix))
+                app.console.append(f'{C.OkGreen}Done!')
+
+            self.log.info(f'Successfully exported JLCPCB XY data to {csv_file_name}!')
 
         except Exception as ex:
             self.log.error(f'Could not write to CSV file {csv_file_name}!')
             self.log.debug(f'Exception: {ex}!')
-            app.console.write(f'{C.Fail}Failed!')
+            app.console.fail('Failed!')
             return False
         return True
\ No newline at end of file
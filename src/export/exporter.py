@@ -11,7 +11,7 @@ exporters: Dict[str, GenericExporter] = {
 
 def export(app: App, exporter_name: str, args: List[str]) -> bool:
     if not exporter_name in exporters.keys():
-        return app.console.write(f'Unknown exporter: "{exporter_name}"')
+        return app.console.fail(f'Unknown exporter: "{exporter_name}"')
 
     return exporters[exporter_name].export(app, args)
 
@@ -0,0 +1,263 @@
+from array import array
+from dataclasses import dataclass, field
+from math import atan2, cos, degrees, hypot, radians, sin
+from typing import Iterator, List, Optional, Tuple
+
+@dataclass(frozen=True)
+class PanelInstance():
+    """A single board instance placed on a panel"""
+
+    index: int = 0
+    """Running index of the instance on the panel, starting at 0"""
+
+    row: int = 0
+    """Row of the instance on the panel, starting at 0"""
+
+    column: int = 0
+    """Column of the instance on the panel, starting at 0"""
+
+    offsetX: float = 0.0
+    """X offset of the instance's origin relative to the panel origin"""
+
+    offsetY: float = 0.0
+    """Y offset of the instance's origin relative to the panel origin"""
+
+    rotation: float = 0.0
+    """Rotation of the instance around the centre of the board in degrees"""
+
+    mirrored: bool = False
+    """True if the instance is flipped to the other side of the panel, mirrored at the vertical
+    axis through the centre of the board"""
+
+    def is_identity(self) -> bool:
+        """Check if the instance does not move the board at all"""
+        return self.offsetX == 0 and self.offsetY == 0 and self.rotation % 360 == 0 and not self.mirrored
+
+@dataclass
+class PanelSettings():
+    """Step-and-repeat settings of a panel consisting of multiple instances of the same board"""
+
+    rows: int = 1
+    """Number of board rows on the panel"""
+
+    columns: int = 1
+    """Number of board columns on the panel"""
+
+    pitchX: float = 0.0
+    """Distance between the origins of two neighbouring columns in mm"""
+
+    pitchY: float = 0.0
+    """Distance between the origins of two neighbouring rows in mm"""
+
+    rotation: float = 0.0
+    """Rotation applied to every instance around the centre of the board in degrees"""
+
+    alternate: Optional[str] = None
+    """Treatment of every other instance (checkerboard pattern). ``rotate`` turns them by
+    another 180°, ``mirror`` flips them to the other side of the panel. None for no treatment."""
+
+    suffix: str = '{ref}_{n}'
+    """Designator scheme of panelized parts. Available fields are ``{ref}`` (designator on the
+    board), ``{n}`` (instance number), ``{row}`` and ``{col}`` (all starting at 1)"""
+
+    @staticmethod
+    def from_args(args: List[str]) -> 'PanelSettings':
+        """Parse panel settings from console arguments given as key-value pairs
+
+        Args:
+            - ``args``: Arguments, e.g. ``['panel', '2x3', 'pitch', '50,40', 'alternate', 'rotate']``
+
+        Raises:
+            - ValueError: When an argument is unknown or malformed
+
+        Returns:
+            - The parsed panel settings
+        """
+        settings = PanelSettings()
+        if len(args) % 2 != 0:
+            raise ValueError(f'Missing value for option "{args[-1]}"')
+
+        for key, value in zip(args[0::2], args[1::2]):
+            if key == 'panel':
+                rows, _, columns = value.lower().partition('x')
+                settings.rows, settings.columns = int(rows), int(columns)
+            elif key == 'pitch':
+                pitchX, _, pitchY = value.partition(',')
+                settings.pitchX, settings.pitchY = float(pitchX), float(pitchY or pitchX)
+            elif key == 'rotate':
+                settings.rotation = float(value)
+            elif key == 'alternate':
+                if value not in ['rotate', 'mirror']:
+                    raise ValueError(f'Unknown alternate mode "{value}"')
+                settings.alternate = value
+            elif key == 'suffix':
+                settings.suffix = value
+            else:
+                raise ValueError(f'Unknown option "{key}"')
+
+        if settings.rows < 1 or settings.columns < 1:
+            raise ValueError('Panel needs at least one row and one column')
+        if (settings.columns > 1 and settings.pitchX == 0) or (settings.rows > 1 and settings.pitchY == 0):
+            raise ValueError('Panel with more than one board needs a pitch, e.g. "pitch 50,40"')
+
+        # Check the designator scheme now instead of failing while writing the placements
+        try:
+            first = settings.suffix.format(ref='R1', n=1, row=1, col=1)
+            last = settings.suffix.format(ref='R1', n=2, row=2, col=2)
+        except KeyError as ex:
+            raise ValueError(f'Unknown field {{{ex.args[0]}}} in suffix, available are {{ref}} {{n}} {{row}} {{col}}')
+        except (IndexError, ValueError) as ex:
+            raise ValueError(f'Invalid suffix "{settings.suffix}": {ex}')
+        if first == last:
+            raise ValueError(f'Suffix "{settings.suffix}" gives every instance the same designators, use {{n}} or {{row}} and {{col}}')
+        return settings
+
+    def instance_count(self) -> int:
+        """Get the number of board instances on the panel"""
+        return self.rows * self.columns
+
+    def instances(self) -> Iterator[PanelInstance]:
+        """Iterate over all board instances of the panel, row by row"""
+        for row in range(self.rows):
+            for column in range(self.columns):
+                odd = (row + column) % 2 == 1
+                yield PanelInstance(
+                    index    = row * self.columns + column,
+                    row      = row,
+                    column   = column,
+                    offsetX  = column * self.pitchX,
+                    offsetY  = row * self.pitchY,
+                    rotation = self.rotation + (180.0 if odd and self.alternate == 'rotate' else 0.0),
+                    mirrored = odd and self.alternate == 'mirror'
+                )
+
+def get_board_outline_extent(board) -> Optional[Tuple[float, float, float, float]]:
+    """Get the bounding box of the board outline, i.e. of the graphic items on the `Edge.Cuts`
+    layer
+
+    Args:
+        - ``board``: The board as parsed by kiutils
+
+    Returns:
+        - Smallest X, smallest Y, largest X and largest Y in KiCad coordinates (Y pointing
+          downwards) or None if the board has no outline
+    """
+    points = []
+    for item in board.graphicItems:
+        if getattr(item, 'layer', None) != 'Edge.Cuts':
+            continue
+        if hasattr(item, 'center'):
+            radius = hypot(item.end.X - item.center.X, item.end.Y - item.center.Y)
+            points += [(item.center.X - radius, item.center.Y - radius), (item.center.X + radius, item.center.Y + radius)]
+        elif hasattr(item, 'mid'):
+            points += _get_arc_points(item.start, item.mid, item.end)
+        elif hasattr(item, 'coordinates'):
+            points += [(point.X, point.Y) for point in item.coordinates]
+        elif hasattr(item, 'start') and hasattr(item, 'end'):
+            points += [(item.start.X, item.start.Y), (item.end.X, item.end.Y)]
+    if len(points) == 0:
+        return None
+    return (min(x for x, _ in points), min(y for _, y in points), max(x for x, _ in points), max(y for _, y in points))
+
+def _get_arc_points(start, mid, end) -> List[Tuple[float, float]]:
+    """Get the points spanning the bounding box of an arc: its ends and the extreme points of its
+    circle the arc passes through"""
+    points = [(start.X, start.Y), (mid.X, mid.Y), (end.X, end.Y)]
+    # Centre of the circle through the three points
+    d = 2 * (start.X * (mid.Y - end.Y) + mid.X * (end.Y - start.Y) + end.X * (start.Y - mid.Y))
+    if d == 0:
+        return points
+    cx = ((start.X**2 + start.Y**2) * (mid.Y - end.Y) + (mid.X**2 + mid.Y**2) * (end.Y - start.Y)
+          + (end.X**2 + end.Y**2) * (start.Y - mid.Y)) / d
+    cy = ((start.X**2 + start.Y**2) * (end.X - mid.X) + (mid.X**2 + mid.Y**2) * (start.X - end.X)
+          + (end.X**2 + end.Y**2) * (mid.X - start.X)) / d
+    radius = hypot(start.X - cx, start.Y - cy)
+
+    def angle(x: float, y: float) -> float:
+        return degrees(atan2(y - cy, x - cx)) % 360
+    startAngle, midAngle, endAngle = angle(start.X, start.Y), angle(mid.X, mid.Y), angle(end.X, end.Y)
+    # Sweep from start to end in the direction passing the middle point
+    sweep = (endAngle - startAngle) % 360
+    clockwise = (midAngle - startAngle) % 360 > sweep
+    for quadrant in [0.0, 90.0, 180.0, 270.0]:
+        offset = (startAngle - quadrant) % 360 if clockwise else (quadrant - startAngle) % 360
+        if offset <= (360 - sweep if clockwise else sweep):
+            c, s = _cos_sin(quadrant)
+            points.append((cx + radius * c, cy + radius * s))
+    return points
+
+def _cos_sin(angle: float) -> Tuple[float, float]:
+    """Cosine and sine of the given angle in degrees, exact for quarter turns"""
+    angle = angle % 360
+    quarterTurns = {0: (1.0, 0.0), 90: (0.0, 1.0), 180: (-1.0, 0.0), 270: (0.0, -1.0)}
+    if angle in quarterTurns:
+        return quarterTurns[angle]
+    return cos(radians(angle)), sin(radians(angle))
+
+@dataclass
+class BoardPlacements():
+    """Column-oriented placement data of all components on a single board. Coordinates are given
+    relative to the board's origin with the Y axis pointing upwards."""
+
+    centerX: float = 0.0
+    """X coordinate of the board's centre, panel instances are rotated and mirrored around it"""
+
+    centerY: float = 0.0
+    """Y coordinate of the board's centre"""
+
+    references: List[str] = field(default_factory=list)
+    x: array = field(default_factory=lambda: array('d'))
+    y: array = field(default_factory=lambda: array('d'))
+    rotation: array = field(default_factory=lambda: array('d'))
+    bottom: List[bool] = field(default_factory=list)
+
+    def add(self, reference: str, x: float, y: float, rotation: float, bottom: bool):
+        """Add the placement of a single component"""
+        self.references.append(reference)
+        self.x.append(x)
+        self.y.append(y)
+        self.rotation.append(rotation)
+        self.bottom.append(bottom)
+
+    def __len__(self) -> int:
+        return len(self.references)
+
+    def rows(self, instance: PanelInstance, suffix: Optional[str] = None) -> Iterator[tuple]:
+        """Generate the placement rows (designator, X, Y, layer, rotation) of the given panel
+        instance. The transformation coefficients are computed once for the whole instance and then
+        applied over the coordinate arrays, so no intermediate row lists are built.
+
+        Args:
+            - ``instance``: The panel instance to generate rows for
+            - ``suffix``: Designator scheme (see ``PanelSettings.suffix``) or None to keep the
+                          designators of the board
+
+        Returns:
+            - Iterator over the CSV rows of this instance
+        """
+        if suffix is None:
+            references = self.references
+        else:
+            references = [suffix.format(ref=ref, n=instance.index + 1, row=instance.row + 1, col=instance.column + 1)
+                          for ref in self.references]
+
+        if instance.mirrored:
+            layers = ['Top' if bottom else 'Bottom' for bottom in self.bottom]
+        else:
+            layers = ['Bottom' if bottom else 'Top' for bottom in self.bottom]
+
+        if instance.is_identity():
+            return zip(references, self.x, self.y, layers, self.rotation)
+
+        # Turned and flipped around the board's centre, so the instance stays within its cell
+        c, s = _cos_sin(instance.rotation)
+        m = -1.0 if instance.mirrored else 1.0
+        cx, cy, turn = self.centerX, self.centerY, instance.rotation
+        ox, oy = instance.offsetX + cx, instance.offsetY + cy
+        xs = map(lambda x, y: round(ox + c * m * (x - cx) - s * (y - cy), 6), self.x, self.y)
+        ys = map(lambda x, y: round(oy + s * m * (x - cx) + c * (y - cy), 6), self.x, self.y)
+        if instance.mirrored:
+            rotations = map(lambda r: (180.0 - r + turn) % 360, self.rotation)
+        else:
+            rotations = map(lambda r: (r + turn) % 360, self.rotation)
+        return zip(references, xs, ys, layers, rotations)
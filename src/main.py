@@ -7,33 +7,129 @@ License identifier:
     GPL-3.0
 """
 
+import argparse
+import atexit
+import os
+import sys
+
+from typing import Optional
+
 from app import App
-from commands.build import command_build
-from commands.exit import command_exit
-from commands.export import command_export
-from commands.parts import command_parts
-from commands.help import command_help
-from commands.misc import command_show_log
-from commands.projects import command_project
+from misc.config import Config
+from misc.console import ExitCode, OutputMode
 from misc.constants import KITREE_AUTHOR, KITREE_VERSION
 from misc.logger import Logger
+from misc.tracing import Tracer
+
+# Command handlers are imported on first use to keep the startup time low
+COMMANDS = {
+    "project": "commands.projects:command_project",
+    "part":    "commands.parts:command_parts",
+    "build":   "commands.build:command_build",
+    "exit":    "commands.exit:command_exit",
+    "help":    "commands.help:command_help",
+    "log":     "commands.misc:command_show_log",
+    "export":  "commands.export:command_export",
+    "sync":    "commands.sync:command_sync",
+}
+
+def parse_arguments() -> argparse.Namespace:
+    """Parse the command line arguments of the CLI"""
+    parser = argparse.ArgumentParser(prog='kitree', description='KiTree - The glue between KiCad and InvenTree')
+    parser.add_argument('mode', nargs='?', choices=['serve'], help='Run KiTree as daemon serving remote clients')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('-c', '--command', help='Run the given commands separated by ";" and exit')
+    mode.add_argument('--script', help='Run the commands in the given script file ("-" for stdin) and exit')
+    parser.add_argument('--keep-going', action='store_true', help='Continue a script after a command failed')
+    parser.add_argument('--no-color', action='store_true', help='Disable colored output')
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument('-q', '--quiet', action='store_true', help='Only print failures, warnings and a summary per command')
+    output.add_argument('--json', action='store_true', help='Print the output of each command as a JSON object')
+    parser.add_argument('--remote', action='store_true', help='Send the commands to a running KiTree daemon')
+    parser.add_argument('-p', '--project', help='Project (name or path) to run remote commands in')
+    parser.add_argument('--socket', default=None, help='Path of the daemon\'s socket')
+    parser.add_argument('--log-level', type=str.upper, choices=Logger.Levels, default=None,
+                        help='Override the configured log level, e.g. DEBUG')
+    parser.add_argument('--trace', metavar='FILE', default=None, help='Write a Chrome trace of the commands to FILE')
+    parser.add_argument('--profile', metavar='FILE', nargs='?', const='', default=None,
+                        help='Print a profile and the peak memory of each command, optionally write the pstats to FILE')
+    return parser.parse_args()
+
+def read_script(scriptPath: str) -> list:
+    """Read the lines of a script file or of stdin if the path is "-" """
+    if scriptPath == '-':
+        return sys.stdin.readlines()
+    with open(scriptPath) as script:
+        return script.readlines()
+
+def create_app(config: Optional[Config] = None) -> App:
+    """Create the application with all commands registered
+
+    Args:
+        - config (Config): Already loaded configuration to use or None to load it from disk
+    """
+    if config is None:
+        app = App()
+        app.config.load()
+        try:
+            Logger.SetLevels(app.config.get_log_level(), app.config.get_module_log_levels())
+        except ValueError as ex:
+            print(f'Invalid logging configuration in {app.config.path}, keeping the default levels: {ex}')
+    else:
+        app = App(config=config)
+
+    for command, function in COMMANDS.items():
+        app.console.add_command(command, function)
+    return app
 
 if __name__ == "__main__":
+    args = parse_arguments()
+    batchMode = args.command is not None or args.script is not None
+    # Non-interactive mode: Colors are only used when writing to a terminal
+    useColor = not args.no_color and (not batchMode or (sys.stdout.isatty() and 'NO_COLOR' not in os.environ))
+
+    outputMode = OutputMode.Json if args.json else OutputMode.Quiet if args.quiet else OutputMode.Normal
+
+    try:
+        lines = [args.command] if args.command is not None else read_script(args.script) if args.script else []
+    except OSError as ex:
+        print(f'Could not read script: {ex}')
+        sys.exit(ExitCode.Failed)
+
+    if args.remote:
+        # Thin client: Neither the configuration nor the application are needed here
+        from server.client import run_remote
+        from server.daemon import DEFAULT_SOCKET_PATH
+        sys.exit(run_remote(args.socket or DEFAULT_SOCKET_PATH, args.project, lines, useColor, args.keep_going, outputMode))
+
     Logger.Init()
-    app = App()
-    app.config.load()
-    app.console.print(f"KiTree CLI {KITREE_VERSION} {KITREE_AUTHOR}")
+    if args.trace is not None:
+        Tracer.start()
+        atexit.register(Tracer.write, args.trace)
 
-    app.console.add_command("project", command_project)
-    app.console.add_command("part", command_parts)
-    app.console.add_command("build", command_build)
-    app.console.add_command("exit",   command_exit)
-    app.console.add_command("help", command_help)
-    app.console.add_command("log", command_show_log)
-    app.console.add_command("export", command_export)
+    app = create_app()
+    if args.log_level is not None:
+        Logger.SetLevels(args.log_level)
 
-    while app.console.isRunning:
-        app.console.process_input(app.console.read())
+    if args.mode == 'serve':
+        from server.daemon import DEFAULT_SOCKET_PATH, KiTreeDaemon
+        daemon = KiTreeDaemon(args.socket or DEFAULT_SOCKET_PATH, lambda: create_app(app.config))
+        app.console.print(f"KiTree daemon {KITREE_VERSION} listening at {daemon.socketPath}")
+        daemon.run()
+        sys.exit(ExitCode.Ok)
 
+    app.console.useColor = useColor
+    app.console.mode = outputMode
+    app.console.profile = args.profile is not None
+    app.console.profilePath = args.profile or None
+    if batchMode:
+        app.console.interactive = False
+        sys.exit(app.console.run_script(lines, keepGoing=args.keep_going))
 
+    app.console.print(f"KiTree CLI {KITREE_VERSION} {KITREE_AUTHOR}")
 
+    while app.console.isRunning:
+        try:
+            app.console.process_input(app.console.read())
+        except EOFError:
+            break
@@ -8,14 +8,16 @@ License identifier:
 """
 
 import json
-import marshmallow_dataclass
+import threading
 
 from dataclasses import dataclass, field
 from os import path, makedirs
-from typing import List, Optional
+from typing import Dict, List, Optional
 from components.data import Credentials, KnownProject
 
+from misc.files import write_atomic
 from misc.logger import Logger
+from misc.serialize import from_dict, to_dict
 
 @dataclass
 class PropertyFields():
@@ -26,6 +28,14 @@ class PropertyFields():
     skuFieldName: str = "Order Nr."
     urlFieldName: str = "Link"
 
+@dataclass
+class LogSettings():
+    level: str = "INFO"
+    """Level of all loggers, e.g. `DEBUG`, `INFO` or `WARNING`"""
+
+    moduleLevels: Dict[str, str] = field(default_factory=dict)
+    """Levels of single modules, e.g. `{"api.inventree": "DEBUG"}`"""
+
 @dataclass
 class ConfigData():
     """Class containing all configuration data that shall be exists in the config file"""
@@ -41,6 +51,16 @@ class ConfigData():
 
     propertyFields: PropertyFields = field(default_factory=lambda: PropertyFields())
 
+    jlcSupplierNames: List[str] = field(default_factory=lambda: ["LCSC", "JLCPCB"])
+    """Names of the supplier companies whose SKUs are used as JLCPCB part numbers, in order of
+    preference"""
+
+    logging: LogSettings = field(default_factory=lambda: LogSettings())
+    """Log levels of KiTree"""
+
+    offline: bool = False
+    """Read the InvenTree catalog from the local mirror instead of the server"""
+
 @dataclass
 class Config():
     """Static class managing and representing the config file"""
@@ -51,12 +71,18 @@ class Config():
     data = ConfigData()
     """Configuration data for kitree"""
 
-    dataSchema = marshmallow_dataclass.class_schema(ConfigData)()
-    """Data schema of the config data class used for serialization/deserialization"""
-
     log = Logger.Create(__name__)
     """Logger for the Config() class"""
 
+    dirty = False
+    """True if the data was changed since the config file was written"""
+
+    lastContent = None
+    """Content of the config file as last read or written"""
+
+    lock = threading.Lock()
+    """Lock serializing writes of the config file, e.g. by multiple daemon sessions"""
+
     def load(self):
         """Load data from the config file or creates it if it does not exist yet.
 
@@ -65,28 +91,50 @@ class Config():
         """
         if not path.exists(self.path):
             self.save()
+            self.flush()
 
         with open(self.path) as json_file:
-            content = json.load(json_file)
-            self.data = self.dataSchema.load(content)
+            self.lastContent = json_file.read()
+            self.data = from_dict(ConfigData, json.loads(self.lastContent))
 
         self.log.info(f'Config file at {self.path} loaded successfully')
 
     def save(self):
-        """Save data to the config file
+        """Mark the data as changed. The config file is written on the next call of `flush()`,
+        so multiple changes during a command only cause a single write.
+        """
+        self.dirty = True
+
+    def flush(self):
+        """Write the data to the config file if it was changed. The file is replaced atomically
+        and left untouched if its content would not change.
+
+        Raises:
+            - OSError: If the file could not be written. The data stays marked as changed, so
+              the next call retries.
 
         See:
             - self.path - Path to config file
         """
-        # Check if config directory exists
-        if not path.exists(path.dirname(self.path)):
-            self.log.warning(f"Config directory at {self.path} missing, creating it now ..")
-            makedirs(path.dirname(self.path))
-
-        # Write to the file
-        with open(self.path, 'w') as outfile:
-            content = self.dataSchema.dump(self.data)
-            bytes_written = outfile.write(json.dumps(content, indent=4))
+        with self.lock:
+            if not self.dirty:
+                return
+
+            content = json.dumps(to_dict(self.data), indent=4)
+            if content == self.lastContent:
+                self.log.debug(f'Configuration at {self.path} unchanged, skipping write')
+                self.dirty = False
+                return
+
+            # Check if config directory exists
+            if not path.exists(path.dirname(self.path)):
+                self.log.warning(f"Config directory at {self.path} missing, creating it now ..")
+                makedirs(path.dirname(self.path))
+
+            # The file contains the credentials of the InvenTree servers
+            bytes_written = write_atomic(self.path, content, mode=0o600)
+            self.lastContent = content
+            self.dirty = False
 
         self.log.info(f'Saved configuration to {self.path} was successfull ({bytes_written} bytes written)')
 
@@ -178,4 +226,20 @@ class Config():
         return self.data.propertyFields.skuFieldName
     
     def get_url_field_name(self) -> str:
-        return self.data.propertyFields.urlFieldName
\ No newline at end of file
+        return self.data.propertyFields.urlFieldName
+
+    def get_jlc_supplier_names(self) -> List[str]:
+        return self.data.jlcSupplierNames
+
+    def get_log_level(self) -> str:
+        return self.data.logging.level
+
+    def get_module_log_levels(self) -> Dict[str, str]:
+        return self.data.logging.moduleLevels
+
+    def get_offline_mode(self) -> bool:
+        return self.data.offline
+
+    def set_offline_mode(self, offline: bool):
+        self.data.offline = offline
+        self.save()
@@ -7,43 +7,323 @@ License identifier:
     GPL-3.0
 """
 
+import json
+import re
+import sys
+import threading
+import time
+
+from contextlib import nullcontext
 from dataclasses import dataclass, field
-from typing import TYPE_CHECKING, Callable, Dict
+from importlib import import_module
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, TextIO, Union
 
 from misc.colors import Color
 from misc.logger import Logger
+from misc.progress import Progress, RequestStats
+from misc.tracing import CommandProfile, Tracer
+
+ANSI_ESCAPE = re.compile(r'\033\[[0-9;]*m')
+"""Regular expression matching the ANSI color codes used by `Color`"""
+
+class ExitCode():
+    """Exit codes of the CLI when running commands non-interactively"""
+    Ok = 0
+    """All commands succeeded"""
+
+    Failed = 1
+    """A command reported a failure or raised an exception"""
+
+    UnknownCommand = 2
+    """A command is not known to the console"""
+
+class OutputMode():
+    """Output modes of the console"""
+    Normal = 'normal'
+    """Every message is written as soon as it is complete"""
+
+    Quiet = 'quiet'
+    """Messages are collected per command, only failures, warnings and a summary are written"""
+
+    Json = 'json'
+    """Messages are collected per command and written as a single JSON object"""
 
 @dataclass
 class Console():
     """This class is used to proxy console input and output to the CLI"""
     indentationLevel: int = 0
-    commands: Dict[str, Callable] = field(default_factory=dict)
+    commands: Dict[str, Union[Callable, str]] = field(default_factory=dict)
     isRunning: bool = True
+    useColor: bool = True
+    """Set to False to strip all colors from the output, e.g. when not writing to a terminal"""
+
+    failureCount: int = 0
+    """Number of failures reported to the console since it was created, see `fail()`"""
+
+    interactive: bool = True
+    """False if no user input is available, e.g. when running a script"""
+
+    output: Optional[TextIO] = None
+    """Stream to write the output to, None to write to stdout"""
+
+    mode: str = OutputMode.Normal
+    """Output mode of the console, see `OutputMode`"""
+
+    requestStats: Optional[RequestStats] = None
+    """Request counters shown in progress bars"""
+
+    bufferSize: int = 8192
+    """Number of characters buffered before writing to a stream that is not a terminal"""
+
+    progressInterval: float = 0.1
+    """Minimum time in seconds between two redraws of a progress bar"""
+
+    profile: bool = False
+    """Profile each command and write the report after its output, see `CommandProfile`"""
+
+    profilePath: Optional[str] = None
+    """Path to write the pstats of the last profiled command to"""
+
     log = Logger.Create(__name__)
     parent_app = None
 
+    def __post_init__(self):
+        self._buffer: List[str] = []
+        self._bufferedCharacters = 0
+        self._partialLine: List[str] = []
+        self._records: List[str] = []
+        self._progress: Optional[Progress] = None
+        self._progressDrawn = False
+        self._lastProgressDraw = 0.0
+        self._deferSave = False
+        self._completionReady = False
+        self._completions: List[str] = []
+        # Request threads redraw the progress bar while the command thread writes its output
+        self._outputLock = threading.RLock()
+
+    def _stream(self) -> TextIO:
+        """Get the stream the console writes to"""
+        return self.output if self.output is not None else sys.stdout
+
+    def _is_terminal(self) -> bool:
+        """Check if the console writes to a terminal"""
+        isatty = getattr(self._stream(), 'isatty', None)
+        return isatty is not None and isatty()
+
+    def _print(self, text: str, end: str = '\n'):
+        """Prints the given text to the CLI. The output is buffered and written once a line is
+        complete (terminals) or the buffer is full (pipes and files). In quiet and JSON mode, the
+        text is collected and written when the command finished."""
+        with self._outputLock:
+            if self.mode != OutputMode.Normal:
+                self._partialLine.append(text + end)
+                if end.endswith('\n'):
+                    self._records += ''.join(self._partialLine).splitlines()
+                    self._partialLine.clear()
+                return
+
+            if not self.useColor:
+                text = ANSI_ESCAPE.sub('', text)
+            self._buffer.append(text + end)
+            self._bufferedCharacters += len(text) + len(end)
+
+            if self._is_terminal():
+                # While a progress bar is shown, partial lines are kept until they are complete
+                if self._progress is None or end.endswith('\n'):
+                    self.flush()
+            elif self._bufferedCharacters >= self.bufferSize:
+                self.flush()
+
+    def flush(self):
+        """Write all buffered output to the stream"""
+        with self._outputLock:
+            if len(self._buffer) == 0:
+                return
+
+            stream = self._stream()
+            if self._progressDrawn:
+                self._buffer.insert(0, '\r\033[K')
+                self._progressDrawn = False
+            stream.write(''.join(self._buffer))
+            self._buffer.clear()
+            self._bufferedCharacters = 0
+
+            if self._progress is not None:
+                self._draw_progress()
+            stream.flush()
+
+    def progress(self, phase: str, total: int, unit: str = '') -> Progress:
+        """Create a progress bar for a phase of a command. Use `Progress.track()` to iterate over
+        the items of the phase while the bar is shown. Progress bars are only drawn on terminals.
+
+        Args:
+            - phase (str): Name of the phase, e.g. `Downloading parts`
+            - total (int): Number of items of the phase
+            - unit (str): Unit of the items, e.g. `parts`
+
+        Returns:
+            - Progress: The progress of the phase
+        """
+        return Progress(console=self, phase=phase, total=total, unit=unit)
+
+    def start_progress(self, progress: Progress):
+        """Show the given progress bar, replacing the current one"""
+        with self._outputLock:
+            self._progress = progress
+            self.refresh_progress(force=True)
+
+    def end_progress(self, progress: Progress):
+        """Remove the given progress bar"""
+        with self._outputLock:
+            if self._progress is not progress:
+                return
+            self._progress = None
+            if self._progressDrawn:
+                self._stream().write('\r\033[K')
+                self._stream().flush()
+                self._progressDrawn = False
+            self.flush()
+
+    def refresh_progress(self, force: bool = False):
+        """Redraw the progress bar, at most every `progressInterval` seconds"""
+        with self._outputLock:
+            if self._progress is None or self.mode == OutputMode.Json or not self._is_terminal():
+                return
+            now = time.monotonic()
+            if not force and now - self._lastProgressDraw < self.progressInterval:
+                return
+            self._draw_progress()
+            self._stream().flush()
+
+    def _draw_progress(self):
+        """Draw the current progress bar at the bottom line of the terminal"""
+        if self.mode == OutputMode.Json or not self._is_terminal():
+            return
+        self._stream().write(f'\r\033[K{self._progress.render(self.requestStats)}')
+        self._progressDrawn = True
+        self._lastProgressDraw = time.monotonic()
+
+    def finish_command(self, input: str, exitCode: int):
+        """Write the collected output of a command in quiet and JSON mode and flush all output
+
+        Args:
+            - input (str): The command line
+            - exitCode (int): Exit code of the command
+        """
+        if self._progress is not None:
+            self.end_progress(self._progress)
+
+        if self.mode != OutputMode.Normal:
+            if len(self._partialLine) > 0:
+                self._records += ''.join(self._partialLine).splitlines()
+                self._partialLine.clear()
+            records = [ANSI_ESCAPE.sub('', record).strip() for record in self._records]
+            levels = [self.get_level(record) for record in self._records]
+            self._records.clear()
+
+            stream = self._stream()
+            if self.mode == OutputMode.Json:
+                stream.write(json.dumps({
+                    "command": input,
+                    "exitCode": exitCode,
+                    "messages": [{"level": level, "text": text} for level, text in zip(levels, records) if text]
+                }) + '\n')
+            else:
+                for level, text in zip(levels, records):
+                    if level in ['error', 'warning']:
+                        stream.write(f'{input}: {text}\n')
+                stream.write(f'{input}: exit code {exitCode}, {len(records)} messages, '
+                             f'{levels.count("error")} errors, {levels.count("warning")} warnings\n')
+            stream.flush()
+
+        self.flush()
+
+    @staticmethod
+    def get_level(record: str) -> str:
+        """Get the level of a console line from its colors: `error`, `warning`, `ok` or `info`"""
+        if Color.Fail in record:
+            return 'error'
+        if Color.Warning in record:
+            return 'warning'
+        if Color.OkGreen in record:
+            return 'ok'
+        return 'info'
+
     def read(self) -> str:
         """Querys the user for input to the CLI
 
+        Raises:
+            - EOFError: The console is not interactive
+
         Returns:
             - str: User input
         """
+        if not self.interactive:
+            raise EOFError('No user input available in non-interactive mode')
+
+        self.flush()
+        self._setup_completion()
         print('  ' * (self.indentationLevel), end='', flush=True)
         print('> ', end='', flush=True)
         return input()
 
+    def _setup_completion(self):
+        """Enable tab completion of commands and IPNs if readline is available"""
+        if self._completionReady:
+            return
+        self._completionReady = True
+        if not sys.stdin.isatty():
+            return
+        try:
+            import readline
+        except ImportError:
+            return
+        readline.set_completer_delims(' ')
+        readline.set_completer(self._complete)
+        readline.parse_and_bind('tab: complete')
+
+    def _complete(self, text: str, state: int) -> Optional[str]:
+        """Completer called by readline for each candidate until None is returned"""
+        if state == 0:
+            try:
+                import readline
+                self._completions = self.get_completions(readline.get_line_buffer(), text)
+            except Exception:
+                self.log.exception('Completing the input failed')
+                self._completions = []
+        return self._completions[state] if state < len(self._completions) else None
+
+    def get_completions(self, line: str, text: str) -> List[str]:
+        """Get the completions of the word being typed
+
+        Args:
+            - line (str): The complete input line
+            - text (str): The word being completed
+
+        Returns:
+            - List[str]: Command names for the first word, otherwise IPNs
+        """
+        if len(line.lstrip().split(' ')) <= 1:
+            return [command for command in self.commands.keys() if command.startswith(text)]
+
+        project = getattr(self.parent_app, 'project', None)
+        if project is None or not project.isLoaded:
+            return []
+        ipns = set(ipn for ipn in project.get_parts_list() if ipn.startswith(text))
+        ipns.update(project.api.complete_ipn(text))
+        return sorted(ipns)
+
     def write(self, message: str, color: Color = Color.End, newline = True):
         """Writes the given message to the CLI with the given indentation level
 
         Args:
             - message (str): Message to write to the CLI
         """
-        print('  ' * (self.indentationLevel), end='', flush=True)
-        print('  ', end='', flush=True)
+        indentation = '  ' * (self.indentationLevel + 1)
         if newline:
-            print(f'{color}{message}{Color.End}')
+            self._print(f'{indentation}{color}{message}{Color.End}')
         else:
-            print(f'{color}{message}', end='', flush=True)
+            self._print(f'{indentation}{color}{message}', end='')
 
         # self.log.info(f'[ Console ] {message}')
 
@@ -56,9 +336,28 @@ class Console():
             - finish (bool, optional): Set when the line is complete to start a newline. Defaults to True.
         """
         if finish:
-            print(f'{message}{Color.End}', flush=True)
+            self._print(f'{message}{Color.End}')
+        else:
+            self._print(f'{message}', end='')
+
+    def fail(self, message: str, append: bool = False):
+        """Writes the given message as a failure to the CLI and marks the running command as
+        failed, so that it exits with `ExitCode.Failed`
+
+        Args:
+            - message (str): Message to write to the CLI
+            - append (bool, optional): Append the message to the current line, see `append()`
+        """
+        self.set_failed()
+        if append:
+            self.append(f'{Color.Fail}{message}')
         else:
-            print(f'{message}', end='', flush=True)
+            self.write(message, Color.Fail)
+
+    def set_failed(self):
+        """Marks the running command as failed without writing a message, e.g. after its usage
+        was shown because of missing or invalid arguments"""
+        self.failureCount += 1
 
     def print(self, message: str):
         """Prints the given message to the CLI without indentation
@@ -66,7 +365,7 @@ class Console():
         Args:
             - message (str): Message to write to the CLI
         """
-        print(message)
+        self._print(f'{message}')
 
     def inc(self):
         """Increment the console indentation level by one"""
@@ -78,26 +377,155 @@ class Console():
         if self.indentationLevel < 0:
             self.indentationLevel = 0
 
-    def add_command(self, command: str, function: Callable):
+    def add_command(self, command: str, function: Union[Callable, str]):
+        """Add a command to the console
+
+        Args:
+            - command (str): Name of the command as typed into the CLI
+            - function (Callable | str): Handler of the command or its import path as
+              ``"module:function"``. Handlers given by path are imported on first use, so that
+              their (heavy) dependencies are not loaded at startup.
+        """
         if command in self.commands.keys():
             self.log.debug(f'Command {command} already in list of console commands! Skipping..')
 
         self.commands.update({command: function})
         self.log.debug(f'Added "{ command }" to command list')
 
-    def process_input(self, input: str):
+    def get_command(self, command: str) -> Callable:
+        """Get the handler of a command, importing it if it was added by its import path
+
+        Args:
+            - command (str): Name of the command
+
+        Returns:
+            - Callable: Handler of the command
+        """
+        function = self.commands[command]
+        if isinstance(function, str):
+            moduleName, _, functionName = function.partition(':')
+            self.log.debug(f'Importing handler of command "{command}" from {moduleName}')
+            function = getattr(import_module(moduleName), functionName)
+            self.commands[command] = function
+        return function
+
+    def process_input(self, input: str) -> int:
+        """Executes the command given as input
+
+        Args:
+            - input (str): Command line, e.g. ``project load last``
+
+        Returns:
+            - int: Exit code of the command (see `ExitCode`). A command failed if it raised an
+              exception or reported a failure with `fail()` or `set_failed()`.
+        """
         # Split input into its parts
         arguments = input.split(' ')
         arguments = [i.strip() for i in arguments]
 
         for command in self.commands.keys():
-            if command == arguments[0]:        
-                self.log.debug(f"Executing command '{command}' at {str(self.commands[command])}")
-                self.log.debug(f"Using arguments: {str(arguments)}")    
-                self.commands[command](self.parent_app, arguments[1:])
+            if command == arguments[0]:
+                failures = self.failureCount
+                profile = CommandProfile(self.profilePath) if self.profile else None
+                try:
+                    function = self.get_command(command)
+                    self.log.debug(f"Executing command '{command}' at {str(function)}")
+                    self.log.debug(f"Using arguments: {str(arguments)}")
+                    with Tracer.span(input, 'command'), profile or nullcontext():
+                        function(self.parent_app, arguments[1:])
+                except Exception as ex:
+                    self.log.exception(f"Command '{input}' raised an exception")
+                    self.indentationLevel = 0
+                    self.fail(f'Command failed: {ex}')
+                if profile is not None:
+                    for line in profile.report():
+                        self.print(line)
+                exitCode = ExitCode.Ok if self.failureCount == failures else ExitCode.Failed
                 break
         else:
             self.write("Unknown command, but those are known:")
             self.inc()
             self.write(f"{', '.join(self.commands.keys())}")
             self.dec()
+            exitCode = ExitCode.UnknownCommand
+
+        # Changes of scripts are saved once the script is done
+        if not self._deferSave and not self.save_changes() and exitCode == ExitCode.Ok:
+            exitCode = ExitCode.Failed
+
+        self.finish_command(input, exitCode)
+        return exitCode
+
+    def save_changes(self) -> bool:
+        """Write pending changes of the configuration and the project to disk
+
+        Returns:
+            - bool: True if all changes were written, otherwise False
+        """
+        if self.parent_app is None:
+            return True
+        try:
+            self.parent_app.flush()
+        except OSError as ex:
+            self.log.exception('Saving changes failed')
+            self.fail(f'Could not save changes: {ex}')
+            return False
+        return True
+
+    def run_script(self, lines: Iterable[str], keepGoing: bool = False) -> int:
+        """Executes commands non-interactively, e.g. from a script file or the command line.
+        Commands are separated by new lines or semicolons, lines starting with ``#`` are ignored.
+
+        Args:
+            - lines (Iterable[str]): Lines of the script
+            - keepGoing (bool): Continue with the next command if a command failed. Defaults to
+              stopping at the first failure.
+
+        Returns:
+            - int: Exit code of the first failed command or `ExitCode.Ok`
+        """
+        exitCode = ExitCode.Ok
+        self._deferSave = True
+        try:
+            for command in self.split_script(lines):
+                if not self.isRunning:
+                    break
+
+                if self.mode == OutputMode.Normal:
+                    self.print(f'> {command}')
+                result = self.process_input(command)
+                if result != ExitCode.Ok:
+                    self.log.error(f"Command '{command}' failed with exit code {result}")
+                    if exitCode == ExitCode.Ok:
+                        exitCode = result
+                    if not keepGoing:
+                        break
+        finally:
+            self._deferSave = False
+            saved = self.save_changes()
+            if saved:
+                self.flush()
+            else:
+                # Reported like a command of its own, the collected output of quiet and JSON
+                # mode would otherwise be left for the next command
+                self.finish_command('save', ExitCode.Failed)
+        if not saved and exitCode == ExitCode.Ok:
+            exitCode = ExitCode.Failed
+        return exitCode
+
+    @staticmethod
+    def split_script(lines: Iterable[str]) -> List[str]:
+        """Split script lines into single commands
+
+        Args:
+            - lines (Iterable[str]): Lines of the script
+
+        Returns:
+            - List[str]: Commands without comments and empty entries
+        """
+        commands = []
+        for line in lines:
+            if line.strip().startswith('#'):
+                continue
+            commands += [command.strip() for command in line.split(';') if command.strip()]
+        return commands
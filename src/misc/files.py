@@ -0,0 +1,50 @@
+"""File helpers
+
+Author:
+    (C) Marvin Mager - @mvnmgrx - 2022
+
+License identifier:
+    GPL-3.0
+"""
+
+import os
+import tempfile
+
+from os import path
+from typing import Optional
+
+def write_atomic(filePath: str, content: str, mode: Optional[int] = None) -> int:
+    """Write a text file atomically: The content is written to a temporary file in the same
+    directory which then replaces the target. Readers either see the old or the new content,
+    never a partially written file.
+
+    Args:
+        - filePath (str): Path of the file to write
+        - content (str): Content of the file
+        - mode (int): Permissions of a newly created file. Existing files keep their permissions.
+          Defaults to the permissions `open()` would create the file with.
+
+    Returns:
+        - int: Number of bytes written
+    """
+    if path.exists(filePath):
+        mode = os.stat(filePath).st_mode & 0o777
+    elif mode is None:
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = 0o666 & ~umask
+
+    directory = path.dirname(path.abspath(filePath))
+    fd, tempPath = tempfile.mkstemp(dir=directory, prefix=f'.{path.basename(filePath)}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as outfile:
+            bytesWritten = outfile.write(content)
+            outfile.flush()
+            os.fsync(outfile.fileno())
+        os.chmod(tempPath, mode)
+        os.replace(tempPath, filePath)
+    except BaseException:
+        if path.exists(tempPath):
+            os.unlink(tempPath)
+        raise
+    return bytesWritten
@@ -10,42 +10,112 @@ License identifier:
     GPL-3.0
 """
 
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, List, Optional
+
+class DeferredQueueHandler(QueueHandler):
+    """Queue handler that leaves all formatting to the listener thread. The records are passed
+    on as they are, which is fine as long as the queue does not leave the process."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
 
 class Logger():
     """Wrapper around Pythons's `logging` module used to initialize and generate loggers.
     """
 
+    LogPath: str = "kitree.log"
+    """Path of the log file"""
+
+    Format: str = "%(asctime)s - [%(levelname)s] - %(name)s - %(message)s"
+    """Format of the lines in the log file"""
+
+    Levels: List[str] = ['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL']
+    """Names of the log levels, lowest first"""
+
+    _listener: Optional[QueueListener] = None
+    """Listener writing the queued log records to the log file"""
+
     @staticmethod
-    def Init():
+    def Init(level: str = "INFO", logPath: Optional[str] = None):
         """Initialize the logging module with the following configuration:
         - Custom formatter
-        - Rotating file handler
-        - Stream handler to print the log output to the console, if required
+        - Records are queued and written to a rotating log file by a background thread, so
+          logging never blocks on file I/O
+        - Caller information (function name, line number) is not collected
+
+        Args:
+            - level (str): Level of the root logger, e.g. `DEBUG` or `INFO`
+            - logPath (str): Path of the log file or None to use `Logger.LogPath`
         """
-        format = logging.Formatter("%(asctime)s - [%(levelname)s] - %(name)s - (%(filename)s).%(funcName)s(%(lineno)d) - %(message)s")
- 
+        if logPath is not None:
+            Logger.LogPath = logPath
+
+        # Looking up the caller of every log call is costly and not needed by the format
+        logging._srcfile = None
+        logging.logProcesses = False
+        logging.logMultiprocessing = False
+
+        format = logging.Formatter(Logger.Format)
+
         logger = logging.getLogger()
-        logger.setLevel(logging.DEBUG)
-        
-        stream_handler = logging.StreamHandler()
-        stream_handler.setLevel(logging.DEBUG)
-        stream_handler.setFormatter(format)
-        # stream_handler.setFormatter(format)
-        # logger.addHandler(stream_handler)
-
-        file_handler = RotatingFileHandler("kitree.log", maxBytes = 10e6, backupCount = 1)
+        logger.setLevel(level)
+
+        file_handler = RotatingFileHandler(Logger.LogPath, maxBytes = 10e6, backupCount = 1)
         file_handler.setLevel(logging.DEBUG)
         file_handler.setFormatter(format)
-        logger.addHandler(file_handler)
+
+        Logger.Shutdown()
+        logQueue = queue.SimpleQueue()
+        logger.addHandler(DeferredQueueHandler(logQueue))
+        Logger._listener = QueueListener(logQueue, file_handler, respect_handler_level=True)
+        Logger._listener.start()
+        atexit.register(Logger.Shutdown)
+
+    @staticmethod
+    def SetLevels(level: Optional[str] = None, moduleLevels: Optional[Dict[str, str]] = None):
+        """Set the level of the root logger and of single modules' loggers
+
+        Args:
+            - level (str): Level of the root logger or None to keep it
+            - moduleLevels (dict): Logger name (module name, e.g. `api.inventree`) as key and
+              level as value
+
+        Raises:
+            - ValueError: A level is not one of `Logger.Levels`. No level is changed then.
+        """
+        for value in [level] + list((moduleLevels or {}).values()):
+            if value is not None and str(value).upper() not in Logger.Levels:
+                raise ValueError(f'Unknown log level "{value}", use one of {", ".join(Logger.Levels)}')
+
+        if level is not None:
+            logging.getLogger().setLevel(level.upper())
+        for name, moduleLevel in (moduleLevels or {}).items():
+            logging.getLogger(name).setLevel(moduleLevel.upper())
+
+    @staticmethod
+    def Shutdown():
+        """Write all queued records to the log file and stop the background thread"""
+        if Logger._listener is None:
+            return
+
+        Logger._listener.stop()
+        for handler in logging.getLogger().handlers[:]:
+            if isinstance(handler, DeferredQueueHandler):
+                logging.getLogger().removeHandler(handler)
+        for handler in Logger._listener.handlers:
+            handler.close()
+        Logger._listener = None
 
     @staticmethod
     def Create(name: str):
         """Create a logger with the given name. Normally used with the `__name__` attribute as name
         to have the module name in the log output.
-        
+
         Returns
             Logger: Handle to logger with given name
         """
-        return logging.getLogger(name)
\ No newline at end of file
+        return logging.getLogger(name)
@@ -0,0 +1,226 @@
+"""Reading, filtering and following the (rotated) KiTree log files
+
+Author:
+    (C) Marvin Mager - @mvnmgrx - 2022
+
+License identifier:
+    GPL-3.0
+"""
+
+import re
+import time
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from os import SEEK_END, path, stat
+from typing import Callable, Iterator, List, Optional, Pattern
+
+from misc.logger import Logger
+
+RECORD_HEADER = re.compile(r'^(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d),\d{3} - \[(\w+)\] - (\S+) - ')
+"""Start of a log record: time stamp, level and logger name. Lines not matching belong to the
+previous record, e.g. tracebacks."""
+
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+"""Format of the time stamps in the log file"""
+
+@dataclass
+class LogRecord():
+    """A single record of the log file, which may span multiple lines"""
+
+    time: Optional[datetime] = None
+    """Time the record was logged"""
+
+    level: str = ""
+    """Level of the record, e.g. `INFO`"""
+
+    name: str = ""
+    """Name of the logger"""
+
+    lines: List[str] = field(default_factory=list)
+    """Lines of the record as written to the log file"""
+
+    @staticmethod
+    def from_lines(lines: List[str]) -> 'LogRecord':
+        """Create a record from its lines, the first line being the record's header"""
+        match = RECORD_HEADER.match(lines[0])
+        if match is None:
+            return LogRecord(lines=lines)
+        return LogRecord(
+            time  = datetime.strptime(match.group(1), TIME_FORMAT),
+            level = match.group(2),
+            name  = match.group(3),
+            lines = lines
+        )
+
+@dataclass
+class LogFilter():
+    """Filter for log records. Unset criteria match every record."""
+
+    level: Optional[str] = None
+    """Minimum level of the records, e.g. `WARNING`"""
+
+    name: Optional[str] = None
+    """Logger name, matches the logger and all of its children"""
+
+    since: Optional[datetime] = None
+    """Oldest time of the records"""
+
+    until: Optional[datetime] = None
+    """Newest time of the records"""
+
+    pattern: Optional[Pattern] = None
+    """Regular expression searched in the records' text"""
+
+    def matches(self, record: LogRecord) -> bool:
+        """Check if the given record passes the filter. Records without a header, e.g. lines
+        before the first record of a truncated file, have no level and never pass a level filter."""
+        if self.level is not None:
+            levels = {name: rank for rank, name in enumerate(Logger.Levels)}
+            if levels.get(record.level, -1) < levels.get(self.level, 0):
+                return False
+        if self.name is not None and record.name != self.name and not record.name.startswith(self.name + '.'):
+            return False
+        if self.since is not None and (record.time is None or record.time < self.since):
+            return False
+        if self.until is not None and (record.time is None or record.time > self.until):
+            return False
+        if self.pattern is not None and not any(self.pattern.search(line) for line in record.lines):
+            return False
+        return True
+
+def parse_time(value: str) -> datetime:
+    """Parse an absolute (`2023-01-31 12:00`, `2023-01-31T12:00:00`) or relative time (`30s`,
+    `10m`, `2h`, `1d` before now)
+
+    Raises:
+        - ValueError: The time could not be parsed
+    """
+    units = {'s': 'seconds', 'm': 'minutes', 'h': 'hours', 'd': 'days'}
+    match = re.fullmatch(r'(\d+)([smhd])', value)
+    if match is not None:
+        return datetime.now() - timedelta(**{units[match.group(2)]: int(match.group(1))})
+    return datetime.fromisoformat(value.replace('T', ' '))
+
+def get_log_files(logPath: str) -> List[str]:
+    """Get the log file and its rotated backups, newest first"""
+    files = [logPath]
+    index = 1
+    while path.isfile(f'{logPath}.{index}'):
+        files.append(f'{logPath}.{index}')
+        index += 1
+    return [file for file in files if path.isfile(file)]
+
+def read_lines_reversed(filePath: str, blockSize: int = 65536) -> Iterator[str]:
+    """Read the lines of a file from the end to the start by seeking backwards in blocks. Only
+    a single block is kept in memory, independent of the file's size.
+
+    Args:
+        - filePath (str): Path of the file
+        - blockSize (int): Number of bytes to read at once
+
+    Returns:
+        - Iterator over the lines, last line first, without line endings
+    """
+    with open(filePath, 'rb') as file:
+        position = file.seek(0, SEEK_END)
+        remainder = b''
+        while position > 0:
+            readSize = min(blockSize, position)
+            position -= readSize
+            file.seek(position)
+            block = file.read(readSize) + remainder
+            lines = block.split(b'\n')
+            # The first line may be incomplete, keep it for the next block
+            remainder = lines.pop(0)
+            for line in reversed(lines):
+                yield line.decode('utf-8', errors='replace').rstrip('\r')
+        if remainder:
+            yield remainder.decode('utf-8', errors='replace').rstrip('\r')
+
+def read_records_reversed(files: List[str]) -> Iterator[LogRecord]:
+    """Read the records of the given log files, newest record first
+
+    Args:
+        - files (List[str]): Log files, newest first (see `get_log_files()`)
+
+    Returns:
+        - Iterator over the records
+    """
+    for filePath in files:
+        continuation: List[str] = []
+        for line in read_lines_reversed(filePath):
+            if line == '' and len(continuation) == 0:
+                continue
+            continuation.append(line)
+            if RECORD_HEADER.match(line) is not None:
+                yield LogRecord.from_lines(list(reversed(continuation)))
+                continuation.clear()
+        if len(continuation) > 0:
+            yield LogRecord.from_lines(list(reversed(continuation)))
+
+def tail(logPath: str, count: int, logFilter: LogFilter) -> List[LogRecord]:
+    """Get the last records matching the filter from the log file and its rotated backups
+
+    Args:
+        - logPath (str): Path of the current log file
+        - count (int): Maximum number of records to return
+        - logFilter (LogFilter): Filter the records have to pass
+
+    Returns:
+        - List[LogRecord]: Matching records, oldest first
+    """
+    records: List[LogRecord] = []
+    for record in read_records_reversed(get_log_files(logPath)):
+        if len(records) >= count:
+            break
+        # All further records are older than the time window
+        if logFilter.since is not None and record.time is not None and record.time < logFilter.since:
+            break
+        if logFilter.matches(record):
+            records.append(record)
+    records.reverse()
+    return records
+
+def follow(logPath: str, logFilter: LogFilter, callback: Callable[[LogRecord], None],
+           interval: float = 0.5, isRunning: Callable[[], bool] = lambda: True):
+    """Follow the log file and pass every new record matching the filter to the callback. The file
+    is reopened when it was rotated.
+
+    Args:
+        - logPath (str): Path of the current log file
+        - logFilter (LogFilter): Filter the records have to pass
+        - callback (Callable): Called with every new matching record
+        - interval (float): Time in seconds between two polls of the file
+        - isRunning (Callable): Following stops as soon as this returns False
+    """
+    file = open(logPath, 'r', errors='replace')
+    file.seek(0, SEEK_END)
+    pending: List[str] = []
+
+    def emit_pending():
+        if len(pending) > 0:
+            record = LogRecord.from_lines(list(pending))
+            if logFilter.matches(record):
+                callback(record)
+            pending.clear()
+
+    try:
+        while isRunning():
+            line = file.readline()
+            if line:
+                line = line.rstrip('\n')
+                if RECORD_HEADER.match(line) is not None:
+                    emit_pending()
+                pending.append(line)
+                continue
+
+            emit_pending()
+            time.sleep(interval)
+
+            # The file was rotated when it is shorter than the read position
+            if path.isfile(logPath) and stat(logPath).st_size < file.tell():
+                file.close()
+                file = open(logPath, 'r', errors='replace')
+    finally:
+        file.close()
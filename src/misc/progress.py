@@ -0,0 +1,156 @@
+"""Progress bars of the console
+
+Author:
+    (C) Marvin Mager - @mvnmgrx - 2022
+
+License identifier:
+    GPL-3.0
+"""
+
+import threading
+import time
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional, TypeVar
+
+from misc.tracing import Tracer
+
+if TYPE_CHECKING:
+    from misc.console import Console
+
+T = TypeVar('T')
+
+def format_bytes(count: int) -> str:
+    """Format a number of bytes human readable, e.g. `1.2 MB`"""
+    for unit in ['B', 'kB', 'MB']:
+        if count < 1000:
+            return f'{count:.0f} {unit}' if unit == 'B' else f'{count:.1f} {unit}'
+        count /= 1000
+    return f'{count:.1f} GB'
+
+def format_duration(seconds: float) -> str:
+    """Format a duration as `m:ss`"""
+    minutes, seconds = divmod(int(seconds), 60)
+    return f'{minutes}:{seconds:02d}'
+
+@dataclass
+class RequestStats():
+    """Counters of the requests sent to the InvenTree server. The counters are updated by all
+    threads sending requests."""
+
+    requests: int = 0
+    """Number of requests sent"""
+
+    inFlight: int = 0
+    """Number of requests currently waiting for a response"""
+
+    bytesDownloaded: int = 0
+    """Number of bytes of responses and downloaded files"""
+
+    requestsSaved: int = 0
+    """Number of GET requests that were not sent because an identical request was in flight"""
+
+    listener: Optional[object] = None
+    """Object with a `refresh_progress()` method that is called when the counters change"""
+
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def started(self):
+        """Count a request that was just sent"""
+        with self.lock:
+            self.requests += 1
+            self.inFlight += 1
+        self.notify()
+
+    def saved(self):
+        """Count a request that shared the response of an identical request in flight"""
+        with self.lock:
+            self.requestsSaved += 1
+        self.notify()
+
+    def finished(self):
+        """Count a request that just finished"""
+        with self.lock:
+            self.inFlight -= 1
+        self.notify()
+
+    def received(self, byteCount: int):
+        """Count the bytes of a response or downloaded file"""
+        with self.lock:
+            self.bytesDownloaded += byteCount
+        self.notify()
+
+    def notify(self):
+        if self.listener is not None:
+            self.listener.refresh_progress()
+
+@dataclass
+class Progress():
+    """Progress of a single phase of a command, drawn as a live progress bar by the console"""
+
+    console: 'Console'
+    """Console drawing the progress bar"""
+
+    phase: str
+    """Name of the phase, e.g. `Downloading parts`"""
+
+    total: int
+    """Number of items to process in this phase"""
+
+    unit: str = ''
+    """Unit of the items, e.g. `parts`"""
+
+    done: int = 0
+    """Number of items processed"""
+
+    startTime: float = field(default_factory=time.monotonic)
+    """Time the phase was started"""
+
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def advance(self, count: int = 1):
+        """Mark the given number of items as processed, may be called from any thread"""
+        with self.lock:
+            self.done += count
+        self.console.refresh_progress()
+
+    def track(self, items: Iterable[T]) -> Iterator[T]:
+        """Iterate over the items of this phase, advancing the progress after each item. The
+        progress bar is shown while iterating and removed afterwards. The phase is traced as a
+        single span."""
+        self.console.start_progress(self)
+        try:
+            with Tracer.span(self.phase, 'phase', total=self.total):
+                for item in items:
+                    yield item
+                    self.advance()
+        finally:
+            self.console.end_progress(self)
+
+    def render(self, stats: Optional[RequestStats] = None, width: int = 20) -> str:
+        """Render the progress bar as a single line
+
+        Args:
+            - stats (RequestStats): Request counters to show or None
+            - width (int): Width of the bar in characters
+
+        Returns:
+            - str: The rendered progress bar
+        """
+        ratio = min(self.done / self.total, 1.0) if self.total > 0 else 1.0
+        filled = int(ratio * width)
+        line = f'{self.phase} [{"#" * filled}{"." * (width - filled)}] {self.done}/{self.total} {self.unit}'.rstrip()
+
+        if stats is not None:
+            line += f' | {stats.requests} requests, {stats.inFlight} in flight'
+            if stats.requestsSaved > 0:
+                line += f', {stats.requestsSaved} shared'
+            if stats.bytesDownloaded > 0:
+                line += f' | {format_bytes(stats.bytesDownloaded)}'
+
+        elapsed = time.monotonic() - self.startTime
+        if 0 < self.done < self.total:
+            line += f' | ETA {format_duration(elapsed / self.done * (self.total - self.done))}'
+        else:
+            line += f' | {format_duration(elapsed)}'
+        return line
@@ -0,0 +1,80 @@
+"""Lightweight serialization of dataclasses from and to JSON-compatible dicts
+
+Author:
+    (C) Marvin Mager - @mvnmgrx - 2022
+
+License identifier:
+    GPL-3.0
+"""
+
+import types
+import typing
+
+from dataclasses import asdict, fields, is_dataclass
+from typing import Any, Dict, Type, TypeVar
+
+T = TypeVar('T')
+
+_typeHints: Dict[type, Dict[str, Any]] = {}
+"""Cache of the resolved type hints of each dataclass"""
+
+def to_dict(obj: Any) -> dict:
+    """Convert a dataclass instance to a JSON-compatible dict
+
+    Args:
+        - obj: Dataclass instance to convert
+
+    Returns:
+        - dict: Dictionary with the field names as keys, nested dataclasses are converted as well
+    """
+    return asdict(obj)
+
+def from_dict(cls: Type[T], data: dict) -> T:
+    """Create a dataclass instance from a dict, e.g. loaded from a JSON file. Nested dataclasses
+    and lists of dataclasses are created recursively. Unknown keys are ignored and missing keys
+    take the default value of their field.
+
+    Args:
+        - cls: Dataclass type to create
+        - data (dict): Data to create the instance from
+
+    Raises:
+        - ValueError: The data does not fit the structure of the dataclass
+
+    Returns:
+        - The dataclass instance
+    """
+    if not isinstance(data, dict):
+        raise ValueError(f'Expected an object for {cls.__name__}, got {type(data).__name__}')
+
+    if cls not in _typeHints:
+        _typeHints[cls] = typing.get_type_hints(cls)
+    hints = _typeHints[cls]
+
+    kwargs = {}
+    for field in fields(cls):
+        if field.init and field.name in data:
+            kwargs[field.name] = _convert(hints[field.name], data[field.name])
+    return cls(**kwargs)
+
+def _convert(hint: Any, value: Any) -> Any:
+    """Convert a JSON value to the given type hint"""
+    if value is None:
+        return None
+
+    origin = typing.get_origin(hint)
+    args = typing.get_args(hint)
+
+    if origin is typing.Union or origin is types.UnionType:
+        hints = [arg for arg in args if arg is not type(None)]
+        return _convert(hints[0], value) if len(hints) == 1 else value
+
+    if origin is list:
+        if not isinstance(value, list):
+            raise ValueError(f'Expected a list, got {type(value).__name__}')
+        return [_convert(args[0], item) for item in value] if args else value
+
+    if is_dataclass(hint):
+        return from_dict(hint, value)
+
+    return value
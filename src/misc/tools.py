@@ -6,14 +6,16 @@ from os import path
 from app import App
 
 from misc.logger import Logger
+from misc.tracing import Tracer
 
-def enumerate_schematic(app: App, schematic: Schematic) -> Dict[str, List[str]]:
+def enumerate_schematic(app: App, schematic: Schematic, use_parts_list: bool = True) -> Dict[str, List[str]]:
     """Searches for all references of the given parts in a root schematic as well as in all its
     sub-schematics. Only uses parts that are marked as `in_bom`.
     
     Params:
         - ``app``: The kitree app
         - ``schematic``: Root schematic parsed by KiUtils
+        - ``use_parts_list``: Only use parts on the project's part list (defaults to True)
     
     Returns:
         - Dictionary with IPN's as key and a list of references of components that use said IPN as 
@@ -32,6 +34,8 @@ def enumerate_schematic(app: App, schematic: Schematic) -> Dict[str, List[str]]:
     # Count the symbols in schematic that are marked as 'in_bom'
     parts = {}
     logger = Logger().Create(__name__)
+    ipnFieldName = app.config.get_ipn_field_name()
+    partsList = set(app.project.get_parts_list())
 
     def check_symbol(schematic: Schematic, symbol_uuid: str, parts_dict: dict, reference: str) -> bool:
         """Check if a symbol is in a schematic and, if found, add it to the given parts dictionary with 
@@ -50,20 +54,20 @@ def enumerate_schematic(app: App, schematic: Schematic) -> Dict[str, List[str]]:
             if symbol.uuid in symbol_uuid:
                 # The symbol was found
                 if not symbol.inBom:
-                    logger.info(f'Symbol {symbol.libId} ({reference}) skipped as its not marked "in_bom"..')
+                    logger.info('Symbol %s (%s) skipped as its not marked "in_bom"..', symbol.libId, reference)
                     return True
 
                 # Check if the symbol is a variant of another symbol or a power unit
                 if symbol.unit > 1 or reference.find("#PWR") != -1:
-                    logger.info(f'Skipping {reference} as it is either a power symbol or a symbol variant')
+                    logger.info('Skipping %s as it is either a power symbol or a symbol variant', reference)
                     return True
 
                 # Check if the IPN is in the property list:
                 for property in symbol.properties:
-                    if property.key == app.config.get_ipn_field_name():
+                    if property.key == ipnFieldName:
                         # Check if the symbol's IPN is on the project's part list
-                        if not property.value in app.project.get_parts_list():
-                            logger.info(f'Skipping {property.value} ({reference}) as it is not on the project\'s part list')
+                        if use_parts_list and not property.value in partsList:
+                            logger.info('Skipping %s (%s) as it is not on the project\'s part list', property.value, reference)
                             return True
 
                         # Add item to parts dict (property.value := IPN)
@@ -72,10 +76,10 @@ def enumerate_schematic(app: App, schematic: Schematic) -> Dict[str, List[str]]:
                         else:
                             parts_dict.update({ property.value: [ reference ] })
 
-                        logger.info(f'Added {property.value} ({reference}) to the parts list')
+                        logger.debug('Added %s (%s) to the parts list', property.value, reference)
                         return True
                 else:
-                    logger.warning(f'Skipping symbol {symbol.libId} ({reference}) as it has no IPN assigned ..')
+                    logger.warning('Skipping symbol %s (%s) as it has no IPN assigned ..', symbol.libId, reference)
                     return True
         return False
 
@@ -93,7 +97,7 @@ def enumerate_schematic(app: App, schematic: Schematic) -> Dict[str, List[str]]:
 
             # Search for the UUID in all symbols
             if not check_symbol(schematic, instPath.componentUuid, parts, instance.reference):
-                logger.error(f'Could not find symbol /{instPath.componentUuid} in schematic {path.basename(schematic.filePath)}')
+                logger.error('Could not find symbol /%s in schematic %s', instPath.componentUuid, path.basename(schematic.filePath))
 
         else:
             # Targeted symbol is somewhere else
@@ -104,21 +108,23 @@ def enumerate_schematic(app: App, schematic: Schematic) -> Dict[str, List[str]]:
                     # Sheet was found, load it
                     subsheetPath = path.join(path.dirname(schematic.filePath), sheet.fileName.value)
                     try:
-                        subsheet = Schematic().from_file(subsheetPath)
+                        with Tracer.span('parse schematic', 'kiutils', file=subsheetPath):
+                            subsheet = Schematic().from_file(subsheetPath)
                     except Exception as ex:
-                        logger.error(f'Found {instance.reference} at {sheet.uuid}, but could not its subsheet at "{subsheetPath}!"')
-                        logger.debug(f'Exception: {ex}')
+                        logger.error('Found %s at %s, but could not its subsheet at "%s!"', instance.reference, sheet.uuid, subsheetPath)
+                        logger.debug('Exception: %s', ex)
                         continue
 
                     if not check_symbol(subsheet, instPath.componentUuid, parts, instance.reference):
-                        logger.error(f'Could not find symbol {instPath.sheetUuid}/{instPath.componentUuid} in schematic {path.basename(subsheet.filePath)}')
+                        logger.error('Could not find symbol %s/%s in schematic %s', instPath.sheetUuid, instPath.componentUuid, path.basename(subsheet.filePath))
                     break
             else:
-                logger.error(f'No sheet for {instPath.sheetUuid} found!')
+                logger.error('No sheet for %s found!', instPath.sheetUuid)
     return parts
 
 
-def enumerate_board(app: App, board: Board, use_smd: bool = True, use_tht: bool = True) -> Dict[str, List[str]]:
+def enumerate_board(app: App, board: Board, use_smd: bool = True, use_tht: bool = True,
+                    use_parts_list: bool = True) -> Dict[str, List[str]]:
     """Searches for all references of the given parts in a board
     
     Params:
@@ -126,6 +132,7 @@ def enumerate_board(app: App, board: Board, use_smd: bool = True, use_tht: bool
         - ``board``: Board parsed by kiutils
         - ``use_smd``: Use SMD components when enumerating (defaults to True)
         - ``use_tht``: Use THT components when enumerating (defaults to True)
+        - ``use_parts_list``: Only use parts on the project's part list (defaults to True)
 
     Returns:
         - Dictionary with IPN's as key and a list of references of components that use said IPN as 
@@ -143,37 +150,39 @@ def enumerate_board(app: App, board: Board, use_smd: bool = True, use_tht: bool
     # Count the symbols in schematic that are marked as 'in_bom'
     parts = {}
     logger = Logger().Create(__name__)
+    ipnFieldName = app.config.get_ipn_field_name()
+    partsList = set(app.project.get_parts_list())
 
     for footprint in board.footprints:
         reference = footprint.graphicItems[0].text
 
         # Check if the symbol is a variant of another symbol or a power unit
         if footprint.attributes.boardOnly:
-            logger.info(f'Skipping {reference} as it was found only on the board!')
+            logger.info('Skipping %s as it was found only on the board!', reference)
             continue
 
         if footprint.attributes.excludeFromBom:
-            logger.info(f'Skipping {reference} as it was excluded from the BOM!')
+            logger.info('Skipping %s as it was excluded from the BOM!', reference)
             continue
 
         if footprint.attributes.excludeFromPosFiles:
-            logger.info(f'Skipping {reference} as it was excluded from POS files!')
+            logger.info('Skipping %s as it was excluded from POS files!', reference)
             continue
 
         if footprint.attributes.type == 'smd' and not use_smd:
-            logger.info(f'Skipping {reference} as SMD components shall not be used!')
+            logger.info('Skipping %s as SMD components shall not be used!', reference)
             continue
 
         if footprint.attributes.type == 'through_hole' and not use_tht:
-            logger.info(f'Skipping {reference} as THT components shall not be used!')
+            logger.info('Skipping %s as THT components shall not be used!', reference)
             continue
 
         # Check if the IPN is in the property list:
         for property in footprint.properties.keys():
-            if property == app.config.get_ipn_field_name():
+            if property == ipnFieldName:
                 # Check if the symbol's IPN is on the project's part list
-                if not footprint.properties[property] in app.project.get_parts_list():
-                    logger.info(f'Skipping {footprint.properties[property]} ({reference}) as it is not on the project\'s part list')
+                if use_parts_list and not footprint.properties[property] in partsList:
+                    logger.info('Skipping %s (%s) as it is not on the project\'s part list', footprint.properties[property], reference)
                     continue
 
                 # Add item to parts dict (property.value := IPN)
@@ -182,9 +191,9 @@ def enumerate_board(app: App, board: Board, use_smd: bool = True, use_tht: bool
                 else:
                     parts.update({ footprint.properties[property]: [ reference ] })
 
-                logger.info(f'Added {footprint.properties[property]} ({reference}) to the parts list')
+                logger.debug('Added %s (%s) to the parts list', footprint.properties[property], reference)
                 continue
         else:
-            logger.warning(f'Skipping {reference} as it has no IPN assigned ..')
+            logger.warning('Skipping %s as it has no IPN assigned ..', reference)
             continue
     return parts
\ No newline at end of file
@@ -0,0 +1,191 @@
+"""Tracing and profiling of commands
+
+Spans mark the phases of a command, the steps per part, requests to the InvenTree server and the
+reading and writing of KiCad files. They nest by time per thread and are exported in the trace
+event format of Chrome, which can be opened in `chrome://tracing` or https://ui.perfetto.dev.
+
+Tracing is disabled by default. A disabled span costs a single function call, so spans can stay
+in the hot paths.
+
+Author:
+    (C) Marvin Mager - @mvnmgrx - 2022
+
+License identifier:
+    GPL-3.0
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+class Span():
+    """A traced span, records a complete event when it is left"""
+
+    __slots__ = ('name', 'category', 'args', 'start')
+
+    def __init__(self, name: str, category: str, args: dict):
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = 0
+
+    def __enter__(self) -> 'Span':
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, excType, excValue, traceback) -> bool:
+        end = time.perf_counter_ns()
+        if excType is not None:
+            self.args['exception'] = excType.__name__
+        Tracer.record(self.name, self.category, self.start, end, self.args)
+        return False
+
+class NoSpan():
+    """Span handed out while tracing is disabled, does nothing"""
+
+    __slots__ = ()
+
+    def __enter__(self) -> 'NoSpan':
+        return self
+
+    def __exit__(self, excType, excValue, traceback) -> bool:
+        return False
+
+NO_SPAN = NoSpan()
+
+class Tracer():
+    """Static class collecting the spans of all threads while tracing is enabled"""
+
+    enabled: bool = False
+    """True while spans are recorded, see `start()` and `stop()`"""
+
+    _events: List[dict] = []
+    _threads: Dict[int, str] = {}
+    _origin: int = 0
+
+    @staticmethod
+    def span(name: str, category: str = 'kitree', **args) -> Span | NoSpan:
+        """Create a span to use with `with`, e.g. `with Tracer.span('parse board', 'kiutils'):`
+
+        Args:
+            - name (str): Name of the span, e.g. the phase or the URL of a request
+            - category (str): Category of the span, e.g. `command`, `api` or `kiutils`
+            - args: Values shown with the span, e.g. the IPN of a part
+
+        Returns:
+            - Span | NoSpan: The span, or a span doing nothing if tracing is disabled
+        """
+        if not Tracer.enabled:
+            return NO_SPAN
+        return Span(name, category, args)
+
+    @staticmethod
+    def record(name: str, category: str, start: int, end: int, args: Optional[dict] = None):
+        """Record a complete event. Times are taken from `time.perf_counter_ns()`."""
+        if not Tracer.enabled:
+            return
+        thread = threading.current_thread()
+        if thread.ident not in Tracer._threads:
+            Tracer._threads[thread.ident] = thread.name
+        # Appending to a list is atomic, the events of all threads go into one list
+        Tracer._events.append({
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': (start - Tracer._origin) / 1000,
+            'dur': (end - start) / 1000,
+            'pid': os.getpid(),
+            'tid': thread.ident,
+            'args': args or {},
+        })
+
+    @staticmethod
+    def start():
+        """Discard all recorded spans and start recording"""
+        Tracer._events = []
+        Tracer._threads = {}
+        Tracer._origin = time.perf_counter_ns()
+        Tracer.enabled = True
+
+    @staticmethod
+    def stop() -> List[dict]:
+        """Stop recording
+
+        Returns:
+            - List[dict]: The recorded trace events, including the names of the threads
+        """
+        Tracer.enabled = False
+        return Tracer.get_events()
+
+    @staticmethod
+    def get_events() -> List[dict]:
+        """Get the events recorded so far, including the names of the threads"""
+        names = [{'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': ident, 'args': {'name': name}}
+                 for ident, name in list(Tracer._threads.items())]
+        return names + list(Tracer._events)
+
+    @staticmethod
+    def write(filePath: str):
+        """Write the events recorded so far as Chrome trace event JSON
+
+        Args:
+            - filePath (str): Path of the JSON file
+        """
+        with open(filePath, 'w') as outfile:
+            json.dump({'traceEvents': Tracer.get_events(), 'displayTimeUnit': 'ms'}, outfile)
+
+class CommandProfile():
+    """Profiles a single command with `cProfile` and records its peak memory with `tracemalloc`.
+    Only the thread running the command is profiled, time spent waiting for requests of other
+    threads shows up as waiting. The profiling modules are imported on first use to keep the
+    startup time low."""
+
+    top: int = 25
+    """Number of functions listed in the report"""
+
+    def __init__(self, statsPath: Optional[str] = None):
+        import cProfile
+
+        self.statsPath = statsPath
+        """Path to write the pstats of the command to, e.g. to view them with snakeviz"""
+        self.profiler = cProfile.Profile()
+        self.peak = 0
+        self.seconds = 0.0
+
+    def __enter__(self) -> 'CommandProfile':
+        import tracemalloc
+
+        tracemalloc.start()
+        self.start = time.perf_counter()
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, excType, excValue, traceback) -> bool:
+        import tracemalloc
+
+        self.profiler.disable()
+        self.seconds = time.perf_counter() - self.start
+        _, self.peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        if self.statsPath:
+            self.profiler.dump_stats(self.statsPath)
+        return False
+
+    def report(self) -> List[str]:
+        """Get the lines of the report: run time, peak memory and the functions taking the most
+        time including their callees"""
+        import io
+        import pstats
+
+        from misc.progress import format_bytes
+
+        stream = io.StringIO()
+        stats = pstats.Stats(self.profiler, stream=stream)
+        stats.strip_dirs().sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top)
+        lines = [f'Profile: {self.seconds:.2f}s, peak memory {format_bytes(self.peak)} (tracemalloc)']
+        lines += [line for line in stream.getvalue().splitlines() if line.strip()]
+        if self.statsPath:
+            lines.append(f'Profile written to {self.statsPath}')
+        return lines
@@ -8,14 +8,15 @@ License identifier:
 """
 
 import json
-import marshmallow_dataclass
 
 from os import path
 from datetime import date
 from dataclasses import dataclass, field
 from typing import List, Optional
 
+from misc.files import write_atomic
 from misc.logger import Logger
+from misc.serialize import from_dict, to_dict
 
 @dataclass
 class ProjectConfigData():
@@ -40,18 +41,21 @@ class ProjectConfig():
     provides a basic abstraction from the JSON syntax in the file.
     """
 
-    data: ProjectConfigData = field(default_factory=lambda: ProjectConfigData)
+    data: ProjectConfigData = field(default_factory=lambda: ProjectConfigData())
     """Configuration data of the project"""
 
-    dataSchema = marshmallow_dataclass.class_schema(ProjectConfigData)()
-    """Data schema of the project config data class used for serialization/deserialization"""
-
     log = Logger.Create(__name__)
     """Logger of this project config"""
 
     filePath: Optional[str] = None
     """Path to the project"""
 
+    pendingPath: Optional[str] = None
+    """Path the config is written to on the next `flush()`, None if nothing changed"""
+
+    lastContent: Optional[str] = None
+    """Content of the project config file as last read or written"""
+
     def load(self, filepath: str) -> bool:
         """Load a project config file from the given path-like object and sets the file path
         attribute as given. This attribute can then be used for successive calls to `Save`
@@ -68,33 +72,61 @@ class ProjectConfig():
             return False
 
         with open(filepath) as infile:
-            content = json.load(infile)
-            self.data = self.dataSchema.load(content)
+            self.lastContent = infile.read()
+            self.data = from_dict(ProjectConfigData, json.loads(self.lastContent))
             self.filePath = filepath
+            self.pendingPath = None
         
         self.log.info(f'Loading project configuration from {filepath} was successfull')
         return True
 
     def save(self, filepath: Optional[str] = None) -> bool:
-        """Save a project's config to the file given as a path-like object
+        """Mark the project's config as changed. It is written to the file given as a path-like
+        object on the next call of `flush()`, so multiple changes only cause a single write.
 
         Args:
             - filepath (str): Path-like object to the .kitree file
 
         Returns:
-            - bool: True if the file was written successful, otherwise False
+            - bool: True if a path to write the file to is known, otherwise False
         """
         if filepath is None:
             if self.filePath is not None:
                 filepath = self.filePath
             else:
-                self.log.error('Failed to load project config file! No path given or set.')
+                self.log.error('Failed to save project config file! No path given or set.')
                 return False
 
-        with open(filepath, 'w') as outfile:
-            self.data.lastEditedDate = str(date.today())            
-            content = self.dataSchema.dump(self.data)
-            bytes_written = outfile.write(json.dumps(content, indent=4))
+        self.data.lastEditedDate = str(date.today())
+        self.pendingPath = filepath
+        return True
+
+    def flush(self) -> bool:
+        """Write pending changes of the project's config to its file. The file is replaced
+        atomically and left untouched if its content would not change.
+
+        Returns:
+            - bool: True if the file is up to date, otherwise False. The changes stay pending if
+              writing failed, so the next call retries.
+        """
+        if self.pendingPath is None:
+            return True
+        filepath = self.pendingPath
+
+        content = json.dumps(to_dict(self.data), indent=4)
+        if content == self.lastContent and filepath == self.filePath:
+            self.log.debug(f'Project configuration at {filepath} unchanged, skipping write')
+            self.pendingPath = None
+            return True
+
+        try:
+            bytes_written = write_atomic(filepath, content)
+        except OSError as ex:
+            self.log.error(f'Failed to write project configuration to {filepath}: {ex}')
+            return False
+        self.lastContent = content
+        self.filePath = filepath
+        self.pendingPath = None
 
         self.log.info(f'Saved project configuration to {filepath} was successfull ({bytes_written} bytes written)')
         return True
@@ -71,9 +71,15 @@ class Project():
             self.log.error(f'Could not find InvenTree server ID "{self.config.data.inventreeServerId}" in configured servers!')
             raise InvalidServerIdError(self.config.data.inventreeServerId)
 
-        if not self.api.connect(credentials):
-            self.log.error(f'Could not connect to InvenTree server at {credentials.domain}')
-            raise ApiConnectionError(credentials.domain)
+        if self.parent_app.config.get_offline_mode():
+            self.log.info(f'Offline mode, reading the catalog of {credentials.domain} from the local mirror')
+            self.api.set_credentials(credentials)
+            self.api.set_offline(True)
+        else:
+            # Local commands do not need the server, API calls wait for the connection when needed
+            self.log.info(f'Connecting to InvenTree server at {credentials.domain} in the background')
+            self.api.set_offline(False)
+            self.api.connect_async(credentials)
 
         self.name = projectName
         self.path = thePath
@@ -87,6 +93,13 @@ class Project():
             return False
         return True
 
+    def flush(self):
+        """Write pending changes of the project to its .kitree file"""
+        if not self.config.flush():
+            self.log.error(f'Could not write KiTree project at { self.path }')
+            return False
+        return True
+
     def get_master_part(self) -> str:
         return self.config.data.masterPart
     
@@ -109,6 +122,26 @@ class Project():
         self.log.info(f'Added part { partIpn } to project\'s part list')
         self.save()
 
+    def add_parts(self, partIpns: List[str]) -> List[str]:
+        """Add multiple parts to the parts list at once. The parts are not checked against the
+        InvenTree database, this has to be done beforehand (see `InvenTreeApi.get_part_ids()`).
+
+        Args:
+            - partIpns (List[str]): IPNs of the parts to add
+
+        Returns:
+            - List[str]: IPNs that were added, without those already on the parts list
+        """
+        partsList = set(self.config.data.parts)
+        added = [ipn for ipn in dict.fromkeys(partIpns) if ipn not in partsList]
+        if len(added) == 0:
+            return added
+
+        self.config.data.parts.extend(added)
+        self.log.info(f'Added {len(added)} parts to project\'s part list')
+        self.save()
+        return added
+
     def remove_part(self, partIpn: str):
         if partIpn not in self.config.data.parts:
             raise DescriptiveError(f"Part '{partIpn}' not in parts list!")
@@ -0,0 +1,56 @@
+"""Thin client sending commands to a running KiTree daemon
+
+Author:
+    (C) Marvin Mager - @mvnmgrx - 2022
+
+License identifier:
+    GPL-3.0
+"""
+
+import json
+import socket
+import sys
+
+from typing import List, Optional
+
+from misc.console import ExitCode, OutputMode
+
+def run_remote(socketPath: str, project: Optional[str], commands: List[str], useColor: bool,
+               keepGoing: bool = False, mode: str = OutputMode.Normal) -> int:
+    """Send commands to the KiTree daemon and stream its output to stdout
+
+    Args:
+        - socketPath (str): Path of the daemon's UNIX socket
+        - project (str): Name or path of the project to run the commands in, or None
+        - commands (List[str]): Command lines to execute
+        - useColor (bool): Request colored output
+        - keepGoing (bool): Continue after a command failed
+        - mode (str): Output mode of the console, see `OutputMode`
+
+    Returns:
+        - int: Exit code reported by the daemon
+    """
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(socketPath)
+    except OSError as ex:
+        print(f'Could not connect to the KiTree daemon at {socketPath}: {ex}', file=sys.stderr)
+        print('Start it with "kitree serve"', file=sys.stderr)
+        return ExitCode.Failed
+
+    with client, client.makefile('rwb') as stream:
+        request = {"project": project, "commands": commands, "color": useColor, "keepGoing": keepGoing,
+                   "mode": mode}
+        stream.write(json.dumps(request).encode() + b'\n')
+        stream.flush()
+
+        for line in stream:
+            message = json.loads(line)
+            if 'out' in message:
+                sys.stdout.write(message['out'])
+                sys.stdout.flush()
+            elif 'exit' in message:
+                return message['exit']
+
+    print('Connection to the KiTree daemon was closed unexpectedly', file=sys.stderr)
+    return ExitCode.Failed
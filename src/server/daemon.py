@@ -0,0 +1,222 @@
+"""KiTree daemon keeping projects, API connections and caches warm between CLI invocations
+
+Author:
+    (C) Marvin Mager - @mvnmgrx - 2022
+
+License identifier:
+    GPL-3.0
+"""
+
+import json
+import signal
+import socket
+import socketserver
+import threading
+
+from dataclasses import dataclass, field
+from os import chmod, path, makedirs, umask, unlink
+from typing import TYPE_CHECKING, Callable, Dict, Optional
+
+from misc.console import ExitCode, OutputMode
+from misc.logger import Logger
+
+if TYPE_CHECKING:
+    from app import App
+
+DEFAULT_SOCKET_PATH = path.join(path.expanduser('~'), '.kitree', 'kitree.sock')
+"""Default path of the UNIX socket the daemon listens on"""
+
+class ClientWriter():
+    """Text stream forwarding console output to a client as JSON lines of the form
+    ``{"out": "<text>"}``. Output is buffered until a line is complete or the stream is flushed."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.buffer = []
+
+    def write(self, text: str) -> int:
+        self.buffer.append(text)
+        if '\n' in text:
+            self.flush()
+        return len(text)
+
+    def flush(self):
+        if len(self.buffer) == 0:
+            return
+        self.send({"out": ''.join(self.buffer)})
+        self.buffer.clear()
+
+    def send(self, message: dict):
+        self.stream.write(json.dumps(message).encode() + b'\n')
+        self.stream.flush()
+
+@dataclass
+class Session():
+    """An application instance with a project loaded, shared by all clients using that project"""
+
+    app: 'App'
+    """The application of this session"""
+
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    """Lock serializing the clients of this session"""
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    """Handles a single client connection. The client sends one JSON line with the request:
+
+    ``{"project": "<name or path>" | null, "commands": ["..."], "color": bool, "keepGoing": bool,
+    "mode": "normal" | "quiet" | "json"}``
+
+    The console output is streamed back as ``{"out": "<text>"}`` lines, followed by a final
+    ``{"exit": <exit code>}`` line.
+    """
+
+    server: 'KiTreeDaemon'
+
+    def handle(self):
+        writer = ClientWriter(self.wfile)
+        try:
+            request = json.loads(self.rfile.readline())
+            exitCode = self.server.execute(
+                project   = request.get('project'),
+                commands  = request.get('commands', []),
+                writer    = writer,
+                useColor  = request.get('color', False),
+                keepGoing = request.get('keepGoing', False),
+                mode      = request.get('mode', OutputMode.Normal)
+            )
+        except Exception as ex:
+            self.server.log.exception('Handling client request failed')
+            writer.write(f'Daemon failed to handle the request: {ex}\n')
+            exitCode = ExitCode.Failed
+
+        try:
+            writer.flush()
+            writer.send({"exit": exitCode})
+        except OSError:
+            self.server.log.warning('Client disconnected before the request was finished')
+
+class KiTreeDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Daemon serving KiTree commands over a local UNIX socket. Each project gets its own
+    application instance that stays loaded, so its API connection and caches are reused by all
+    clients. Clients of the same project are served one after another."""
+
+    daemon_threads = True
+    log = Logger.Create(__name__)
+
+    def __init__(self, socketPath: str, appFactory: Callable[[], 'App']):
+        """Create the daemon and bind it to the given socket path
+
+        Args:
+            - socketPath (str): Path of the UNIX socket to listen on
+            - appFactory (Callable): Creates a new application with its commands registered
+        """
+        self.socketPath = socketPath
+        self.appFactory = appFactory
+        self.sessions: Dict[str, Session] = {}
+        self.sessionsLock = threading.Lock()
+
+        makedirs(path.dirname(socketPath), mode=0o700, exist_ok=True)
+        self.remove_stale_socket()
+        # The socket is created with the umask, restrict it so no other user can connect before
+        # the socket's permissions are set
+        previousUmask = umask(0o077)
+        try:
+            super().__init__(socketPath, RequestHandler)
+        finally:
+            umask(previousUmask)
+        chmod(socketPath, 0o600)
+
+    def remove_stale_socket(self):
+        """Remove the socket file of a daemon that did not shut down properly
+
+        Raises:
+            - RuntimeError: Another daemon is already listening on the socket
+        """
+        if not path.exists(self.socketPath):
+            return
+
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.socketPath)
+        except OSError:
+            self.log.info(f'Removing stale socket at {self.socketPath}')
+            unlink(self.socketPath)
+            return
+        finally:
+            probe.close()
+        raise RuntimeError(f'Another KiTree daemon is already listening at {self.socketPath}')
+
+    def get_session(self, project: Optional[str]) -> Session:
+        """Get the session of the given project, creating it if required
+
+        Args:
+            - project (str): Name or path of the project as given to ``project load`` or None for a
+              session without a project
+
+        Returns:
+            - Session: The session of the project
+        """
+        key = project or ''
+        with self.sessionsLock:
+            if key not in self.sessions:
+                self.log.info(f'Creating session for project "{key}"')
+                self.sessions[key] = Session(app=self.appFactory())
+            return self.sessions[key]
+
+    def drop_session(self, project: Optional[str]):
+        """Remove the session of the given project, e.g. after loading it failed"""
+        with self.sessionsLock:
+            self.sessions.pop(project or '', None)
+
+    def execute(self, project: Optional[str], commands: list, writer: ClientWriter, useColor: bool,
+                keepGoing: bool, mode: str = OutputMode.Normal) -> int:
+        """Execute commands in the session of the given project
+
+        Args:
+            - project (str): Name or path of the project or None
+            - commands (list): Command lines to execute
+            - writer (ClientWriter): Stream to write the console output to
+            - useColor (bool): Send colored output
+            - keepGoing (bool): Continue after a command failed
+            - mode (str): Output mode of the console, see `OutputMode`
+
+        Returns:
+            - int: Exit code of the commands
+        """
+        session = self.get_session(project)
+        with session.lock:
+            console = session.app.console
+            console.output = writer
+            console.useColor = useColor
+            console.mode = mode
+            console.interactive = False
+            console.isRunning = True
+            console.indentationLevel = 0
+            try:
+                if project is not None and not session.app.project.isLoaded:
+                    exitCode = console.process_input(f'project load {project}')
+                    if not session.app.project.isLoaded:
+                        self.drop_session(project)
+                        return exitCode if exitCode != ExitCode.Ok else ExitCode.Failed
+
+                self.log.info(f'Executing {len(commands)} command line(s) for project "{project or ""}"')
+                return console.run_script(commands, keepGoing=keepGoing)
+            finally:
+                console.output = None
+
+    def run(self):
+        """Serve clients until interrupted or terminated"""
+        def terminate(signum, frame):
+            raise KeyboardInterrupt()
+        signal.signal(signal.SIGTERM, terminate)
+
+        self.log.info(f'KiTree daemon listening at {self.socketPath}')
+        try:
+            self.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.server_close()
+            if path.exists(self.socketPath):
+                unlink(self.socketPath)
+            self.log.info('KiTree daemon stopped')